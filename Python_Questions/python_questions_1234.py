@@ -32,10 +32,23 @@ test_cases = [
 ############################################################################################################
 # Soru 3: Dosya İstatistikleri
 
+import codecs
+import contextlib
+import multiprocessing
+import os
+import random
+import re
 import string
+import tempfile
+import time
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import NamedTuple
 filepath = "test.txt"
-def statsics_file(file_path):
+
+# İlk sürüm: dosyanın tamamını belleğe okur. Karşılaştırma (benchmark) için korunur.
+def statsics_file_legacy(file_path):
     with open(file_path, "r") as file:
         try:
             data = file.read()
@@ -57,8 +70,214 @@ def statsics_file(file_path):
         except Exception as e:
             return f"Olusan hata: {e}"
 
+
+# Akışlı ve paralel sürüm. Dosya sabit boyutlu parçalar halinde okunur; bellek
+# kullanımı dosya boyutuna değil parça boyutuna ve kelime dağarcığına bağlıdır.
+# Büyük dosyalar boşluk karakterlerinde bölünerek aralıklara ayrılır, aralıklar
+# (ve birden çok dosya) bir süreç havuzunda sayılır, Counter'lar birleştirilir.
+# Kelime tanımı ilk sürümle aynıdır: küçük harfe çevirme, noktalama silme,
+# boşluklara göre bölme.
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+# Aralık sınırları ASCII boşluk baytlarına konur; UTF-8 gibi ASCII uyumlu
+# kodlamalarda bu baytlar çok baytlı bir karakterin parçası olamaz
+_ASCII_WHITESPACE = re.compile(rb'[\t\n\x0b\x0c\r\x1c-\x1f ]')
+
+
+class WordStats(NamedTuple):
+    total_words: int
+    unique_words: int
+    most_common: list # [(kelime, sayı), ...]
+    frequencies: Counter
+    bytes_read: int
+
+
+def _count_words(chunks):
+    # Parça sınırında bölünen kelime bir sonraki parçaya taşınır; sayılan metin
+    # her zaman boşlukla bittiği için kelimeler bütün halde işlenir
+    raw = Counter()
+    carry = ''
+    for chunk in chunks:
+        text = carry + chunk
+        carry = ''
+        if text and not text[-1].isspace():
+            carry = text.rsplit(None, 1)[-1]
+            text = text[:len(text) - len(carry)]
+        raw.update(text.split())
+    raw.update(carry.split())
+
+    # Küçük harfe çevirme ve noktalama silme kelime sınırlarını değiştirmez;
+    # metnin tamamı yerine her farklı ham kelimeye bir kez uygulanır
+    counts = Counter()
+    for word, count in raw.items():
+        word = word.lower().translate(_PUNCTUATION_TABLE)
+        if word:
+            counts[word] += count
+    return counts
+
+
+def _read_range(path, start, end, encoding, chunk_size):
+    # Bayt aralığını parça parça okur; artımlı çözücü, parça sınırına denk
+    # gelen çok baytlı karakterleri birleştirir
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = file.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield decoder.decode(data)
+    yield decoder.decode(b'', final=True)
+
+
+def _count_range(path, start, end, encoding, chunk_size):
+    return _count_words(_read_range(path, start, end, encoding, chunk_size))
+
+
+def _next_boundary(file, offset, size, block_size=64 * 1024):
+    file.seek(offset)
+    while True:
+        data = file.read(block_size)
+        if not data:
+            return size
+        match = _ASCII_WHITESPACE.search(data)
+        if match:
+            return offset + match.end()
+        offset += len(data)
+
+
+def _split_ranges(path, size, parts, encoding):
+    if parts <= 1 or '\t\n '.encode(encoding) != b'\t\n ':
+        # ASCII uyumlu olmayan kodlamalar (UTF-16 vb.) bölünmeden okunur
+        return [(0, size)] if size else []
+    bounds = [0]
+    with open(path, 'rb') as file:
+        for i in range(1, parts):
+            bounds.append(_next_boundary(file, max(size * i // parts, bounds[-1]), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def word_stats(paths, workers=None, chunk_size=1 << 20, encoding='utf-8', top=5, min_range_size=32 << 20):
+    """
+    Bir veya birden çok dosyanın kelime istatistiklerini döndürür.
+
+    workers: süreç sayısı (None: CPU sayısı, 1: aynı süreçte akışlı okuma)
+    chunk_size: bir seferde okunan bayt sayısı
+    min_range_size: bir dosya en az bu boyutta aralıklara bölünür; toplam
+    boyutu bundan küçük girdiler (çok sayıda küçük dosya dahil) süreç havuzu
+    açılmadan aynı süreçte okunur
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    workers = workers or os.cpu_count() or 1
+
+    jobs = []
+    bytes_read = 0
+    for path in paths:
+        size = os.path.getsize(path)
+        bytes_read += size
+        parts = max(1, min(workers, size // min_range_size))
+        jobs += [(path, start, end) for start, end in _split_ranges(path, size, parts, encoding)]
+
+    counts = Counter()
+    # Havuzun açılış ve sonuçları taşıma maliyeti küçük girdilerde kazancı aşar
+    if workers == 1 or len(jobs) <= 1 or bytes_read < min_range_size:
+        for path, start, end in jobs:
+            counts.update(_count_range(path, start, end, encoding, chunk_size))
+    else:
+        paths, starts, ends = zip(*jobs)
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            for partial in executor.map(_count_range, paths, starts, ends, repeat(encoding), repeat(chunk_size)):
+                counts.update(partial)
+
+    return WordStats(
+        total_words=sum(counts.values()),
+        unique_words=len(counts),
+        most_common=counts.most_common(top),
+        frequencies=counts,
+        bytes_read=bytes_read,
+    )
+
+
+def statsics_file(file_path, workers=None, chunk_size=1 << 20, encoding='utf-8'):
+    try:
+        return word_stats(file_path, workers=workers, chunk_size=chunk_size, encoding=encoding)
+    except FileNotFoundError:
+        return "Dosya bulunamadı"
+    except Exception as e:
+        return f"Olusan hata: {e}"
+
 # Fonksiyonu test etmek icin asagidaki yprum satirini kaldirin.
 # test = statsics_file(filepath)
+# print(f"Toplam kelime sayısı: {test.total_words}\n En çok geçen 5 kelime: {test.most_common}")
+
+
+def _measure_stats(kind, path, workers):
+    # Ayrı bir süreçte çalışır; en yüksek RSS değerleri yalnızca bu ölçüme aittir
+    import resource
+
+    started = time.perf_counter()
+    if kind == 'legacy':
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            statsics_file_legacy(path)
+    else:
+        word_stats(path, workers=workers)
+    elapsed = time.perf_counter() - started
+    # Linux'ta ru_maxrss KB cinsindendir; işçiler için en büyük çocuk süreç
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return elapsed, own, children
+
+
+def _write_corpus(path, size_mb, seed=42):
+    rng = random.Random(seed)
+    letters = string.ascii_lowercase + 'çğıöşü'
+    vocabulary = [
+        ''.join(rng.choices(letters, k=rng.randint(2, 10))).capitalize() if i % 7 == 0
+        else ''.join(rng.choices(letters, k=rng.randint(2, 10)))
+        for i in range(20000)
+    ]
+    punctuation = ['', '', '', '', ',', '.', '!', '?', ';', '"']
+    lines = []
+    for _ in range(20000):
+        words = rng.choices(vocabulary, k=rng.randint(5, 20))
+        lines.append(' '.join(word + rng.choice(punctuation) for word in words))
+    # Yaklaşık 2 MB'lık blok dosya boyutuna ulaşılana kadar yinelenir
+    block = ('\n'.join(lines) + '\n').encode('utf-8')
+    with open(path, 'wb') as file:
+        for _ in range(max(1, size_mb * (1 << 20) // len(block))):
+            file.write(block)
+
+
+def benchmark_statsics_file(path=None, size_mb=200, workers=None):
+    """
+    İlk sürümü, akışlı tek süreçli sürümü ve paralel sürümü aynı dosya
+    üzerinde ayrı süreçlerde çalıştırır; süreyi, MB/sn cinsinden hızı ve en
+    yüksek RSS'yi yazdırır. path verilmezse size_mb boyutunda geçici bir
+    metin dosyası oluşturulur.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        if path is None:
+            path = os.path.join(directory, 'corpus.txt')
+            _write_corpus(path, size_mb)
+        size = os.path.getsize(path) / (1 << 20)
+        print(f"Dosya: {path} ({size:.1f} MB)")
+        context = multiprocessing.get_context('spawn')
+        for name, kind, process_count in (
+            ("ilk sürüm", 'legacy', None),
+            ("akışlı (1 süreç)", 'stream', 1),
+            (f"paralel ({workers or os.cpu_count()} süreç)", 'stream', workers),
+        ):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                elapsed, own, children = executor.submit(_measure_stats, kind, path, process_count).result()
+            print(f"{name:<22} süre={elapsed:7.2f} sn  {size / elapsed:7.1f} MB/sn  "
+                  f"en yüksek RSS={own / 1024:7.1f} MB  (en büyük işçi {children / 1024:.1f} MB)")
+
+# Fonksiyonu test etmek icin asagidaki yorum satirini kaldirin.
+# benchmark_statsics_file()
 
 
 ############################################################################################################
@@ -67,8 +286,10 @@ def statsics_file(file_path):
 
 import aiohttp
 import asyncio
+import contextlib
 import logging
-from typing import List, Tuple
+import random
+from typing import AsyncIterator, Iterable, List, NamedTuple, Optional, Tuple
 # Verilen URL'den web sayfasını getirir ve içeriği döndürür.
 async def fetch_url(url: str, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, timeout: int) -> Tuple[str, str or None]:
     try:
@@ -88,14 +309,146 @@ async def fetch_url(url: str, session: aiohttp.ClientSession, semaphore: asyncio
         return url, error_message
     
 # Verilen URL listesinden web sayfalarını asenkron olarak getirir.
+# Sonuçlar iter_fetch_urls'ten toplanır ve URL sırasıyla döndürülür.
 async def fetch_urls_async(urls: List[str], concurrency_limit: int = 5, request_timeout: int = 10) -> List[Tuple[str, str or None]]:
-    semaphore = asyncio.Semaphore(concurrency_limit) 
+    results = [None] * len(urls)
+    async with contextlib.aclosing(iter_fetch_urls(
+        urls, concurrency_limit=concurrency_limit, request_timeout=request_timeout,
+    )) as fetched:
+        async for result in fetched:
+            results[result.index] = (result.url, result.body if result.error is None else result.error)
+    return results
+
+
+# Büyük taramalar için akışlı sürüm. URL'ler sınırlı bir iş kuyruğundan sabit
+# sayıda işçiye dağıtılır; tamamlanan sonuçlar hemen verilir ve tüketici
+# yavaşsa sonuç kuyruğu dolduğunda işçiler bekler. Böylece bellekte aynı anda
+# en fazla 2 * concurrency_limit gövde bulunur (kuyruktakiler ve işçilerdekiler). Aynı sunucuya açılan
+# bağlantılar paylaşılan TCPConnector'da per_host_limit ile sınırlıdır.
+class FetchResult(NamedTuple):
+    index: int # URL'nin girdideki sırası
+    url: str
+    status: Optional[int]
+    body: Optional[str]
+    error: Optional[str]
+    attempts: int
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+def _retry_delay(attempt: int, backoff_base: float, backoff_max: float) -> float:
+    # Tam rastgele (full jitter) üstel bekleme: eşzamanlı yeniden denemeler dağılır
+    return random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+
+
+async def _read_body(response: aiohttp.ClientResponse, max_body_size: int) -> str:
+    if response.content_length is not None and response.content_length > max_body_size:
+        raise _BodyTooLarge(response.content_length)
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        body += chunk
+        if len(body) > max_body_size:
+            raise _BodyTooLarge(len(body))
+    return body.decode(response.charset or 'utf-8', errors='replace')
+
+
+async def _fetch_with_retries(index, url, session, request_timeout, max_body_size, retries, backoff_base, backoff_max):
     timeout = aiohttp.ClientTimeout(total=request_timeout)
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            async with session.get(url, timeout=timeout) as response:
+                if response.status >= 500 and attempt <= retries:
+                    error = f"Sunucu Hatası: {response.status}"
+                else:
+                    response.raise_for_status()
+                    body = await _read_body(response, max_body_size)
+                    return FetchResult(index, url, response.status, body, None, attempt)
+        except asyncio.TimeoutError:
+            error = "Zaman Aşımı Hatası"
+            if attempt > retries:
+                return FetchResult(index, url, None, None, error, attempt)
+        except _BodyTooLarge as e:
+            return FetchResult(index, url, response.status, None, f"Yanıt Çok Büyük Hatası: {e} bayt > {max_body_size}", attempt)
+        except aiohttp.ClientResponseError as e:
+            return FetchResult(index, url, e.status, None, f"İstemci Hatası: {type(e).__name__} - {e}", attempt)
+        except aiohttp.ClientError as e:
+            return FetchResult(index, url, None, None, f"İstemci Hatası: {type(e).__name__} - {e}", attempt)
+        except Exception as e:
+            return FetchResult(index, url, None, None, f"Beklenmeyen Hata: {type(e).__name__} - {e}", attempt)
+        logging.info("%s yeniden deneniyor (%s, deneme %d)", url, error, attempt)
+        await asyncio.sleep(_retry_delay(attempt - 1, backoff_base, backoff_max))
+
 
-    async with aiohttp.ClientSession(timeout=timeout) as session: 
-        tasks = [fetch_url(url, session, semaphore, request_timeout) for url in urls]
-        results = await asyncio.gather(*tasks)
-        return results
+async def iter_fetch_urls(
+    urls: Iterable[str],
+    concurrency_limit: int = 5,
+    request_timeout: float = 10,
+    per_host_limit: int = 2,
+    max_body_size: int = 5 * 1024 * 1024,
+    retries: int = 3,
+    backoff_base: float = 0.5,
+    backoff_max: float = 10,
+) -> AsyncIterator[FetchResult]:
+    """
+    URL'leri getirir ve sonuçları tamamlandıkça verir (sıra garanti edilmez;
+    FetchResult.index girdideki sırayı taşır). urls bir üreteç olabilir;
+    yalnızca kuyruğa sığan kadarı önceden okunur. Üreteç hata verirse o ana
+    kadar kuyruğa alınan URL'ler yine verilir, ardından hata yükselir.
+
+    5xx yanıtları ve zaman aşımları en fazla retries kez, tam rastgele üstel
+    beklemeyle yeniden denenir. Gövde parça parça okunur; max_body_size
+    bayttan büyük yanıtlar hata olarak raporlanır. Döngüden erken çıkılacaksa
+    üreteç contextlib.aclosing ile kullanılmalıdır; kapanınca işçiler iptal
+    edilir ve oturum kapatılır.
+    """
+    work = asyncio.Queue(maxsize=concurrency_limit * 2)
+    results = asyncio.Queue(maxsize=concurrency_limit)
+    done = object() # işçilerin bitişini bildiren işaret
+
+    connector = aiohttp.TCPConnector(limit=concurrency_limit, limit_per_host=per_host_limit)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def stop_workers():
+            for _ in range(concurrency_limit):
+                await work.put(done)
+
+        async def produce():
+            try:
+                for item in enumerate(urls):
+                    await work.put(item)
+            except Exception:
+                # urls üreteci hata verse de işçiler durur ve tüketici döngüsü
+                # takılmaz; hata aşağıda tasks[0] beklenince yükselir
+                await stop_workers()
+                raise
+            await stop_workers()
+
+        async def worker():
+            while (item := await work.get()) is not done:
+                index, url = item
+                await results.put(await _fetch_with_retries(
+                    index, url, session, request_timeout, max_body_size, retries, backoff_base, backoff_max,
+                ))
+            await results.put(done)
+
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(worker()) for _ in range(concurrency_limit)]
+        try:
+            running = concurrency_limit
+            while running:
+                result = await results.get()
+                if result is done:
+                    running -= 1
+                else:
+                    yield result
+            await tasks[0] # üreticinin hatası (ör. urls üretecinde) burada yükselir
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
 if __name__ == "__main__":
     urls = [
@@ -1,8 +1,15 @@
 # Soru 5: Önbellekleme (Caching) ve Veri Yapıları
 
+import asyncio
 import functools
+import inspect
+import random
+import sys
 import time
 import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 @functools.lru_cache(maxsize=3) # Önbellek boyutu 3 ile sınırlı
 def test_func(param1, param2):
@@ -40,66 +47,270 @@ print(f"Kaçırma sayısı (cache miss): {test_func.cache_info().misses}")
 
 
 # TTL (Time To Live) ile önbellekleme
+#
+# Yeni kullanım sırası bir OrderedDict'te tutulur: isabet (move_to_end), ekleme
+# ve en eski girdinin çıkarılması (popitem) O(1)'dir. TTL tüm girdiler için aynı
+# olduğundan ikinci bir OrderedDict yazma sırasını, yani bitiş sırasını tutar;
+# süresi dolan girdiler bu sıranın başından O(1) ile toplanır (ayrıca okunurken
+# de tembel olarak silinir). Kilit yalnızca sözlük işlemleri sırasında tutulur:
+# aynı anahtarı kaçıran iş parçacıkları tek bir hesaplamayı bekler, farklı
+# anahtarlar paralel hesaplanır.
+#
+# async def fonksiyonlar da sarılabilir: aynı anahtarı kaçıran coroutine'ler
+# tek bir görevi (task) bekler. İsteğe bağlı olarak girdiler tahmini bayt
+# boyutlarına göre bir bütçeyle sınırlanır (max_bytes) ve süresi dolan değer
+# stale_ttl saniye boyunca sunulurken arka planda yenilenir
+# (stale-while-revalidate).
+def estimate_size(value):
+    """
+    Değerin bellekteki boyutunu kaba olarak tahmin eder: sys.getsizeof ile
+    list/tuple/set/dict içerikleri ve nesnelerin __dict__'i gezilir; paylaşılan
+    nesneler bir kez sayılır.
+    """
+    seen = set()
+    stack = [value]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+    return total
+
+
+class _InFlight:
+    # Süren bir hesaplama; bekleyenler sonucu veya hatayı buradan alır
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_FRESH, _STALE = 'fresh', 'stale'
+
+
 class TTL_LRU_Cache:
-    def __init__(self, maxsize=128, ttl=60):
-        self.maxsize = maxsize
+    _kwargs_mark = object() # args ile kwargs'ın anahtarda karışmaması için ayraç
+
+    def __init__(self, maxsize=128, ttl=60, verbose=False, max_bytes=None, sizeof=estimate_size, stale_ttl=0):
+        self.maxsize = maxsize # en fazla girdi sayısı (None: sınırsız)
         self.ttl = ttl # saniye cinsinden yaşam süresi
-        self.cache = {}
-        self.lru_keys = [] # LRU için anahtar listesi
+        self.verbose = verbose # isabet/kaçırma mesajlarını yazdır
+        self.max_bytes = max_bytes # değerlerin tahmini toplam boyutu için bütçe (None: kapalı)
+        self.sizeof = sizeof # bir değerin bayt cinsinden tahmini boyutu
+        self.stale_ttl = stale_ttl # süresi dolan değerin yenilenirken sunulabileceği ek süre
+        self.cache = OrderedDict() # anahtar -> (değer, bitiş zamanı, boyut), en eskiden en yeniye
+        self.expiry = OrderedDict() # anahtar -> silinme zamanı, yazma (= bitiş) sırasıyla
+        self.in_flight = {} # anahtar -> _InFlight
+        self.async_in_flight = weakref.WeakKeyDictionary() # olay döngüsü -> {anahtar: Task}
         self.lock = threading.Lock()
+        self.currbytes = 0
+        self.hits = self.stale_hits = self.misses = self.evictions = self.expirations = 0
 
     def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+            return self._wrap_async(func)
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             key = self._make_key(args, kwargs)
             with self.lock:
-                if key in self.cache:
-                    value, expiry_time = self.cache[key]
-                    if expiry_time > time.time(): # TTL kontrolü
-                        self._update_lru(key) # LRU listesini güncelle
-                        print(f"(TTL Cache) Önbellekten getiriliyor: key={key}")
-                        return value
-                    else:
-                        print(f"(TTL Cache) TTL süresi doldu, yeniden hesaplanıyor: key={key}")
-                        del self.cache[key] # Süresi dolan girdiyi sil
-                        self.lru_keys.remove(key) # LRU listesinden de sil
-                else:
-                    print(f"(TTL Cache) Önbellekte yok, hesaplanıyor: key={key}")
-
-                value = func(*args, **kwargs)
-                self._add_to_cache(key, value)
-                return value
+                state, value = self._lookup(key)
+                if state == _STALE and key not in self.in_flight:
+                    # Eski değer hemen döner, yenisi arka planda hesaplanır
+                    call = self.in_flight[key] = _InFlight()
+                    threading.Thread(
+                        target=self._refresh, args=(key, func, args, kwargs, call), daemon=True,
+                    ).start()
+                if state is not None:
+                    return value
+                self.misses += 1
+                call = self.in_flight.get(key)
+                owner = call is None
+                if owner:
+                    call = self.in_flight[key] = _InFlight()
+
+            if not owner:
+                # Aynı anahtar başka bir iş parçacığında hesaplanıyor
+                call.event.wait()
+                if call.error is not None:
+                    raise call.error
+                return call.value
+            return self._compute(key, func, args, kwargs, call)
+
+        wrapper.cache_info = self.cache_info
+        wrapper.cache_clear = self.cache_clear
         return wrapper
 
+    def _wrap_async(self, func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = self._make_key(args, kwargs)
+            loop = asyncio.get_running_loop()
+            with self.lock:
+                # Görevler olay döngüsüne bağlı olduğundan döngü başına tutulur
+                in_flight = self.async_in_flight.setdefault(loop, {})
+                state, value = self._lookup(key)
+                if state == _STALE and key not in in_flight:
+                    in_flight[key] = self._create_task(loop, in_flight, key, func, args, kwargs)
+                if state is not None:
+                    return value
+                self.misses += 1
+                task = in_flight.get(key)
+                if task is None:
+                    task = in_flight[key] = self._create_task(loop, in_flight, key, func, args, kwargs)
+            # Bekleyenlerden biri iptal edilirse ortak hesaplama sürer
+            return await asyncio.shield(task)
+
+        wrapper.cache_info = self.cache_info
+        wrapper.cache_clear = self.cache_clear
+        return wrapper
+
+    def _create_task(self, loop, in_flight, key, func, args, kwargs):
+        task = loop.create_task(self._acompute(in_flight, key, func, args, kwargs))
+        # Kimsenin beklemediği (arka plan yenilemesi) görevlerin hatası da okunmuş sayılır
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return task
+
+    async def _acompute(self, in_flight, key, func, args, kwargs):
+        try:
+            value = await func(*args, **kwargs)
+            with self.lock:
+                self._add_to_cache(key, value)
+            return value
+        finally:
+            with self.lock:
+                in_flight.pop(key, None)
+
+    def _compute(self, key, func, args, kwargs, call):
+        try:
+            call.value = func(*args, **kwargs)
+        except BaseException as error:
+            # Hatalar önbelleğe alınmaz; bekleyenler aynı hatayı alır
+            call.error = error
+            raise
+        else:
+            with self.lock:
+                self._add_to_cache(key, call.value)
+            return call.value
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            call.event.set()
+
+    def _refresh(self, key, func, args, kwargs, call):
+        try:
+            self._compute(key, func, args, kwargs, call)
+        except Exception as error:
+            # Eski değer, stale_ttl bitene kadar sunulmaya devam eder
+            self._log(f"(TTL Cache) Arka planda yenilenemedi: key={key}, hata={error!r}")
+
     def _make_key(self, args, kwargs):
         key = args
         if kwargs:
-            key += tuple(sorted(kwargs.items())) # kwargs'ı sıralı tuple'a dönüştür
+            key += (self._kwargs_mark,) + tuple(sorted(kwargs.items())) # kwargs'ı sıralı tuple'a dönüştür
         return key
 
-    def _update_lru(self, key):
-        if key in self.lru_keys:
-            self.lru_keys.remove(key) # Mevcutsa listeden çıkar
-        self.lru_keys.append(key) # En sona ekle (en son kullanılan)
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def _lookup(self, key):
+        # Kilit altında çağrılır; (durum, değer) veya kaçırmada (None, None) döner
+        entry = self.cache.get(key)
+        if entry is None:
+            self._log(f"(TTL Cache) Önbellekte yok, hesaplanıyor: key={key}")
+            return None, None
+        value, expiry_time, _ = entry
+        now = time.monotonic()
+        if expiry_time > now: # TTL kontrolü
+            self.cache.move_to_end(key)
+            self.hits += 1
+            self._log(f"(TTL Cache) Önbellekten getiriliyor: key={key}")
+            return _FRESH, value
+        if expiry_time + self.stale_ttl > now:
+            self.cache.move_to_end(key)
+            self.stale_hits += 1
+            self._log(f"(TTL Cache) Eski değer sunuluyor, yenileniyor: key={key}")
+            return _STALE, value
+        self._log(f"(TTL Cache) TTL süresi doldu, yeniden hesaplanıyor: key={key}")
+        self._remove(key)
+        self.expirations += 1
+        return None, None
+
+    def _remove(self, key):
+        _, _, size = self.cache.pop(key)
+        del self.expiry[key]
+        self.currbytes -= size
+
+    def _reap_expired(self, now):
+        # Silinme sırasının başındaki süresi (ve eski sunum süresi) dolmuş girdileri sil
+        while self.expiry:
+            key, remove_time = next(iter(self.expiry.items()))
+            if remove_time > now:
+                break
+            self._remove(key)
+            self.expirations += 1
+
+    def _evict_oldest(self):
+        key = next(iter(self.cache)) # En az yakın zamanda kullanılan
+        self._remove(key)
+        self.evictions += 1
 
     def _add_to_cache(self, key, value):
-        if len(self.cache) >= self.maxsize:
-            oldest_key = self.lru_keys.pop(0) # En eski anahtarı al
-            del self.cache[oldest_key] # Önbellekten çıkar
-        self.cache[key] = (value, time.time() + self.ttl) # Değer ve TTL ile birlikte sakla
-        self._update_lru(key) # LRU listesine ekle
+        if self.maxsize is not None and self.maxsize <= 0:
+            return
+        now = time.monotonic()
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if key in self.cache:
+            self._remove(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Bütçeden büyük değer önbelleğe alınmaz, diğer girdiler korunur
+            return
+        self._reap_expired(now)
+        while self.maxsize is not None and len(self.cache) >= self.maxsize:
+            self._evict_oldest()
+        while self.max_bytes is not None and self.currbytes + size > self.max_bytes:
+            self._evict_oldest()
+        self.cache[key] = (value, now + self.ttl, size) # Değer, TTL ve boyut ile birlikte sakla
+        self.expiry[key] = now + self.ttl + self.stale_ttl
+        self.currbytes += size
+
+    def cache_clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.expiry.clear()
+            self.currbytes = 0
+            self.hits = self.stale_hits = self.misses = self.evictions = self.expirations = 0
 
-    def cache_info(self): # cache_info benzeri bir metot (basit)
-        return {
-            'maxsize': self.maxsize,
-            'currsize': len(self.cache),
-            'ttl': self.ttl,
-            'lru_keys': self.lru_keys.copy() # Kopya döndür, thread safety için
-        }
+    def cache_info(self):
+        with self.lock:
+            return {
+                'maxsize': self.maxsize,
+                'currsize': len(self.cache),
+                'max_bytes': self.max_bytes,
+                'currbytes': self.currbytes, # max_bytes kapalıyken 0
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits, # eski değerin sunulduğu çağrılar
+                'misses': self.misses, # hesaplamayı bekleyen eşzamanlı çağrılar dahil
+                'evictions': self.evictions, # boyut veya bayt sınırı nedeniyle çıkarılanlar
+                'expirations': self.expirations, # TTL süresi dolduğu için silinenler
+                'lru_keys': list(self.cache), # Kopya döndür, thread safety için
+            }
 
 
 # TTL ile önbellekleme örneği
-ttl_cache_instance = TTL_LRU_Cache(maxsize=2, ttl=5) # Önbellek boyutu 2, TTL 5 saniye
+ttl_cache_instance = TTL_LRU_Cache(maxsize=2, ttl=5, verbose=True) # Önbellek boyutu 2, TTL 5 saniye
 
 @ttl_cache_instance # TTL_LRU_Cache örneğini dekoratör olarak kullan
 def ttl_fonksiyon(param):
@@ -137,5 +348,94 @@ print(f"Önbellek boyutu: {ttl_cache_instance.cache_info()['maxsize']}")
 print(f"Geçerli boyut: {ttl_cache_instance.cache_info()['currsize']}")
 print(f"TTL (saniye): {ttl_cache_instance.cache_info()['ttl']}")
 print(f"LRU Anahtarları (en eskiden en yeniye): {ttl_cache_instance.cache_info()['lru_keys']}")
+print(f"İsabet / kaçırma / çıkarma: {ttl_cache_instance.cache_info()['hits']} / "
+      f"{ttl_cache_instance.cache_info()['misses']} / {ttl_cache_instance.cache_info()['evictions']}")
+
+
+# Çok iş parçacıklı karşılaştırma: TTL_LRU_Cache ve functools.lru_cache
+def benchmark_ttl_lru_cache(threads=8, calls_per_thread=2000, keys=500, maxsize=250, work_seconds=0.001):
+    """
+    İki senaryoyu her iki önbellekle çalıştırır:
+    - karışık: her iş parçacığı kendi Zipf dağılımlı anahtar akışını çağırır
+      (az sayıda anahtar çok istenir, boyut sınırı çıkarmaya yol açar);
+    - yığılma: tüm iş parçacıkları aynı soğuk anahtarları aynı sırayla ister.
+    work_seconds, sarılan fonksiyonun G/Ç benzeri süresidir; 0 verilirse
+    yalnızca önbellek yükü ölçülür. Süreyi, saniyedeki çağrıyı ve sarılan
+    fonksiyonun kaç kez çalıştığını yazdırır.
+    """
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(keys)] # Zipf (s=1)
+    mixed = [rng.choices(range(keys), weights, k=calls_per_thread) for _ in range(threads)]
+    stampede = [list(range(min(keys, 50)))] * threads
+
+    def run(name, decorate, streams):
+        calls = []
+
+        def target(key):
+            calls.append(key) # list.append iş parçacıkları arasında güvenlidir
+            if work_seconds:
+                time.sleep(work_seconds)
+            return key * 2
+
+        cached = decorate(target)
+
+        def worker(stream):
+            for key in stream:
+                cached(key)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(worker, streams))
+        elapsed = time.perf_counter() - started
+        total = sum(len(stream) for stream in streams)
+        print(f"{name:<22} süre={elapsed:7.3f} sn  {total / elapsed:>10.0f} çağrı/sn  "
+              f"hesaplama={len(calls):>5}")
+
+    for scenario, streams in (("karışık", mixed), ("yığılma", stampede)):
+        print(f"\n--- {scenario}: {threads} iş parçacığı, {keys} anahtar, maxsize={maxsize}, "
+              f"iş={work_seconds * 1000:.1f} ms ---")
+        run("functools.lru_cache", functools.lru_cache(maxsize=maxsize), streams)
+        run("TTL_LRU_Cache", TTL_LRU_Cache(maxsize=maxsize, ttl=60), streams)
+
+# Fonksiyonu test etmek icin asagidaki yorum satirlarini kaldirin.
+# benchmark_ttl_lru_cache()
+# benchmark_ttl_lru_cache(work_seconds=0)
+
+
+# Eşzamansız kullanım: aynı önbellek coroutine'leri de sarar
+def async_ttl_cache_ornegi():
+    """
+    fetch_url benzeri bir coroutine'i bayt bütçeli ve stale-while-revalidate
+    açık bir önbellekle sarar: aynı URL'yi isteyen eşzamanlı coroutine'ler tek
+    istek yapar, süresi dolan sayfa yenilenirken eski kopya hemen döner.
+    """
+    istekler = []
+    cache = TTL_LRU_Cache(maxsize=None, ttl=0.5, max_bytes=64 * 1024, stale_ttl=5)
+
+    @cache
+    async def sayfa_getir(url):
+        istekler.append(url)
+        await asyncio.sleep(0.2) # Ağ gecikmesi yerine
+        return f"<html>{url}</html>" * 200
+
+    async def main():
+        await asyncio.gather(*(sayfa_getir("https://example.com") for _ in range(10)))
+        print(f"10 eşzamanlı çağrı, yapılan istek: {len(istekler)}")
+
+        await asyncio.sleep(0.6) # TTL doldu, eski sunum süresi içinde
+        started = time.perf_counter()
+        await sayfa_getir("https://example.com")
+        print(f"Eski kopya {1000 * (time.perf_counter() - started):.1f} ms içinde döndü")
+        await asyncio.sleep(0.3) # Arka plan yenilemesi tamamlanır
+        print(f"Arka planda yenilendi, yapılan istek: {len(istekler)}")
+
+        for i in range(10):
+            await sayfa_getir(f"https://example.com/{i}")
+        info = cache.cache_info()
+        print(f"Bayt bütçesi: {info['currbytes']} / {info['max_bytes']}, "
+              f"girdi: {info['currsize']}, çıkarılan: {info['evictions']}")
 
+    asyncio.run(main())
 
+# Fonksiyonu test etmek icin asagidaki yorum satirini kaldirin.
+# async_ttl_cache_ornegi()
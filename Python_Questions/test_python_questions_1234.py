@@ -0,0 +1,169 @@
+"""
+word_stats, iter_fetch_urls ve fetch_urls_async için testler. İstekler yerel
+bir aiohttp sunucusuna yapılır; ağ erişimi gerekmez.
+
+    python -m unittest test_python_questions_1234
+"""
+import asyncio
+import contextlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from aiohttp import web
+
+import python_questions_1234
+from python_questions_1234 import fetch_urls_async, iter_fetch_urls, word_stats
+
+# Takılan bir üreteç testi sonsuza dek bekletmesin diye üst sınır (saniye)
+TEST_TIMEOUT = 10
+
+
+class WordStatsTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.paths = []
+        for i in range(4):
+            path = os.path.join(directory.name, f'{i}.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('Merhaba dünya, merhaba! ' * 100)
+            self.paths.append(path)
+
+    def test_small_inputs_are_counted_without_a_process_pool(self):
+        with mock.patch.object(python_questions_1234, 'ProcessPoolExecutor', side_effect=AssertionError):
+            stats = word_stats(self.paths, workers=4)
+        self.assertEqual(stats.total_words, 1200)
+        self.assertEqual(stats.most_common, [('merhaba', 800), ('dünya', 400)])
+
+    def test_pool_and_single_process_counts_match(self):
+        pooled = word_stats(self.paths, workers=2, min_range_size=1000)
+        self.assertEqual(pooled.frequencies, word_stats(self.paths, workers=1).frequencies)
+
+
+class IterFetchUrlsTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.flaky_calls = 0
+        self.active = 0
+        self.max_active = 0
+
+        app = web.Application()
+        app.add_routes([
+            web.get('/ok/{name}', self.ok), web.get('/flaky', self.flaky), web.get('/slow', self.slow),
+            web.get('/big', self.big), web.get('/big-stream', self.big_stream),
+            web.get('/missing', self.missing), web.get('/track/{i}', self.tracked),
+        ])
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, '127.0.0.1', 0).start()
+        self.base = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def ok(self, request):
+        return web.Response(text=f"merhaba {request.match_info['name']}")
+
+    async def flaky(self, request):
+        self.flaky_calls += 1
+        if self.flaky_calls <= 2:
+            return web.Response(status=503)
+        return web.Response(text="sonunda")
+
+    async def slow(self, request):
+        await asyncio.sleep(1)
+        return web.Response(text="geç")
+
+    async def big(self, request):
+        return web.Response(body=b"x" * 200_000)
+
+    async def big_stream(self, request):
+        # Content-Length olmadan parça parça gönderilir; sınır okurken denetlenir
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for _ in range(20):
+            await response.write(b"x" * 10_000)
+        await response.write_eof()
+        return response
+
+    async def missing(self, request):
+        return web.Response(status=404)
+
+    async def tracked(self, request):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return web.Response(text="tamam")
+
+    async def fetch(self, urls, **options):
+        async def collect():
+            return {result.url: result async for result in iter_fetch_urls(urls, **options)}
+        return await asyncio.wait_for(collect(), TEST_TIMEOUT)
+
+    async def test_retries_server_errors_and_timeouts(self):
+        results = await self.fetch(
+            [f"{self.base}/flaky", f"{self.base}/slow", f"{self.base}/missing"],
+            request_timeout=0.3, retries=3, backoff_base=0.01,
+        )
+        flaky, slow, missing = (results[f"{self.base}/{path}"] for path in ('flaky', 'slow', 'missing'))
+        self.assertEqual((flaky.status, flaky.body, flaky.attempts), (200, "sonunda", 3))
+        self.assertEqual((slow.error, slow.attempts), ("Zaman Aşımı Hatası", 4))
+        # 4xx yanıtları yeniden denenmez
+        self.assertEqual((missing.status, missing.attempts), (404, 1))
+
+    async def test_gives_up_after_retries(self):
+        results = await self.fetch([f"{self.base}/flaky"], retries=1, backoff_base=0.01)
+        result = results[f"{self.base}/flaky"]
+        self.assertEqual((result.status, result.body, result.attempts), (503, None, 2))
+        self.assertIn("503", result.error)
+
+    async def test_body_larger_than_cap_is_reported_as_error(self):
+        results = await self.fetch(
+            [f"{self.base}/ok/a", f"{self.base}/big", f"{self.base}/big-stream"], max_body_size=100_000,
+        )
+        self.assertEqual(results[f"{self.base}/ok/a"].body, "merhaba a")
+        for path in ('big', 'big-stream'):
+            result = results[f"{self.base}/{path}"]
+            self.assertIsNone(result.body)
+            self.assertTrue(result.error.startswith("Yanıt Çok Büyük Hatası"), result.error)
+
+    async def test_producer_error_reaches_the_consumer(self):
+        def urls():
+            for i in range(3):
+                yield f"{self.base}/ok/{i}"
+            raise RuntimeError("url kaynağı koptu")
+
+        fetched = []
+
+        async def consume():
+            async for result in iter_fetch_urls(urls(), concurrency_limit=2):
+                fetched.append(result.index)
+
+        with self.assertRaisesRegex(RuntimeError, "url kaynağı koptu"):
+            await asyncio.wait_for(consume(), TEST_TIMEOUT)
+        # Hatadan önce kuyruğa alınan URL'ler yine de getirilir
+        self.assertEqual(sorted(fetched), [0, 1, 2])
+
+    async def test_per_host_limit(self):
+        urls = (f"{self.base}/track/{i}" for i in range(20))
+        results = await self.fetch(urls, concurrency_limit=10, per_host_limit=2)
+        self.assertEqual(len(results), 20)
+        self.assertLessEqual(self.max_active, 2)
+
+    async def test_early_exit_stops_workers(self):
+        urls = (f"{self.base}/ok/{i}" for i in range(1000))
+        async with contextlib.aclosing(iter_fetch_urls(urls)) as fetched:
+            async for result in fetched:
+                break
+        self.assertEqual(result.body, f"merhaba {result.index}")
+
+    async def test_legacy_api_keeps_input_order(self):
+        legacy = await fetch_urls_async([f"{self.base}/ok/b", f"{self.base}/missing"], request_timeout=1)
+        self.assertEqual(legacy[0], (f"{self.base}/ok/b", "merhaba b"))
+        self.assertIn("Hata", legacy[1][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Category, Product, Tag
+from .search import get_search_backend
 
 # Register your models here.
 @admin.register(Product)
@@ -10,6 +11,12 @@ class ProductAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     ordering = ('-created_at',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # LIKE '%terim%' taraması yerine tam metin indeksi kullanılır
+        if not search_term:
+            return queryset, False
+        return get_search_backend().filter(queryset, search_term), False
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'description')
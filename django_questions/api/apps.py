@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Okuma modeli ve önbellek ısıtma alıcıları serializers ve caching'e
+        # bağlı olduğundan models.py yerine burada bağlanır
+        from . import listings, warming  # noqa: F401
@@ -0,0 +1,145 @@
+"""
+Ürün listesi ve detayı için eşzamansız (ASGI) okuma uç noktaları.
+
+ASGI altında senkron görünümler her istekte bir iş parçacığına geçer. Buradaki
+görünümler olay döngüsünde çalışır: önbellek eşzamansız istemciyle okunur,
+veritabanı yalnızca önbellek kaçırmalarında Django'nun eşzamansız ORM'i
+(aiterator, aget) ile sorgulanır. Kimlik doğrulama, izin sınıfları ve sorgu
+parametresi filtreleri ProductViewSet ile aynıdır.
+"""
+from asgiref.sync import sync_to_async
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.generics import GenericAPIView
+from rest_framework.renderers import JSONRenderer
+
+from .caching import (
+    aget_or_build, aproduct_detail_cache_key, aproduct_list_cache_keys, build_json_entry, product_cache_setting,
+)
+from .db_routers import ReplicaReadMixin
+from .instrumentation import timer
+from .listings import listing_rows_data
+from .warming import arecord_list_request
+from .views import ProductQuerysetMixin, ProductViewSet, build_detail_entry, json_entry_response
+
+
+class AsyncAPIView(GenericAPIView):
+    """
+    Eşzamansız handler'lar için DRF görünümü. İçerik pazarlığı, izin
+    denetimi ve hata yanıtları DRF'in kendi akışıyla yapılır; yalnızca
+    kimlik doğrulama olay döngüsünü bloklamayacak şekilde önceden çalışır.
+    """
+    http_method_names = ['get']
+    renderer_classes = [JSONRenderer]
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.aperform_authentication(request)
+            # request.user artık atanmış olduğundan initial() veritabanına gitmez
+            self.initial(request, *args, **kwargs)
+            handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aperform_authentication(self, request):
+        """
+        DRF Request._authenticate'in eşzamansız karşılığı. Oturum kullanıcısı
+        request.auser() ile yüklenir. Başlık tabanlı doğrulayıcılar (Basic)
+        yalnızca Authorization başlığı varsa ve parola özeti CPU yoğun
+        olduğundan bir iş parçacığında çalıştırılır.
+        """
+        for authenticator in request.authenticators:
+            try:
+                if isinstance(authenticator, SessionAuthentication):
+                    user = await request._request.auser()
+                    result = None
+                    if user.is_active:
+                        authenticator.enforce_csrf(request)
+                        result = (user, None)
+                elif 'HTTP_AUTHORIZATION' in request.META:
+                    result = await sync_to_async(authenticator.authenticate)(request)
+                else:
+                    result = None
+            except APIException:
+                request._not_authenticated()
+                raise
+
+            if result is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = result
+                return
+
+        request._not_authenticated()
+
+
+class AsyncProductListView(ReplicaReadMixin, ProductQuerysetMixin, AsyncAPIView):
+    """
+    Ürün listesinin eşzamansız karşılığı. Önbellek nesilleri ProductViewSet.list
+    ile ortaktır; yazma işlemleri iki uç noktayı birlikte geçersiz kılar.
+    """
+    action = 'list'
+    serializer_class = ProductViewSet.serializer_class
+    authentication_classes = ProductViewSet.authentication_classes
+    permission_classes = ProductViewSet.permission_classes
+    pagination_class = ProductViewSet.pagination_class
+
+    async def get(self, request, *args, **kwargs):
+        await arecord_list_request(request)
+        fields = self.product_fields
+        cache_key, stale_key = await aproduct_list_cache_keys(
+            request.build_absolute_uri(request.path), request.query_params, fields,
+        )
+
+        async def build():
+            if fields is None:
+                page = await self.paginator.apaginate_queryset(
+                    self.get_listing_queryset().values('id', 'created_at', 'payload'), request, view=self,
+                )
+                with timer('serialize'):
+                    data = listing_rows_data(page)
+            else:
+                # Alan seçimi: ürün tablosundan yalnızca istenen sütunlar
+                page = await self.paginator.apaginate_queryset(self.get_queryset(), request, view=self)
+                with timer('serialize'):
+                    data = self.get_serializer(page, many=True).data
+            return build_json_entry(self.paginator.get_paginated_response(data).data)
+
+        entry = await aget_or_build(
+            cache_key, build, product_cache_setting('LIST_TIMEOUT'), stale_key=stale_key,
+        )
+        return json_entry_response(request, entry)
+
+
+class AsyncProductDetailView(ReplicaReadMixin, ProductQuerysetMixin, AsyncAPIView):
+    """
+    Ürün detayının eşzamansız karşılığı. Detay önbelleği ve koşullu GET
+    ProductViewSet.retrieve ile ortaktır.
+    """
+    action = 'retrieve'
+    serializer_class = ProductViewSet.serializer_class
+    authentication_classes = ProductViewSet.authentication_classes
+    permission_classes = ProductViewSet.permission_classes
+
+    async def get(self, request, *args, **kwargs):
+        pk = self.get_detail_pk()
+        fields = self.product_fields
+
+        async def build():
+            if fields is None:
+                return build_detail_entry(await self.aget_listing_row(pk))
+            return self.build_selected_detail_entry(await self.get_queryset().filter(pk=pk).afirst())
+
+        entry = await aget_or_build(
+            await aproduct_detail_cache_key(pk, fields), build, product_cache_setting('DETAIL_TIMEOUT'),
+        )
+        return json_entry_response(request, entry)
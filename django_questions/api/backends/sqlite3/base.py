@@ -0,0 +1,77 @@
+"""
+Yazıcıları süreç içinde sıraya koyan SQLite arka ucu.
+
+SQLite aynı anda tek bir yazıcıya izin verir. Kilidi bekleyen bağlantılar
+busy_timeout süresince artan aralıklarla yeniden dener; yoğun yazmada bu hem
+gecikme ekler hem de sıralamayı adaletsiz yapar. Burada aynı dosyaya yazan
+işlemler önce süreç içi bir kilitte sıraya girer, böylece SQLite kilidine
+çoğunlukla bekleyen olmadan ulaşılır. Süreçler arası sıralama yine SQLite'ın
+kendi kilidi ve busy_timeout ile yapılır.
+
+Kilit, dış işlem (atomic) başlarken alınır ve commit, rollback veya bağlantı
+kapanışında bırakılır. transaction_mode='IMMEDIATE' ile birlikte kullanılmalıdır:
+işlem yazma kilidini baştan alır, sonradan okuma kilidini yükseltmeye
+çalışıp anında "database is locked" hatası vermez.
+
+Bedeli: yazmayan atomic bloklar da kilidi alır ve yazıcıların arkasında
+bekler. Kilit bunu yeni bir maliyet olarak eklemez; BEGIN IMMEDIATE zaten her
+işlemde SQLite'ın yazma kilidini ister, süreç kilidi yalnızca bekleyenleri
+sıraya koyar. Kilidi ilk yazmaya ertelemek ise okuma işlemini yazmaya
+yükseltmek demektir ve WAL'da SQLITE_BUSY_SNAPSHOT ile anında hata verir.
+Otomatik commit ile yapılan okumalar (atomic dışındaki sorgular) kilide hiç
+girmez ve yazıcıları beklemez; yalnızca okuyan kod atomic içine alınmamalıdır.
+benchmark_sqlite_concurrency komutu atomic içinde okuyan iş parçacıklarını
+ayrıca ölçer (--atomic-readers): yoğun yazmada bunların p99 gecikmesi yazma
+gecikmesine yaklaşırken otomatik commit okumaları etkilenmez.
+"""
+import threading
+from collections import defaultdict
+
+from django.db.backends.sqlite3 import base
+
+_write_locks = defaultdict(threading.Lock)
+_write_locks_guard = threading.Lock()
+
+
+def write_lock(name):
+    with _write_locks_guard:
+        return _write_locks[str(name)]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _write_lock = None
+
+    def _start_transaction_under_autocommit(self):
+        lock = write_lock(self.settings_dict['NAME'])
+        # Sıra beklemesi busy_timeout ile sınırlıdır; süre dolarsa karar
+        # SQLite'ın kendi kilidine bırakılır, kilitlenme (deadlock) oluşmaz
+        if lock.acquire(timeout=self.settings_dict['OPTIONS'].get('timeout', 5)):
+            self._write_lock = lock
+        try:
+            super()._start_transaction_under_autocommit()
+        except BaseException:
+            self._release_write_lock()
+            raise
+
+    def _release_write_lock(self):
+        lock, self._write_lock = self._write_lock, None
+        if lock is not None:
+            lock.release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_write_lock()
@@ -0,0 +1,99 @@
+"""
+Benchmark komutlarının ortak yardımcıları.
+
+Ölçümler geliştirme veritabanını kirletmemek için geçici bir test
+veritabanında yapılır.
+"""
+import math
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .listings import rebuild_listings
+from .models import Category, Product, Tag
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Test ortamını kurar (test istemcisi için ALLOWED_HOSTS vb.), geçici bir
+    test veritabanı oluşturur ve iş bitince ikisini de geri alır. SQLite'ta
+    ölçümler gerçek kurulumlara yakın olsun diye bellek yerine geçici bir
+    dosya kullanılır.
+    """
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == 'sqlite':
+            test_settings['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            test_settings['NAME'] = old_test_name
+
+
+def seed_catalog(size, categories=20, tags=200, max_tags_per_product=8, seed=42, batch_size=5000):
+    """
+    Sentetik bir katalog oluşturur. Etiket sayıları gerçek kataloglardaki gibi
+    çarpıktır: çoğu üründe birkaç etiket, az sayıda üründe çok etiket bulunur.
+    """
+    rng = random.Random(seed)
+    Category.objects.bulk_create(
+        Category(name=f'Kategori {i}', description=f'Kategori {i} açıklaması' if i % 3 else None)
+        for i in range(categories)
+    )
+    Tag.objects.bulk_create(Tag(name=f'etiket-{i}') for i in range(tags))
+    category_ids = list(Category.objects.values_list('id', flat=True))
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+
+    through = Product.tags.through
+    for start in range(0, size, batch_size):
+        products = Product.objects.bulk_create(
+            Product(
+                name=f'Ürün {i}',
+                description=' '.join(rng.choices(('hızlı', 'dayanıklı', 'yeni', 'orijinal', 'uygun'), k=30)),
+                price=Decimal(rng.randrange(100, 100000)) / 100,
+                is_active=rng.random() > 0.05,
+                category_id=rng.choice(category_ids),
+            )
+            for i in range(start, min(start + batch_size, size))
+        )
+        links = []
+        for product in products:
+            fan_out = min(int(rng.paretovariate(1.5)), max_tags_per_product)
+            for tag_id in rng.sample(tag_ids, fan_out):
+                links.append(through(product_id=product.pk, tag_id=tag_id))
+        through.objects.bulk_create(links)
+    # Toplu eklemeler sinyal göndermediğinden okuma modeli sonda bir kez kurulur
+    rebuild_listings()
+
+
+def percentile(values, percent):
+    """
+    Değerlerin yüzdeliğini en yakın sıra (nearest-rank) yöntemiyle döndürür.
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def timed(func, repeat=1):
+    """
+    Fonksiyonu repeat kez çalıştırır; son sonucu ve en iyi süreyi döndürür.
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
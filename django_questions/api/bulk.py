@@ -0,0 +1,224 @@
+"""
+Ürünler için toplu oluşturma, güncelleme ve silme işlemleri.
+
+Her öğe ayrı ayrı doğrulanır, hatalı öğeler diğerlerini durdurmaz. İlişkiler
+tek sorguda çözülür, yazma işlemleri bulk_create/bulk_update ile yapılır ve
+önbellek geçersiz kılma tüm toplu işlem için bir kez çalışır.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .caching import mark_product_lists_dirty, reset_product_counts
+from .listings import refresh_listings
+from .models import Category, Product, Tag
+from .search import get_search_backend
+from .serializers import PRODUCT_LIST_VALUES, ProductBulkItemSerializer, serialize_product_rows
+
+ProductTag = Product.tags.through
+
+DOES_NOT_EXIST = serializers.PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+REQUIRED = serializers.Field.default_error_messages['required']
+
+
+def _validate_items(items, partial=False):
+    """
+    Öğeleri doğrular; (index, validated_data) çiftlerini ve hataları döndürür.
+    """
+    valid, errors = [], []
+    if not isinstance(items, list):
+        raise serializers.ValidationError({'non_field_errors': ['Bir liste bekleniyordu.']})
+
+    for index, item in enumerate(items):
+        serializer = ProductBulkItemSerializer(data=item, partial=partial)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+    return valid, errors
+
+
+def _check_relations(valid, errors):
+    """
+    Tüm kategori ve etiket id'lerini birer sorguda doğrular; geçersiz
+    ilişkiye sahip öğeleri hatalara taşır.
+    """
+    category_ids = {data['category_id'] for _, data in valid if 'category_id' in data}
+    tag_ids = {pk for _, data in valid for pk in data.get('tag_ids', ())}
+    known_categories = set(Category.objects.filter(pk__in=category_ids).values_list('pk', flat=True))
+    known_tags = set(Tag.objects.filter(pk__in=tag_ids).values_list('pk', flat=True))
+
+    checked = []
+    for index, data in valid:
+        item_errors = {}
+        if 'category_id' in data and data['category_id'] not in known_categories:
+            item_errors['category_id'] = [DOES_NOT_EXIST.format(pk_value=data['category_id'])]
+        missing_tags = [pk for pk in data.get('tag_ids', ()) if pk not in known_tags]
+        if missing_tags:
+            item_errors['tag_ids'] = [DOES_NOT_EXIST.format(pk_value=pk) for pk in missing_tags]
+
+        if item_errors:
+            errors.append({'index': index, 'errors': item_errors})
+        else:
+            checked.append((index, data))
+    return checked
+
+
+def _reject(valid, errors, check, field, message):
+    """
+    check koşulunu sağlamayan öğeleri, verilen alan hatasıyla hatalara taşır.
+    """
+    kept = []
+    for index, data in valid:
+        if check(data):
+            kept.append((index, data))
+        else:
+            text = message(data) if callable(message) else message
+            errors.append({'index': index, 'errors': {field: [text]}})
+    return kept
+
+
+def _first_occurrence():
+    """
+    Her id'yi ilk görüldüğünde kabul eden bir _reject koşulu döndürür; aynı
+    ürünü tekrar güncelleyen öğeler hatalara taşınır.
+    """
+    seen = set()
+
+    def check(data):
+        duplicate = data['id'] in seen
+        seen.add(data['id'])
+        return not duplicate
+    return check
+
+
+def _serialize(product_ids):
+    products = Product.objects.filter(pk__in=product_ids).order_by('id')
+    return serialize_product_rows(products.values(*PRODUCT_LIST_VALUES))
+
+
+def bulk_create_products(items):
+    """
+    Geçerli öğeleri tek bulk_create ve tek ara tablo eklemesiyle oluşturur.
+    """
+    valid, errors = _validate_items(items)
+    # id yalnızca güncellemede öğeyi seçer; birincil anahtarı istemci seçemez
+    valid = _reject(valid, errors, lambda data: 'id' not in data, 'id', 'Oluşturulan öğelerde id gönderilemez.')
+    valid = _check_relations(valid, errors)
+    if not valid:
+        return [], errors
+
+    with transaction.atomic():
+        products = Product.objects.bulk_create(
+            Product(**{name: value for name, value in data.items() if name != 'tag_ids'})
+            for _, data in valid
+        )
+        ProductTag.objects.bulk_create(
+            ProductTag(product_id=product.pk, tag_id=tag_id)
+            for product, (_, data) in zip(products, valid)
+            for tag_id in set(data.get('tag_ids', ()))
+        )
+        # bulk_create sinyal göndermez; arama indeksi, okuma modeli ve önbellek
+        # kapsamları burada bir kez güncellenir
+        get_search_backend().index([product.pk for product in products])
+        refresh_listings([product.pk for product in products])
+        category_ids = {product.category_id for product in products}
+        tag_ids = {pk for _, data in valid for pk in data.get('tag_ids', ())}
+        mark_product_lists_dirty(category_ids, tag_ids)
+        reset_product_counts(category_ids, tag_ids)
+
+    return _serialize([product.pk for product in products]), errors
+
+
+def bulk_update_products(items, partial=False):
+    """
+    Mevcut aktif ürünleri tek bulk_update ile günceller. Etiket listesi
+    verilen ürünlerin ilişkileri tek silme ve tek ekleme ile yenilenir.
+    Ürünler, eşzamanlı yazmalar arada değiştiremesin diye işlemin içinde
+    kilitlenerek okunur.
+    """
+    valid, errors = _validate_items(items, partial=partial)
+    valid = _reject(valid, errors, lambda data: 'id' in data, 'id', REQUIRED)
+    valid = _reject(valid, errors, _first_occurrence(), 'id', 'Bu id listede birden fazla kez gönderildi.')
+    valid = _check_relations(valid, errors)
+    if not valid:
+        return [], errors
+
+    with transaction.atomic():
+        products = (
+            Product.objects.select_for_update().filter(is_active=True)
+            .in_bulk([data['id'] for _, data in valid])
+        )
+        valid = _reject(
+            valid, errors, lambda data: data['id'] in products,
+            'id', lambda data: DOES_NOT_EXIST.format(pk_value=data['id']),
+        )
+        if not valid:
+            return [], errors
+        updated = _apply_updates(products, valid)
+
+    return _serialize([product.pk for product in updated]), errors
+
+
+def _apply_updates(products, valid):
+    """
+    Kilitlenmiş ürünlere öğeleri uygular ve tek bulk_update ile yazar.
+    """
+    now = timezone.now()
+    fields = {'updated_at'}
+    category_ids = set()
+    retagged = {}
+    for _, data in valid:
+        product = products[data['id']]
+        category_ids.add(product.category_id)
+        for name, value in data.items():
+            if name == 'tag_ids':
+                retagged[product.pk] = set(value)
+            elif name != 'id':
+                setattr(product, name, value)
+                fields.add(name)
+        # bulk_update auto_now alanlarını güncellemez
+        product.updated_at = now
+        category_ids.add(product.category_id)
+
+    updated = [products[data['id']] for _, data in valid]
+    Product.objects.bulk_update(updated, sorted(fields))
+    if fields & {'name', 'description'}:
+        get_search_backend().index([product.pk for product in updated])
+    tag_ids = set(
+        ProductTag.objects.filter(product_id__in=[product.pk for product in updated])
+        .values_list('tag_id', flat=True)
+    )
+    if retagged:
+        ProductTag.objects.filter(product_id__in=retagged).delete()
+        ProductTag.objects.bulk_create(
+            ProductTag(product_id=product_id, tag_id=tag_id)
+            for product_id, new_tag_ids in retagged.items()
+            for tag_id in new_tag_ids
+        )
+        tag_ids.update(pk for new_tag_ids in retagged.values() for pk in new_tag_ids)
+    refresh_listings([product.pk for product in updated])
+    mark_product_lists_dirty(category_ids, tag_ids)
+    reset_product_counts(category_ids, tag_ids)
+    return updated
+
+
+def bulk_delete_products(ids):
+    """
+    Verilen aktif ürünleri tek QuerySet.delete() ile siler; silinen id'leri
+    ve bulunamayanların hatalarını döndürür. Okuma modeli, arama indeksi ve
+    önbellek bakımı silme alıcılarında tüm sorgu için bir kez yapılır.
+    """
+    # bool, int'in alt sınıfıdır; true/false id olarak kabul edilmez
+    if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise serializers.ValidationError({'ids': ['Tam sayılardan oluşan bir liste bekleniyordu.']})
+
+    queryset = Product.objects.filter(is_active=True, pk__in=ids)
+    found = set(queryset.values_list('pk', flat=True))
+    errors = [
+        {'index': index, 'errors': {'id': [DOES_NOT_EXIST.format(pk_value=pk)]}}
+        for index, pk in enumerate(ids) if pk not in found
+    ]
+    if found:
+        Product.objects.filter(pk__in=found).delete()
+    return sorted(found), errors
@@ -0,0 +1,279 @@
+"""
+İki katmanlı önbellek arka ucu.
+
+L1, süreç içinde kısa ömürlü ve boyutu sınırlı bir LocMemCache'tir; L2 ise
+CACHES içinde tanımlı paylaşılan bir önbellektir (Redis, memcached veya
+testlerde LocMemCache). Okumalar önce L1'e bakar, L2'den gelen değerler L1'e
+yazılır. Yazma ve silmeler L2'ye yapılır ve değişen anahtarlar bir yayın
+kanalıyla diğer süreçlere duyurulur; onlar da L1 kopyalarını siler.
+
+Yayın kanalı en iyi çabayla çalışır: kaçan bir mesajın etkisi L1_TIMEOUT ile
+sınırlıdır. Kanal tanımlanmazsa süreçler arası tutarlılık yalnızca
+L1_TIMEOUT'a dayanır.
+
+Örnek yapılandırma:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'api.cache_backends.TieredCache',
+            'LOCATION': 'shared',  # L2 önbelleğinin takma adı
+            'OPTIONS': {
+                'L1_TIMEOUT': 5,
+                'L1_MAX_ENTRIES': 1000,
+                'BROADCAST': 'api.cache_backends.RedisBroadcast',
+                'BROADCAST_OPTIONS': {'url': 'redis://localhost:6379/0'},
+            },
+        },
+        'shared': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', ...},
+    }
+"""
+import json
+import threading
+import uuid
+from collections import defaultdict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.module_loading import import_string
+
+_MISSING = object()
+
+
+def _expires_now(timeout):
+    # Sıfır veya negatif süre Django'da anahtarı silmek demektir
+    return timeout is not DEFAULT_TIMEOUT and timeout is not None and timeout <= 0
+
+
+class LocalBroadcast:
+    """
+    Aynı süreçteki aboneler arasında yayın. Testlerde ve tek süreçli
+    kurulumlarda Redis yerine kullanılır.
+    """
+    _subscribers = defaultdict(list)
+    _lock = threading.Lock()
+
+    def __init__(self, channel='cache-invalidation'):
+        self.channel = channel
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers[self.channel].append(callback)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers[self.channel])
+        for callback in subscribers:
+            callback(message)
+
+
+class RedisBroadcast:
+    """
+    Redis pub/sub üzerinden yayın. Abone iş parçacığı ilk kullanımda başlar;
+    böylece gunicorn --preload ile fork edilen işçilerin her biri kendi
+    aboneliğini açar.
+    """
+
+    def __init__(self, url, channel='cache-invalidation', **options):
+        import redis
+
+        self.channel = channel
+        self.client = redis.Redis.from_url(url, **options)
+        self.thread = None
+
+    def subscribe(self, callback):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: lambda message: callback(json.loads(message['data']))})
+        self.thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, message):
+        self.client.publish(self.channel, json.dumps(message))
+
+
+class _Tier:
+    """
+    Bir L1 adının süreç içindeki tek örneği: ortak LocMemCache ve ona bağlı
+    yayın kanalı. Django her iş parçacığı için ayrı önbellek nesnesi
+    oluşturduğundan bunlar modül düzeyinde paylaşılır.
+    """
+
+    def __init__(self, name, timeout, max_entries, broadcast, broadcast_options):
+        self.l1 = LocMemCache(name, {'TIMEOUT': timeout, 'OPTIONS': {'MAX_ENTRIES': max_entries}})
+        self.sender = uuid.uuid4().hex
+        self.channel = None
+        if broadcast:
+            self.channel = import_string(broadcast)(**broadcast_options)
+            self.channel.subscribe(self.receive)
+
+    def publish(self, keys=None, clear=False):
+        if self.channel is not None:
+            self.channel.publish({'sender': self.sender, 'keys': keys or [], 'clear': clear})
+
+    def receive(self, message):
+        if message['sender'] == self.sender:
+            return
+        if message['clear']:
+            self.l1.clear()
+            return
+        by_version = defaultdict(list)
+        for key, version in message['keys']:
+            by_version[version].append(key)
+        for version, keys in by_version.items():
+            self.l1.delete_many(keys, version=version)
+
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    """
+    L2 önbelleğinin önünde süreç içi bir L1 katmanı. LOCATION, L2 olarak
+    kullanılacak önbelleğin CACHES içindeki takma adıdır. Anahtar öneki ve
+    sürüm L2'ye olduğu gibi aktarılır.
+
+    Seçenekler:
+        L1_TIMEOUT: L1 kopyalarının en uzun yaşam süresi (saniye)
+        L1_MAX_ENTRIES: L1'deki en fazla girdi sayısı (LRU ile atılır)
+        L1_NAME: L1 depolamasının süreç içindeki adı
+        BROADCAST, BROADCAST_OPTIONS: geçersiz kılma yayın kanalı
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = server
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        name = options.get('L1_NAME', f'tiered-l1:{server}')
+        with _tiers_lock:
+            if name not in _tiers:
+                _tiers[name] = _Tier(
+                    name, self.l1_timeout, options.get('L1_MAX_ENTRIES', 1000),
+                    options.get('BROADCAST'), options.get('BROADCAST_OPTIONS', {}),
+                )
+        self.tier = _tiers[name]
+        self.l1 = self.tier.l1
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def _l1_set(self, key, value, timeout, version):
+        if _expires_now(timeout):
+            self.l1.delete(key, version=version)
+            return
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            timeout = self.l1_timeout
+        self.l1.set(key, value, min(timeout, self.l1_timeout), version=version)
+
+    def _evict(self, keys, version):
+        self.l1.delete_many(keys, version=version)
+        self.tier.publish(keys=[(key, version) for key in keys])
+
+    def get(self, key, default=None, version=None):
+        value = self.l1.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self.l1.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        """
+        L1'de bulunmayan anahtarları L2'den tek get_many ile okur.
+        """
+        found = self.l1.get_many(keys, version=version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            fetched = self.l2.get_many(missing, version=version)
+            if fetched:
+                self.l1.set_many(fetched, self.l1_timeout, version=version)
+                found.update(fetched)
+        return found
+
+    async def aget(self, key, default=None, version=None):
+        value = self.l1.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        value = await self.l2.aget(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self.l1.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    async def aget_many(self, keys, version=None):
+        found = self.l1.get_many(keys, version=version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            fetched = await self.l2.aget_many(missing, version=version)
+            if fetched:
+                self.l1.set_many(fetched, self.l1_timeout, version=version)
+                found.update(fetched)
+        return found
+
+    def has_key(self, key, version=None):
+        return self.l1.has_key(key, version=version) or self.l2.has_key(key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Yeni anahtarı L2'ye add ile yazar; başka süreçlerin L1'inde kopyası
+        olamayacağından yayın gönderilmez. Anahtar zaten varsa üzerine yazılır
+        ve eski kopyalar yayınla silinir.
+        """
+        if _expires_now(timeout) or not self.l2.add(key, value, timeout, version=version):
+            self.l2.set(key, value, timeout, version=version)
+            self.tier.publish(keys=[(key, version)])
+        self._l1_set(key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Değerleri L2'ye tek set_many ile yazar. Yalnızca L2'de zaten bulunan
+        (üzerine yazılan) anahtarlar için tek yayın mesajı gönderilir; ilk
+        doldurma yayın üretmez. L2'den erken düşen bir anahtarın eski L1
+        kopyaları en geç L1_TIMEOUT sonunda silinir.
+        """
+        if _expires_now(timeout):
+            existing = list(data)
+        else:
+            existing = list(self.l2.get_many(list(data), version=version))
+        failed = self.l2.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._l1_set(key, value, timeout, version)
+        if existing:
+            self.tier.publish(keys=[(key, version) for key in existing])
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Kilit gibi kısa ömürlü anahtarlar için kullanılır; L1'e yazılmaz
+        return self.l2.add(key, value, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version=version)
+        self._evict([key], version)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        value = self.l2.decr(key, delta, version=version)
+        self._evict([key], version)
+        return value
+
+    def delete(self, key, version=None):
+        deleted = self.l2.delete(key, version=version)
+        self._evict([key], version)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.l2.delete_many(keys, version=version)
+        self._evict(keys, version)
+
+    def clear(self):
+        self.l2.clear()
+        self.l1.clear()
+        self.tier.publish(clear=True)
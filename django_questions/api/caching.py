@@ -0,0 +1,494 @@
+import asyncio
+import gzip
+import hashlib
+import math
+import random
+import threading
+import time
+from functools import partial
+from urllib.parse import urlencode
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from rest_framework.renderers import JSONRenderer
+
+from .db_routers import primary_reads
+# İsabet/kaçırma oranları istek ölçümlerine anahtar ailesine göre işlenir
+from .instrumentation import cache, timer
+
+DEFAULTS = {
+    # Liste önbelleklerinin yaşam süresi (30 dakika)
+    'LIST_TIMEOUT': 60 * 30,
+    # Ürün detay önbelleklerinin ve ürün nesillerinin yaşam süresi
+    'DETAIL_TIMEOUT': 60 * 30,
+    # Bu boyuttan büyük yanıtların gzip'li kopyası da saklanır (None: kapalı)
+    'GZIP_MIN_SIZE': 1024,
+    # Yeniden hesaplama kilidinin en uzun süresi (saniye)
+    'LOCK_TIMEOUT': 10,
+    # Kilidi alamayan isteklerin yeni değeri bekleyeceği süre (saniye)
+    'LOCK_WAIT': 2.0,
+    'LOCK_POLL_INTERVAL': 0.05,
+    # Yeniden hesaplama sırasında sunulabilecek eski kopyanın yaşam süresi
+    'STALE_TIMEOUT': 60 * 60 * 24,
+    # Olasılıksal erken yenileme katsayısı (0: kapalı)
+    'EARLY_REFRESH_BETA': 1.0,
+    # Önbellek ısıtma (api.warming): arka plan iş parçacığı sayısı (0: kapalı),
+    # sıcak tutulacak en çok istenen liste sayısı, süreç içi sayımların
+    # paylaşılan sayaçla birleştirilme aralığı (saniye)
+    'WARM_WORKERS': 2,
+    'WARM_MAX_KEYS': 50,
+    'WARM_TRACK_INTERVAL': 10,
+    'WARM_ON_STARTUP': True,
+    # Kategori/etiket ürün sayaçlarının yaşam süresi; eşzamanlı yeniden
+    # hesaplama ile artırım arasındaki olası sapma bu süreyle sınırlıdır
+    'COUNT_TIMEOUT': 60 * 60,
+}
+
+
+def product_cache_setting(name):
+    """
+    settings.PRODUCT_CACHE içindeki ayarı, yoksa varsayılanı döndürür.
+    """
+    return getattr(settings, 'PRODUCT_CACHE', {}).get(name, DEFAULTS[name])
+
+GENERATION_KEY_PREFIX = 'product_list_gen'
+
+# Liste kapsamlarının nesli artırıldıktan sonra gönderilir; keys, artırılan
+# nesil anahtarlarıdır
+product_lists_invalidated = Signal()
+
+# Biriken kapsamlar geçersiz kılınmadan hemen önce (commit sonrasında veya
+# apply_deferred_refreshes ile işlemin sonunda) gönderilir; okuma modelleri
+# ertelenen yenilemelerini burada uygular
+product_invalidations_flushing = Signal()
+
+
+def generation_key(scope=None, scope_id=None):
+    """
+    Bir kapsamın (genel, kategori veya etiket) nesil sayacı anahtarını döndürür.
+    """
+    if scope is None:
+        return GENERATION_KEY_PREFIX
+    return f'{GENERATION_KEY_PREFIX}_{scope}_{scope_id}'
+
+
+def list_generation_keys(category_id=None, tag_id=None):
+    """
+    Bir liste isteğinin bağlı olduğu nesil anahtarlarını döndürür.
+
+    Filtresiz listeler genel kapsama, filtreli listeler ise yalnızca ilgili
+    kategori/etiket kapsamlarına bağlıdır; böylece bir kategorideki yazma
+    diğer kategorilerin önbelleğini boşaltmaz.
+    """
+    keys = []
+    if category_id:
+        keys.append(generation_key('category', category_id))
+    if tag_id:
+        keys.append(generation_key('tag', tag_id))
+    return keys or [generation_key()]
+
+
+def _new_generation():
+    # Sayaç artırımı (incr) toplu yapılamadığı için her nesil benzersiz bir
+    # değerle değiştirilir; tüm kapsamlar tek set_many ile güncellenir.
+    return time.time_ns()
+
+
+def get_generations(keys, timeout=None):
+    """
+    Nesil değerlerini tek get_many ile okur, eksik olanları başlatır.
+    """
+    generations = cache.get_many(keys)
+    missing = {key: _new_generation() for key in keys if key not in generations}
+    if missing:
+        cache.set_many(missing, timeout=timeout)
+        generations.update(missing)
+    return [generations[key] for key in keys]
+
+
+async def aget_generations(keys, timeout=None):
+    """
+    get_generations'ın eşzamansız karşılığı.
+    """
+    generations = await cache.aget_many(keys)
+    missing = {key: _new_generation() for key in keys if key not in generations}
+    if missing:
+        await cache.aset_many(missing, timeout=timeout)
+        generations.update(missing)
+    return [generations[key] for key in keys]
+
+
+# Alan seçimi parametreleri anahtara ham halleriyle değil, çözülmüş alan
+# kümesi olarak girer
+FIELD_SELECTION_PARAMS = ('fields', 'expand')
+
+
+def product_list_cache_keys(base_url, params, fields=None):
+    """
+    İsteğin sorgusuz mutlak URL'i (şema, host ve yol), sorgu parametrelerinin
+    tamamı ve ilgili nesil değerlerinden liste önbellek anahtarını üretir.
+    URL anahtara girer çünkü yükteki sayfalama bağlantıları mutlaktır ve
+    uç noktaya göre değişir; farklı bir Host başlığıyla üretilen sayfa başka
+    host'un istemcilerine sunulmaz. İkinci anahtar nesilden bağımsızdır ve
+    yeniden hesaplama sırasında sunulacak eski kopyayı tutar.
+
+    fields, isteğin seçili çıktı alanlarıdır (None: tümü); aynı alan kümesini
+    farklı sıra veya yazımla isteyenler aynı girdiyi paylaşır.
+    """
+    generations = get_generations(
+        list_generation_keys(params.get('category'), params.get('tag'))
+    )
+    return _list_cache_keys(base_url, params, generations, fields)
+
+
+async def aproduct_list_cache_keys(base_url, params, fields=None):
+    """
+    product_list_cache_keys'in eşzamansız karşılığı.
+    """
+    generations = await aget_generations(
+        list_generation_keys(params.get('category'), params.get('tag'))
+    )
+    return _list_cache_keys(base_url, params, generations, fields)
+
+
+def _list_cache_keys(base_url, params, generations, fields=None):
+    items = [
+        (name, value) for name, values in params.lists() if name not in FIELD_SELECTION_PARAMS
+        for value in values
+    ]
+    if fields is not None:
+        items.append(('fields', ','.join(sorted(fields))))
+    query = urlencode(sorted(items))
+    digest = hashlib.md5(f'{base_url}?{query}'.encode()).hexdigest()
+    key = 'product_list:{}:{}'.format('.'.join(map(str, generations)), digest)
+    return key, f'product_list_stale:{digest}'
+
+
+def product_detail_cache_key(pk, fields=None):
+    """
+    Ürün detayının önbellek anahtarını ürünün kendi nesliyle üretir. Ürün
+    nesli, satırı yenilenen her üründe commit sonrasında artırılır; alan
+    seçimli kopyalar da aynı nesle bağlı olduğundan birlikte düşer. Nesiller
+    detay girdileriyle aynı sürede sona erer: süresi dolan nesil yeni bir
+    değerle başlar ve yalnızca bir kaçırmaya yol açar.
+    """
+    generation, = get_generations(
+        [generation_key('product', pk)], timeout=product_cache_setting('DETAIL_TIMEOUT'),
+    )
+    return _detail_cache_key(pk, generation, fields)
+
+
+async def aproduct_detail_cache_key(pk, fields=None):
+    """
+    product_detail_cache_key'in eşzamansız karşılığı.
+    """
+    generation, = await aget_generations(
+        [generation_key('product', pk)], timeout=product_cache_setting('DETAIL_TIMEOUT'),
+    )
+    return _detail_cache_key(pk, generation, fields)
+
+
+def _detail_cache_key(pk, generation, fields):
+    key = f'product_detail:{generation}:{pk}'
+    if fields is not None:
+        key += ':' + ','.join(sorted(fields))
+    return key
+
+
+def _should_refresh_early(expires, delta, now):
+    # XFetch: hesaplaması uzun süren girdiler, süreleri dolmadan önce artan
+    # bir olasılıkla tek bir istek tarafından yenilenir
+    beta = product_cache_setting('EARLY_REFRESH_BETA')
+    return beta > 0 and now - delta * beta * math.log(1.0 - random.random()) >= expires
+
+
+def get_or_build(key, build, timeout, stale_key=None):
+    """
+    Önbellekteki değeri döndürür; yoksa değeri tek bir işçinin üretmesini
+    sağlar (single-flight). build birincil veritabanından okur.
+
+    Kilidi alamayan istekler varsa eski kopyayı sunar, yoksa yeni değerin
+    yazılmasını kısa bir süre bekler. Bekleme süresi dolarsa değeri kendisi
+    üretir; böylece kilit sahibi çökse bile istek takılı kalmaz.
+    """
+    now = time.time()
+    cached = cache.get(key)
+    if cached is not None:
+        value, expires, delta = cached
+        if not _should_refresh_early(expires, delta, now):
+            return value
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, timeout=product_cache_setting('LOCK_TIMEOUT')):
+        if cached is not None:
+            return cached[0]
+        stale = cache.get(stale_key) if stale_key else None
+        if stale is not None:
+            return stale[0]
+
+        deadline = time.monotonic() + product_cache_setting('LOCK_WAIT')
+        while time.monotonic() < deadline:
+            time.sleep(product_cache_setting('LOCK_POLL_INTERVAL'))
+            cached = cache.get(key)
+            if cached is not None:
+                return cached[0]
+        return _build_and_store(key, build, timeout, stale_key)
+
+    try:
+        return _build_and_store(key, build, timeout, stale_key)
+    finally:
+        cache.delete(lock_key)
+
+
+def _build_and_store(key, build, timeout, stale_key):
+    started = time.monotonic()
+    # Önbelleğe girecek değer replika gecikmesinden etkilenmemeli
+    with primary_reads():
+        value = build()
+    record = (value, time.time() + timeout, time.monotonic() - started)
+    cache.set(key, record, timeout=timeout)
+    if stale_key:
+        cache.set(stale_key, record, timeout=product_cache_setting('STALE_TIMEOUT'))
+    return value
+
+
+async def aget_or_build(key, build, timeout, stale_key=None):
+    """
+    get_or_build'in eşzamansız karşılığı; build bir coroutine fonksiyonudur.
+    Kilidi bekleyen istekler olay döngüsünü bloklamaz.
+    """
+    now = time.time()
+    cached = await cache.aget(key)
+    if cached is not None:
+        value, expires, delta = cached
+        if not _should_refresh_early(expires, delta, now):
+            return value
+
+    lock_key = f'{key}:lock'
+    if not await cache.aadd(lock_key, 1, timeout=product_cache_setting('LOCK_TIMEOUT')):
+        if cached is not None:
+            return cached[0]
+        stale = await cache.aget(stale_key) if stale_key else None
+        if stale is not None:
+            return stale[0]
+
+        deadline = time.monotonic() + product_cache_setting('LOCK_WAIT')
+        while time.monotonic() < deadline:
+            await asyncio.sleep(product_cache_setting('LOCK_POLL_INTERVAL'))
+            cached = await cache.aget(key)
+            if cached is not None:
+                return cached[0]
+        return await _abuild_and_store(key, build, timeout, stale_key)
+
+    try:
+        return await _abuild_and_store(key, build, timeout, stale_key)
+    finally:
+        await cache.adelete(lock_key)
+
+
+async def _abuild_and_store(key, build, timeout, stale_key):
+    started = time.monotonic()
+    with primary_reads():
+        value = await build()
+    record = (value, time.time() + timeout, time.monotonic() - started)
+    await cache.aset(key, record, timeout=timeout)
+    if stale_key:
+        await cache.aset(stale_key, record, timeout=product_cache_setting('STALE_TIMEOUT'))
+    return value
+
+
+def build_json_entry(data):
+    """
+    Veriyi JSON olarak bir kez render eder ve önbellekte saklanacak bayt
+    yükünü, isteğe bağlı gzip kopyasını ve içerik özetinden ETag'i döndürür.
+    Önbellekten okuma bu sayede yeniden serileştirme gerektirmez.
+    """
+    with timer('render'):
+        body = JSONRenderer().render(data)
+    gzip_min_size = product_cache_setting('GZIP_MIN_SIZE')
+    compressed = None
+    if gzip_min_size is not None and len(body) >= gzip_min_size:
+        compressed = gzip.compress(body, compresslevel=6, mtime=0)
+    return {
+        'body': body,
+        'gzip': compressed,
+        'etag': 'W/"{}"'.format(hashlib.blake2b(body, digest_size=16).hexdigest()),
+    }
+
+
+def invalidate_product_lists(category_ids, tag_ids):
+    """
+    Genel kapsamın ve verilen kategori/etiket kapsamlarının neslini tek bir
+    toplu işlemle artırır; eski anahtarlar zaman aşımıyla düşer.
+    """
+    keys = [generation_key()]
+    keys += [generation_key('category', pk) for pk in set(category_ids) if pk]
+    keys += [generation_key('tag', pk) for pk in set(tag_ids)]
+
+    generation = _new_generation()
+    cache.set_many({key: generation for key in keys}, timeout=None)
+    product_lists_invalidated.send(sender=None, keys=keys)
+
+
+def invalidate_product_details(product_ids):
+    """
+    Verilen ürünlerin detay nesillerini tek set_many ile artırır.
+    """
+    generation = _new_generation()
+    cache.set_many(
+        {generation_key('product', pk): generation for pk in set(product_ids)},
+        timeout=product_cache_setting('DETAIL_TIMEOUT'),
+    )
+
+
+_pending = threading.local()
+
+
+def _pending_invalidations():
+    if not hasattr(_pending, 'state'):
+        _pending.state = {
+            'lists': False, 'category_ids': set(), 'tag_ids': set(), 'product_ids': set(),
+            'tagged_product_ids': set(),
+        }
+    return _pending.state
+
+
+def mark_product_lists_dirty(category_ids=(), tag_ids=()):
+    """
+    Etkilenen kapsamları biriktirir; geçersiz kılma işlem (transaction)
+    commit edildiğinde tek seferde yapılır. Atomic blok dışında çağrılırsa
+    on_commit geri çağrısı hemen çalışır; bu yüzden kayıt, durum
+    güncellendikten sonra yapılır.
+    """
+    state = _pending_invalidations()
+    state['lists'] = True
+    state['category_ids'].update(pk for pk in category_ids if pk)
+    state['tag_ids'].update(tag_ids)
+    transaction.on_commit(flush_product_list_invalidations)
+
+
+def mark_product_tag_lists_dirty(product_ids):
+    """
+    Ürünlerin etiket kapsamlarını biriktirir. Etiket id'leri kayıt sırasında
+    değil, commit sonrasında biriken tüm ürünler için tek sorguyla okunur;
+    işlem içinde çıkarılan etiketler m2m_changed ile ayrıca işaretlenir.
+    """
+    product_ids = set(product_ids)
+    if product_ids:
+        state = _pending_invalidations()
+        state['lists'] = True
+        state['tagged_product_ids'].update(product_ids)
+        transaction.on_commit(flush_product_list_invalidations)
+
+
+def mark_product_details_dirty(product_ids):
+    """
+    Detay önbellekleri için mark_product_lists_dirty'nin karşılığı; ürünler
+    aynı commit'te liste kapsamlarıyla birlikte geçersiz kılınır.
+    """
+    product_ids = set(product_ids)
+    if product_ids:
+        _pending_invalidations()['product_ids'].update(product_ids)
+        transaction.on_commit(flush_product_list_invalidations)
+
+
+def apply_deferred_refreshes():
+    """
+    Ertelenen okuma modeli yenilemelerini açık işlemin içinde hemen uygular.
+    Yazmayı bir atomic blokla sarmalayan kod bunu bloğun sonunda çağırarak
+    commit sonrasında ayrı bir yazma işlemi açılmasını önler; geçersiz kılma
+    yine commit sonrasında yapılır.
+    """
+    product_invalidations_flushing.send(sender=None)
+
+
+def flush_product_list_invalidations():
+    """
+    Biriken kapsamları ve ürünleri toplu işlemlerle geçersiz kılar. Aynı
+    işlemde kaydedilen sonraki geri çağrılar boş durumla karşılaşıp hiçbir
+    şey yapmaz; geri alınan işlemlerden kalanlar bir sonraki commit'te
+    fazladan geçersiz kılınır, bu da yalnızca bir önbellek kaçırmasına yol açar.
+    """
+    state = getattr(_pending, 'state', None)
+    if state is None:
+        return
+    del _pending.state
+    product_invalidations_flushing.send(sender=None)
+    if state['tagged_product_ids']:
+        ProductTag = apps.get_model('api', 'Product').tags.through
+        state['tag_ids'].update(
+            ProductTag.objects.filter(product_id__in=state['tagged_product_ids'])
+            .values_list('tag_id', flat=True).distinct()
+        )
+    if state['lists']:
+        invalidate_product_lists(state['category_ids'], state['tag_ids'])
+    if state['product_ids']:
+        invalidate_product_details(state['product_ids'])
+
+
+COUNT_KEY_PREFIX = 'product_count'
+
+
+def product_count_key(scope, pk):
+    """
+    Bir kategori veya etiketin aktif ürün sayacı anahtarını döndürür.
+    """
+    return f'{COUNT_KEY_PREFIX}_{scope}_{pk}'
+
+
+def get_product_counts(scope, ids, compute):
+    """
+    Verilen kategori/etiket id'lerinin aktif ürün sayılarını sayaçlardan tek
+    get_many ile okur. Sayaçlardan biri eksikse compute() ile (pk, sayı)
+    çiftleri tek gruplu sorguyla alınır ve tüm sayaçlar yeniden yazılır.
+    """
+    keys = {product_count_key(scope, pk): pk for pk in ids}
+    counts = cache.get_many(list(keys))
+    if len(counts) == len(keys):
+        return {keys[key]: count for key, count in counts.items()}
+
+    with primary_reads():
+        computed = dict(compute())
+    cache.set_many(
+        {product_count_key(scope, pk): count for pk, count in computed.items()},
+        timeout=product_cache_setting('COUNT_TIMEOUT'),
+    )
+    return {pk: computed.get(pk, 0) for pk in ids}
+
+
+def _count_keys(category_ids, tag_ids):
+    return (
+        [product_count_key('category', pk) for pk in set(category_ids) if pk]
+        + [product_count_key('tag', pk) for pk in set(tag_ids)]
+    )
+
+
+def adjust_product_counts(category_ids=(), tag_ids=(), delta=1):
+    """
+    Sayaçları işlem commit edildiğinde delta kadar değiştirir; geri alınan
+    işlemlerin değişiklikleri uygulanmaz. Henüz hesaplanmamış sayaçlar
+    atlanır, ilk okumada hesaplanırlar.
+    """
+    keys = _count_keys(category_ids, tag_ids)
+    if keys and delta:
+        transaction.on_commit(partial(_incr_counts, keys, delta))
+
+
+def _incr_counts(keys, delta):
+    for key in keys:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+
+def reset_product_counts(category_ids=(), tag_ids=()):
+    """
+    Sinyal göndermeyen toplu yazmalardan sonra etkilenen sayaçları commit
+    sonrasında siler; sonraki okuma tüm sayıları yeniden hesaplar.
+    """
+    keys = _count_keys(category_ids, tag_ids)
+    if keys:
+        transaction.on_commit(partial(cache.delete_many, keys))
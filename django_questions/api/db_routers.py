@@ -0,0 +1,108 @@
+"""
+Okuma replikası yönlendirmesi.
+
+Ürün görünümleri güvenli (GET/HEAD/OPTIONS) isteklerde okumaları replikaya
+yönlendirir; yazmalar ve yazmadan hemen sonraki okumalar birincil
+veritabanında kalır. Paylaşılan önbelleğe yazılacak değerleri üreten okumalar
+(get_or_build, sayaçlar, ısıtma) primary_reads ile her zaman birincilden
+yapılır: gecikmeli bir replikadan okunan eski satırlar yeni nesil anahtarıyla
+önbelleğe girip tüm istemcilere sunulurdu. Replika kullanımı bir ContextVar
+ile isteğe bağlanır, bu yüzden eşzamansız ORM çağrılarında da geçerlidir.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+# Yazma yapan istemcinin sonraki okumaları bu çerez süresince birincilden yapılır
+PRIMARY_PIN_COOKIE = 'primary_pin'
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Blok içindeki okumaları (replika tanımlıysa) replikaya yönlendirir.
+    """
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def primary_reads():
+    """
+    Blok içindeki okumaları, istek replikaya yönlendirilmiş olsa bile
+    birincilden yapar.
+    """
+    return replica_reads(False)
+
+
+def reading_from_replica():
+    return _replica_reads.get()
+
+
+class PrimaryReplicaRouter:
+    """
+    Yazmalar ve migration'lar her zaman birincile gider. Okumalar yalnızca
+    replica_reads etkinken ve birincilde açık bir işlem yokken rastgele bir
+    replikaya gider; işlem içindeki okumalar kendi yazmalarını görmelidir.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or not _replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replikalar birincilin kopyasıdır; nesneler aynı veriye işaret eder
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    DRF görünümleri için: kimlik doğrulamadan sonra güvenli isteklerin
+    okumalarını replikaya yönlendirir (oturum ve kullanıcı birincilden
+    okunur). Başarılı bir yazmadan sonra istemciye kısa ömürlü bir çerez
+    bırakılır; çerez süresince okumalar, replika gecikmesine takılmamak için
+    birincilden yapılır. Önbellek kaçırmalarındaki yeniden hesaplamalar
+    bu isteklerde de birincilden okur (bkz. primary_reads).
+    """
+    # Yazmadan sonra okumaların birincilde kalacağı süre (saniye)
+    primary_pin_seconds = 5
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.use_replica = (
+            request.method in SAFE_METHODS and PRIMARY_PIN_COOKIE not in request.COOKIES
+        )
+        self._replica_token = _replica_reads.set(self.use_replica)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE, '1', max_age=self.primary_pin_seconds, httponly=True, samesite='Lax',
+            )
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,486 @@
+"""
+İstek başına performans ölçümü.
+
+Her istek için veritabanı sorgu sayısı ve süresi, anahtar ailesine göre
+önbellek işlemleri ve isabet/kaçırma sayıları, serileştirme ve render süreleri
+toplanır. Değerler yanıta Server-Timing başlığı olarak eklenir ve süreç
+içindeki toplamlar Prometheus metin formatında sunulur. Her ikisi de iç bilgi
+olduğundan yalnızca personel kullanıcılara ve METRICS_ALLOWED_IPS içindeki
+istemcilere gösterilir.
+
+Ölçümler bir ContextVar üzerinde tutulur; istek dışındaki çağrılar (yönetim
+komutları, testler) hiçbir şey kaydetmez. Toplamlar süreç başınadır; birden
+çok işçi süreciyle çalışırken her işçi ayrı ayrı kazınmalıdır.
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject
+
+DEFAULTS = {
+    # Personel kullanıcıların ve METRICS_ALLOWED_IPS istemcilerinin yanıtlarına
+    # Server-Timing başlığı eklenir
+    'SERVER_TIMING': True,
+    # İstek süresi histogramının üst sınırları (saniye)
+    'DURATION_BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    # /api/metrics/ uç noktasını ve Server-Timing başlığını oturum açmadan
+    # görebilecek istemci IP'leri (REMOTE_ADDR, ör. Prometheus sunucusu);
+    # personel kullanıcılar her zaman görür
+    'METRICS_ALLOWED_IPS': (),
+}
+
+# Etiket sayısı sınırlı kalsın diye bunların dışındaki yöntemler 'other' olarak sayılır
+HTTP_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+
+def instrumentation_setting(name):
+    """
+    settings.INSTRUMENTATION içindeki ayarı, yoksa varsayılanı döndürür.
+    """
+    return getattr(settings, 'INSTRUMENTATION', {}).get(name, DEFAULTS[name])
+
+
+def metrics_visible(request):
+    """
+    İsteğin ölçümleri görüp göremeyeceğini döndürür: personel kullanıcılar
+    ve METRICS_ALLOWED_IPS içindeki istemciler.
+    """
+    if request.META.get('REMOTE_ADDR') in instrumentation_setting('METRICS_ALLOWED_IPS'):
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+async def ametrics_visible(request):
+    """
+    metrics_visible'ın eşzamansız karşılığı. DRF'in doğruladığı kullanıcı
+    isteğe yazılmışsa o, yoksa oturum kullanıcısı eşzamansız olarak okunur.
+    """
+    if request.META.get('REMOTE_ADDR') in instrumentation_setting('METRICS_ALLOWED_IPS'):
+        return True
+    user = request.__dict__.get('user')
+    if isinstance(user, SimpleLazyObject) and hasattr(request, 'auser'):
+        user = await request.auser()
+    return user is not None and user.is_staff
+
+
+class RequestMetrics:
+    """
+    Tek bir isteğin ölçümleri.
+    """
+    __slots__ = ('queries', 'db_time', 'timings', 'cache_ops', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.timings = defaultdict(float)
+        self.cache_ops = defaultdict(int)
+        self.cache_hits = defaultdict(int)
+        self.cache_misses = defaultdict(int)
+
+    def server_timing(self, total):
+        """
+        Ölçümleri Server-Timing başlık değerine çevirir (süreler milisaniye).
+        """
+        parts = [f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"']
+        hits, misses = sum(self.cache_hits.values()), sum(self.cache_misses.values())
+        if hits or misses:
+            parts.append(f'cache;desc="hits={hits} misses={misses}"')
+        parts += [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.timings.items()]
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def current_metrics():
+    """
+    Etkin isteğin ölçümlerini döndürür; istek dışında None.
+    """
+    return _current.get()
+
+
+@contextmanager
+def timer(name):
+    """
+    Bloğun süresini etkin isteğin name ölçümüne ekler. Aynı adlı bloklar iç
+    içe kullanılmamalıdır; süre iki kez sayılır.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += time.perf_counter() - started
+
+
+_FAMILY_RE = re.compile(r'[A-Za-z_]*[A-Za-z]')
+
+
+def key_family(key):
+    """
+    Önbellek anahtarının ailesini döndürür: baştaki harf ve alt çizgi kısmı
+    ('product_list:...' -> 'product_list', 'product_list_gen_tag_3' ->
+    'product_list_gen_tag'). Etiket kardinalitesi anahtar sayısına değil
+    aile sayısına bağlı kalır.
+    """
+    match = _FAMILY_RE.match(key)
+    return match.group() if match else 'other'
+
+
+def record_cache(operation, keys, hits=(), misses=()):
+    """
+    Önbellek işlemlerini ve get isabet/kaçırmalarını etkin isteğe kaydeder.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return
+    for key in keys:
+        metrics.cache_ops[key_family(key), operation] += 1
+    for key in hits:
+        metrics.cache_hits[key_family(key)] += 1
+    for key in misses:
+        metrics.cache_misses[key_family(key)] += 1
+
+
+_MISSING = object()
+
+
+# Süreç içi arka uçlar G/Ç yapmaz; eşzamansız metotlarında iş parçacığına
+# geçmek (sync_to_async) yalnızca gecikme ekler
+IN_PROCESS_BACKENDS = (LocMemCache, DummyCache)
+
+
+class InstrumentedCache:
+    """
+    Django önbelleğinin kullanılan metotlarını saran ince bir vekil; her
+    işlemi record_cache ile kaydeder. Arka uç her çağrıda caches[alias]
+    üzerinden alınır, böylece override_settings ile yapılan değişiklikler
+    geçerli olur.
+
+    a ile başlayan metotlar eşzamansız görünümler içindir: süreç içi arka
+    uçlarda senkron metot doğrudan çağrılır, diğerlerinde arka ucun kendi
+    eşzamansız metodu beklenir.
+    """
+
+    def __init__(self, alias=DEFAULT_CACHE_ALIAS):
+        self.alias = alias
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def get(self, key, default=None):
+        value = self.backend.get(key, _MISSING)
+        if value is _MISSING:
+            record_cache('get', [key], misses=[key])
+            return default
+        record_cache('get', [key], hits=[key])
+        return value
+
+    def get_many(self, keys):
+        values = self.backend.get_many(keys)
+        record_cache(
+            'get', keys,
+            hits=[key for key in keys if key in values],
+            misses=[key for key in keys if key not in values],
+        )
+        return values
+
+    def set(self, key, value, timeout=None, **kwargs):
+        record_cache('set', [key])
+        return self.backend.set(key, value, timeout=timeout, **kwargs)
+
+    def set_many(self, data, timeout=None, **kwargs):
+        record_cache('set', data)
+        return self.backend.set_many(data, timeout=timeout, **kwargs)
+
+    def add(self, key, value, timeout=None, **kwargs):
+        record_cache('add', [key])
+        return self.backend.add(key, value, timeout=timeout, **kwargs)
+
+    def incr(self, key, delta=1, **kwargs):
+        record_cache('incr', [key])
+        return self.backend.incr(key, delta, **kwargs)
+
+    def delete(self, key, **kwargs):
+        record_cache('delete', [key])
+        return self.backend.delete(key, **kwargs)
+
+    def delete_many(self, keys, **kwargs):
+        record_cache('delete', keys)
+        return self.backend.delete_many(keys, **kwargs)
+
+    async def _call(self, name, *args, **kwargs):
+        backend = self.backend
+        if isinstance(backend, IN_PROCESS_BACKENDS):
+            return getattr(backend, name)(*args, **kwargs)
+        return await getattr(backend, f'a{name}')(*args, **kwargs)
+
+    async def aget(self, key, default=None):
+        value = await self._call('get', key, _MISSING)
+        if value is _MISSING:
+            record_cache('get', [key], misses=[key])
+            return default
+        record_cache('get', [key], hits=[key])
+        return value
+
+    async def aget_many(self, keys):
+        values = await self._call('get_many', keys)
+        record_cache(
+            'get', keys,
+            hits=[key for key in keys if key in values],
+            misses=[key for key in keys if key not in values],
+        )
+        return values
+
+    async def aset(self, key, value, timeout=None, **kwargs):
+        record_cache('set', [key])
+        return await self._call('set', key, value, timeout=timeout, **kwargs)
+
+    async def aset_many(self, data, timeout=None, **kwargs):
+        record_cache('set', data)
+        return await self._call('set_many', data, timeout=timeout, **kwargs)
+
+    async def aadd(self, key, value, timeout=None, **kwargs):
+        record_cache('add', [key])
+        return await self._call('add', key, value, timeout=timeout, **kwargs)
+
+    async def adelete(self, key, **kwargs):
+        record_cache('delete', [key])
+        return await self._call('delete', key, **kwargs)
+
+
+cache = InstrumentedCache()
+
+
+class MetricsRegistry:
+    """
+    Süreç içindeki istek ölçümlerinin toplamları. Kilit yalnızca istek
+    sonunda bir kez alınır.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self._clear()
+
+    def reset(self):
+        with self.lock:
+            self._clear()
+
+    def _clear(self):
+        self.requests = defaultdict(int)
+        self.duration_buckets = defaultdict(lambda: [0] * len(self.buckets))
+        self.duration_sum = defaultdict(float)
+        self.duration_count = defaultdict(int)
+        self.queries = defaultdict(int)
+        self.db_time = defaultdict(float)
+        self.timings = defaultdict(float)
+        self.cache_ops = defaultdict(int)
+        self.cache_hits = defaultdict(int)
+        self.cache_misses = defaultdict(int)
+
+    def observe(self, view, method, status, duration, metrics):
+        if method not in HTTP_METHODS:
+            method = 'other'
+        with self.lock:
+            self.requests[view, method, str(status)] += 1
+            counts = self.duration_buckets[view]
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    counts[index] += 1
+            self.duration_sum[view] += duration
+            self.duration_count[view] += 1
+            self.queries[view] += metrics.queries
+            self.db_time[view] += metrics.db_time
+            for name, seconds in metrics.timings.items():
+                self.timings[view, name] += seconds
+            for labels, count in metrics.cache_ops.items():
+                self.cache_ops[labels] += count
+            for family, count in metrics.cache_hits.items():
+                self.cache_hits[family] += count
+            for family, count in metrics.cache_misses.items():
+                self.cache_misses[family] += count
+
+    def render(self):
+        """
+        Toplamları Prometheus metin formatında (0.0.4) döndürür.
+        """
+        with self.lock:
+            lines = []
+
+            def metric(name, kind, help_text, samples):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+
+            metric('django_http_requests_total', 'counter', 'Total HTTP requests.', [
+                ({'view': view, 'method': method, 'status': status}, count)
+                for (view, method, status), count in sorted(self.requests.items())
+            ])
+
+            lines.append('# HELP django_http_request_duration_seconds HTTP request duration.')
+            lines.append('# TYPE django_http_request_duration_seconds histogram')
+            for view in sorted(self.duration_count):
+                for bound, count in zip(self.buckets, self.duration_buckets[view]):
+                    lines.append('django_http_request_duration_seconds_bucket{} {}'.format(
+                        _labels({'view': view, 'le': _number(bound)}), count,
+                    ))
+                lines.append('django_http_request_duration_seconds_bucket{} {}'.format(
+                    _labels({'view': view, 'le': '+Inf'}), self.duration_count[view],
+                ))
+                lines.append('django_http_request_duration_seconds_sum{} {}'.format(
+                    _labels({'view': view}), _number(self.duration_sum[view]),
+                ))
+                lines.append('django_http_request_duration_seconds_count{} {}'.format(
+                    _labels({'view': view}), self.duration_count[view],
+                ))
+
+            metric('django_db_queries_total', 'counter', 'Database queries executed.', [
+                ({'view': view}, count) for view, count in sorted(self.queries.items())
+            ])
+            metric('django_db_query_duration_seconds_total', 'counter', 'Time spent in database queries.', [
+                ({'view': view}, seconds) for view, seconds in sorted(self.db_time.items())
+            ])
+            metric('django_view_phase_duration_seconds_total', 'counter', 'Time spent in serialize and render phases.', [
+                ({'view': view, 'phase': name}, seconds)
+                for (view, name), seconds in sorted(self.timings.items())
+            ])
+            metric('django_cache_operations_total', 'counter', 'Cache operations by key family.', [
+                ({'family': family, 'operation': operation}, count)
+                for (family, operation), count in sorted(self.cache_ops.items())
+            ])
+            metric('django_cache_hits_total', 'counter', 'Cache get hits by key family.', [
+                ({'family': family}, count) for family, count in sorted(self.cache_hits.items())
+            ])
+            metric('django_cache_misses_total', 'counter', 'Cache get misses by key family.', [
+                ({'family': family}, count) for family, count in sorted(self.cache_misses.items())
+            ])
+            return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    escaped = (
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry(instrumentation_setting('DURATION_BUCKETS'))
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_wrapper(sender, connection, **kwargs):
+    """
+    Her veritabanı bağlantısına sorguları etkin isteğe yazan sarmalayıcıyı
+    bir kez ekler. Eşzamansız görünümlerde ORM sorguları başka bir iş
+    parçacığındaki bağlantıda çalışır; ContextVar oraya da taşındığı için
+    sorgular yine doğru isteğe yazılır.
+    """
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+class PerformanceMiddleware:
+    """
+    İstek başına ölçümleri toplar, ölçümleri görebilen isteklere
+    Server-Timing başlığını ekler ve toplamları kayıt defterine işler. Hem
+    senkron hem eşzamansız çalışır; eşzamansız görünümlerin önüne iş
+    parçacığı geçişi eklemez. Akış yanıtlarında (StreamingHttpResponse)
+    gövde üretilirken çalışan sorgular ölçüme girmez.
+
+    Render süresi, DRF Response gibi şablon yanıtlarında render öncesi
+    (process_template_response) ile render sonrası geri çağrısı arasında
+    ölçülür.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Ara katman yüklenmeden önce açılmış bağlantılar
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(None, connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - started
+        visible = instrumentation_setting('SERVER_TIMING') and metrics_visible(request)
+        return self.finish(request, response, metrics, duration, visible)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - started
+        visible = instrumentation_setting('SERVER_TIMING') and await ametrics_visible(request)
+        return self.finish(request, response, metrics, duration, visible)
+
+    def finish(self, request, response, metrics, duration, server_timing):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        registry.observe(view, request.method, response.status_code, duration, metrics)
+        if server_timing:
+            response['Server-Timing'] = metrics.server_timing(duration)
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = _current.get()
+        if metrics is not None:
+            started = time.perf_counter()
+
+            def finished(response):
+                metrics.timings['render'] += time.perf_counter() - started
+
+            response.add_post_render_callback(finished)
+        return response
@@ -0,0 +1,222 @@
+"""
+Ürün listesi okuma modelinin (ProductListing) bakımı.
+
+Her aktif ürün için liste çıktısı bir kez serialize_product_rows ile üretilir
+ve okuma tablosunda saklanır. Product, Category ve Tag yazmaları etkilenen
+ürünleri işlem boyunca biriktirir; satırlar commit sonrasında, önbellek
+geçersiz kılınmadan hemen önce tek seferde yenilenir (API yazmaları bunu
+apply_deferred_refreshes ile işlemin sonunda yapar). Böylece aynı işlemde
+birden çok kez değişen ürün (ör. etiketleriyle oluşturulan) bir kez yazılır
+ve geçersiz kılma her zaman güncel satırları görür. Sinyal göndermeyen toplu
+yazmalar (bulk_create, bulk_update, QuerySet.update) refresh_listings'i
+kendisi çağırmalıdır; tablo rebuild_product_listings komutuyla baştan
+oluşturulabilir.
+
+Satırı yenilenen veya silinen ürünlerin detay önbellekleri de commit
+sonrasında geçersiz kılınır; detay uç noktası aynı satırları okur.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .caching import mark_product_details_dirty, mark_product_lists_dirty, product_invalidations_flushing
+from .models import Category, Product, ProductListing, Tag, deleting_products
+from .serializers import PRODUCT_LIST_VALUES, serialize_product_rows
+
+# Tek seferde yenilenen ürün sayısı
+REFRESH_CHUNK_SIZE = 1000
+
+
+def _write_listings(rows):
+    # Tarihler o an etkin saat dilimiyle metne çevrilir (settings.TIME_ZONE).
+    # Var olan satırlar tek INSERT ... ON CONFLICT ile üzerine yazılır
+    ProductListing.objects.bulk_create(
+        (
+            ProductListing(
+                id=row['id'], category_id=row['category_id'], created_at=row['created_at'], payload=payload,
+            )
+            for row, payload in zip(rows, serialize_product_rows(rows))
+        ),
+        update_conflicts=True,
+        unique_fields=['id'],
+        update_fields=['category_id', 'created_at', 'payload', 'updated_at'],
+    )
+
+
+def refresh_listings(product_ids):
+    """
+    Verilen ürünlerin satırlarını yeniler: aktif ürünler yeniden yazılır,
+    pasif veya silinmiş ürünlerin satırları silinir. Her parça için bir
+    ürün, bir etiket sorgusu ve bir ekleme yapılır; silme yalnızca aktif
+    olmayan ürün varsa çalışır.
+    """
+    product_ids = sorted(set(product_ids))
+    mark_product_details_dirty(product_ids)
+    _refresh_rows(product_ids)
+
+
+def _refresh_rows(product_ids):
+    # Çoğunlukla bir yazma işleminin içinden çağrılır; ayrı savepoint gerekmez
+    with transaction.atomic(savepoint=False):
+        for start in range(0, len(product_ids), REFRESH_CHUNK_SIZE):
+            chunk = product_ids[start:start + REFRESH_CHUNK_SIZE]
+            rows = list(Product.objects.filter(pk__in=chunk, is_active=True).values(*PRODUCT_LIST_VALUES))
+            inactive = set(chunk).difference(row['id'] for row in rows)
+            if inactive:
+                ProductListing.objects.filter(pk__in=inactive).delete()
+            _write_listings(rows)
+
+
+_pending = threading.local()
+
+
+def schedule_listing_refresh(product_ids):
+    """
+    Ürünleri commit sonrasında yenilenmek üzere biriktirir. Detay önbellekleri
+    hemen kirli işaretlenir; bu, satırları yenileyecek geri çağrıyı da kaydeder.
+    Atomic blok dışında çağrılırsa yenileme hemen yapılır.
+    """
+    product_ids = set(product_ids)
+    if product_ids:
+        if not hasattr(_pending, 'product_ids'):
+            _pending.product_ids = set()
+        _pending.product_ids.update(product_ids)
+        mark_product_details_dirty(product_ids)
+
+
+@receiver(product_invalidations_flushing)
+def flush_listing_refreshes(sender, **kwargs):
+    """
+    Biriken ürünlerin satırlarını parça başına tek sorgu grubuyla yeniler.
+    Geri alınan işlemlerden kalan ürünler bir sonraki commit'te fazladan
+    yenilenir; satırlar her zaman veritabanındaki güncel halden üretilir.
+    """
+    product_ids = getattr(_pending, 'product_ids', None)
+    if product_ids is None:
+        return
+    del _pending.product_ids
+    _refresh_rows(sorted(product_ids))
+
+
+def rebuild_listings():
+    """
+    Tabloyu tüm aktif ürünlerden yeniden oluşturur.
+    """
+    with transaction.atomic():
+        # Sinyalsiz pasifleştirilmiş ürünler de dahil tüm detaylar düşer
+        mark_product_details_dirty(Product.objects.values_list('pk', flat=True))
+        ProductListing.objects.all().delete()
+        rows = (
+            Product.objects.filter(is_active=True).order_by('id')
+            .values(*PRODUCT_LIST_VALUES).iterator(chunk_size=REFRESH_CHUNK_SIZE)
+        )
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == REFRESH_CHUNK_SIZE:
+                _write_listings(chunk)
+                chunk = []
+        _write_listings(chunk)
+
+
+def listing_rows_data(rows):
+    """
+    ProductListing values() satırlarından liste çıktısını döndürür.
+    """
+    return [row['payload'] for row in rows]
+
+
+def _tagged_product_ids(tag):
+    return list(Product.tags.through.objects.filter(tag_id=tag.pk).values_list('product_id', flat=True))
+
+
+def _mark_embedding_lists_dirty(product_ids, category_ids=(), tag_ids=()):
+    """
+    Gömülü kategori/etiket verisi değişen ürünlerin göründüğü listeleri
+    geçersiz kılar: genel kapsam, verilen kapsamlar ve ürünlerin kendi
+    kategori ve etiket kapsamları.
+    """
+    category_ids = {
+        *category_ids,
+        *Product.objects.filter(pk__in=product_ids).values_list('category_id', flat=True).distinct(),
+    }
+    tag_ids = {
+        *tag_ids,
+        *Product.tags.through.objects.filter(product_id__in=product_ids)
+        .values_list('tag_id', flat=True).distinct(),
+    }
+    mark_product_lists_dirty(category_ids, tag_ids)
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_listing(sender, instance, **kwargs):
+    schedule_listing_refresh([instance.pk])
+
+
+@receiver(pre_delete, sender=Product)
+def remove_deleted_product_listings(sender, instance, origin=None, **kwargs):
+    # QuerySet.delete(): satırlar ilk nesnede tüm sorgu için tek silmeyle
+    # kaldırılır; ürün satırları henüz silinmediğinden id'ler sorgudan okunur
+    products = deleting_products(origin)
+    if products is not None and not getattr(products, '_listings_removed', False):
+        products._listings_removed = True
+        product_ids = list(products.values_list('pk', flat=True))
+        mark_product_details_dirty(product_ids)
+        ProductListing.objects.filter(pk__in=product_ids).delete()
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_listing(sender, instance, origin=None, **kwargs):
+    if deleting_products(origin) is not None:
+        return
+    mark_product_details_dirty([instance.pk])
+    ProductListing.objects.filter(pk=instance.pk).delete()
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def refresh_listings_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule_listing_refresh([instance.pk])
+        return
+
+    # Etiket tarafından yapılan değişiklikte pk_set ürün id'lerini içerir;
+    # clear için ürünler ilişki silinmeden önce toplanır
+    if action == 'pre_clear':
+        instance._listing_product_ids = _tagged_product_ids(instance)
+    elif action == 'post_clear':
+        schedule_listing_refresh(instance._listing_product_ids)
+    elif action in ('post_add', 'post_remove'):
+        schedule_listing_refresh(pk_set)
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_listings(sender, instance, created, **kwargs):
+    # Kategori adı ve açıklaması satırlara gömülüdür
+    if not created:
+        product_ids = list(ProductListing.objects.filter(category_id=instance.pk).values_list('pk', flat=True))
+        schedule_listing_refresh(product_ids)
+        _mark_embedding_lists_dirty(product_ids, category_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+def refresh_tag_listings(sender, instance, created, **kwargs):
+    if not created:
+        product_ids = _tagged_product_ids(instance)
+        schedule_listing_refresh(product_ids)
+        _mark_embedding_lists_dirty(product_ids, tag_ids=[instance.pk])
+
+
+@receiver(pre_delete, sender=Tag)
+def collect_tag_listings(sender, instance, **kwargs):
+    # Etiket silinirken ara tablo satırları sinyalsiz silinir
+    instance._listing_product_ids = _tagged_product_ids(instance)
+
+
+@receiver(post_delete, sender=Tag)
+def refresh_deleted_tag_listings(sender, instance, **kwargs):
+    product_ids = getattr(instance, '_listing_product_ids', ())
+    schedule_listing_refresh(product_ids)
+    _mark_embedding_lists_dirty(product_ids, tag_ids=[instance.pk])
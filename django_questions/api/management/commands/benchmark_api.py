@@ -0,0 +1,174 @@
+import json
+import platform
+import random
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.pagination import Cursor
+from rest_framework.test import APIClient
+
+from api.benchmarks import benchmark_database, percentile, seed_catalog
+from api.models import Category, Product, ProductListing, Tag
+from api.pagination import ProductCursorPagination
+
+DEFAULT_BUDGETS = Path(__file__).resolve().parents[2] / 'benchmark_budgets.json'
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+# list_deep senaryosunun başladığı satırın liste içindeki konumu (0: ilk sayfa)
+DEEP_PAGE_FRACTION = 0.9
+
+
+def deep_list_url(fraction=DEEP_PAGE_FRACTION):
+    """
+    Listenin verilen oranındaki satırdan başlayan sayfanın cursor URL'ini
+    döndürür. Cursor, istemcinin next bağlantılarını izleyerek ulaşacağı
+    konumun aynısıdır; oraya kadar sayfa sayfa gitmek gerekmez.
+    """
+    paginator = ProductCursorPagination()
+    rows = ProductListing.objects.order_by(*paginator.ordering).values('id', 'created_at')
+    row = rows[int(rows.count() * fraction)]
+    paginator.base_url = 'http://testserver/api/products/'
+    position = paginator._get_position_from_instance(row, paginator.ordering)
+    return paginator.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+
+class Command(BaseCommand):
+    help = (
+        'Ürün API uç noktalarını sentetik kataloglar üzerinde test istemcisiyle '
+        'çalıştırır; sorgu sayısı, p50/p99 gecikme ve en yüksek bellek '
+        'kullanımını ölçer, bütçe aşılırsa hata verir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+        parser.add_argument('--requests', type=int, default=50, help='Her senaryo için istek sayısı')
+        parser.add_argument('--budgets', default=str(DEFAULT_BUDGETS), help='Bütçe dosyası (JSON)')
+        parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+        parser.add_argument('--no-budgets', action='store_true', help='Yalnızca ölç, bütçeleri denetleme')
+
+    def handle(self, *args, **options):
+        budgets = {} if options['no_budgets'] else json.loads(Path(options['budgets']).read_text())
+        results = []
+        for size in options['sizes']:
+            with benchmark_database():
+                seed_catalog(size)
+                for cache_mode in ('on', 'off'):
+                    with override_settings(**({'CACHES': NO_CACHE} if cache_mode == 'off' else {})):
+                        cache.clear()
+                        results += self.run_scenarios(size, cache_mode, options['requests'])
+
+        violations = [
+            violation for result in results for violation in self.check_budgets(result, budgets)
+        ]
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'requests_per_scenario': options['requests'],
+            },
+            'results': results,
+            'violations': violations,
+        }
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+        for result in results:
+            self.stdout.write(
+                '{size:>7} cache={cache:<3} {scenario:<14} sorgu={queries:>3}  '
+                'p50={p50_ms:8.2f} ms  p99={p99_ms:8.2f} ms  bellek={peak_kib:9.1f} KiB'.format(**result)
+            )
+        if violations:
+            raise CommandError('Bütçe aşıldı:\n' + '\n'.join(violations))
+
+    def run_scenarios(self, size, cache_mode, requests):
+        rng = random.Random(size)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(
+            f'benchmark-{cache_mode}', password='parola', is_staff=True,
+        ))
+        category_ids = list(Category.objects.values_list('id', flat=True))
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True))
+        deep_url = deep_list_url()
+
+        def create():
+            return client.post('/api/products/', {
+                'name': 'Benchmark', 'description': 'Oluşturma senaryosu', 'price': '10.00',
+                'category_id': rng.choice(category_ids), 'tag_ids': rng.sample(tag_ids, 3),
+            }, format='json')
+
+        def destroy():
+            return client.delete(f'/api/products/{product_ids.pop()}/')
+
+        scenarios = {
+            'list': lambda: client.get('/api/products/'),
+            'list_deep': lambda: client.get(deep_url),
+            'list_category': lambda: client.get('/api/products/', {'category': rng.choice(category_ids)}),
+            'list_tag': lambda: client.get('/api/products/', {'tag': rng.choice(tag_ids)}),
+            'retrieve': lambda: client.get(f'/api/products/{rng.choice(product_ids)}/'),
+            'create': create,
+            'update': lambda: client.patch(
+                f'/api/products/{rng.choice(product_ids)}/', {'price': '11.00'}, format='json',
+            ),
+            'destroy': destroy,
+        }
+        return [
+            self.measure(size, cache_mode, name, request, requests)
+            for name, request in scenarios.items()
+        ]
+
+    def measure(self, size, cache_mode, scenario, request, requests):
+        latencies, max_queries = [], 0
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = request()
+                latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f'{scenario}: beklenmeyen durum kodu {response.status_code}')
+            max_queries = max(max_queries, len(queries))
+
+        # Bellek ölçümü süreyi bozmasın diye ayrı bir istekte yapılır
+        tracemalloc.start()
+        request()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            'size': size,
+            'cache': cache_mode,
+            'scenario': scenario,
+            'queries': max_queries,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+    def check_budgets(self, result, budgets):
+        """
+        Sorgu bütçesi katalog boyutundan bağımsızdır; gecikme ve bellek
+        bütçeleri senaryo başına üst sınırdır.
+        """
+        scenario = result['scenario']
+        limits = {
+            'queries': budgets.get('queries', {}).get(scenario),
+            'p99_ms': budgets.get('p99_ms', {}).get(scenario),
+            'peak_kib': budgets.get('peak_kib', {}).get(scenario),
+        }
+        return [
+            f"{result['size']} ürün, cache={result['cache']}, {scenario}: "
+            f'{metric} {result[metric]} > {limit}'
+            for metric, limit in limits.items()
+            if limit is not None and result[metric] > limit
+        ]
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from api.benchmarks import benchmark_database, seed_catalog, timed
+from api.models import Product, Tag
+from api.serializers import PRODUCT_LIST_VALUES, ProductSerializer, serialize_product_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'ProductSerializer ile hızlı liste serileştirme yolunu karşılaştırır; '
+        'çıktıların aynı olduğunu doğrular ve süreleri raporlar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            with benchmark_database():
+                seed_catalog(size)
+                self.run(size, options['repeat'])
+
+    def run(self, size, repeat):
+        products = Product.objects.filter(is_active=True).order_by('-created_at', '-id')
+
+        def drf():
+            queryset = products.select_related('category').prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.order_by('id'))
+            )
+            return ProductSerializer(queryset, many=True).data
+
+        def fast():
+            return serialize_product_rows(products.values(*PRODUCT_LIST_VALUES))
+
+        expected, drf_time = timed(drf, repeat)
+        actual, fast_time = timed(fast, repeat)
+        if JSONRenderer().render(expected) != JSONRenderer().render(actual):
+            raise CommandError(f'{size} ürün için çıktılar farklı')
+
+        self.stdout.write(
+            f'{size:>7} ürün  DRF: {drf_time * 1000:9.1f} ms  '
+            f'hızlı yol: {fast_time * 1000:9.1f} ms  hızlanma: {drf_time / fast_time:5.1f}x'
+        )
@@ -0,0 +1,162 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.db import OperationalError, connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as StockDatabaseWrapper
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from api.benchmarks import benchmark_database, percentile, seed_catalog
+from api.models import Category, Product, Tag
+from api.serializers import PRODUCT_LIST_VALUES, product_tags_by_id
+
+
+class Command(BaseCommand):
+    help = (
+        'Aynı katalog üzerinde eşzamanlı yazıcı ve okuyucu iş parçacıklarını '
+        "Django'nun varsayılan SQLite ayarlarıyla ve settings.py'deki ayarlarla "
+        '(WAL, pragmalar, IMMEDIATE işlemler, yazıcı sırası) çalıştırır; okuma '
+        'gecikmesini ve "database is locked" hatalarını karşılaştırır.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=10000, help='Katalogdaki ürün sayısı')
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument(
+            '--atomic-readers', type=int, default=2,
+            help='Okumayı atomic blok içinde yapan iş parçacıkları (yazma kilidinin okumalara maliyeti)',
+        )
+        parser.add_argument('--duration', type=float, default=5.0, help='Her profil için süre (saniye)')
+        parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Bu benchmark yalnızca SQLite için anlamlıdır.')
+
+        results = []
+        with benchmark_database(), tempfile.TemporaryDirectory() as directory:
+            seed_catalog(options['size'])
+            category_ids = list(Category.objects.values_list('id', flat=True))
+            tag_ids = list(Tag.objects.values_list('id', flat=True))
+            settings_dict = dict(connection.settings_dict)
+            connection.close()
+
+            # Günlük kipi dosyada kalıcı olduğundan varsayılan profil, rollback
+            # günlüğüne çevrilmiş ayrı bir kopya üzerinde çalışır
+            stock_name = os.path.join(directory, 'stock.sqlite3')
+            self.copy_database(settings_dict['NAME'], stock_name)
+
+            profiles = {
+                'stock': (StockDatabaseWrapper, {**settings_dict, 'NAME': stock_name, 'OPTIONS': {}}),
+                'tuned': (
+                    import_string(f"{settings_dict['ENGINE']}.base.DatabaseWrapper"), settings_dict,
+                ),
+            }
+            for name, (wrapper_class, profile_settings) in profiles.items():
+                result = self.run_profile(
+                    wrapper_class, profile_settings, category_ids, tag_ids,
+                    options['writers'], options['readers'], options['atomic_readers'], options['duration'],
+                )
+                result['profile'] = name
+                results.append(result)
+                self.stdout.write(
+                    '{profile:<6} yazma={writes:>6} ({writes_per_second:7.1f}/sn, hata={write_errors})  '
+                    'okuma={reads:>6} ({reads_per_second:7.1f}/sn, hata={read_errors})  '
+                    'okuma p50={read_p50_ms:7.2f} ms  p99={read_p99_ms:8.2f} ms  '
+                    'en uzun={read_max_ms:8.2f} ms  yazma p99={write_p99_ms:8.2f} ms  '
+                    'atomic okuma={atomic_reads:>6} (p99={atomic_read_p99_ms} ms)'.format(**result)
+                )
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2))
+
+    def copy_database(self, source, target):
+        with sqlite3.connect(source) as source_db, sqlite3.connect(target) as target_db:
+            source_db.backup(target_db)
+            target_db.execute('PRAGMA journal_mode=DELETE')
+        source_db.close()
+        target_db.close()
+
+    def run_profile(self, wrapper_class, settings_dict, category_ids, tag_ids, writers, readers, atomic_readers,
+                    duration):
+        stop = threading.Event()
+        read_latencies, write_latencies, atomic_read_latencies = [], [], []
+        errors = {'read': 0, 'write': 0, 'atomic_read': 0}
+
+        def use_connection():
+            # Bağlantılar iş parçacığına özeldir; her iş parçacığı profilin
+            # arka ucuyla kendi bağlantısını kurar
+            connections['default'] = wrapper_class(dict(settings_dict), 'default')
+
+        def write(rng):
+            with transaction.atomic():
+                product = Product.objects.create(
+                    name='Eşzamanlı', description='Yazma', price='10.00',
+                    category_id=rng.choice(category_ids),
+                )
+                product.tags.set(rng.sample(tag_ids, 3))
+
+        def read(rng):
+            queryset = Product.objects.filter(is_active=True, category_id=rng.choice(category_ids))
+            rows = list(queryset.order_by('-created_at', '-id').values(*PRODUCT_LIST_VALUES)[:50])
+            product_tags_by_id([row['id'] for row in rows])
+
+        def atomic_read(rng):
+            # Yazmayan atomic blok da IMMEDIATE işlem açar ve yazıcı sırasına girer
+            with transaction.atomic():
+                read(rng)
+
+        def worker(operation, latencies, kind, seed):
+            use_connection()
+            rng = random.Random(seed)
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    try:
+                        operation(rng)
+                    except OperationalError:
+                        errors[kind] += 1
+                        continue
+                    latencies.append((time.perf_counter() - started) * 1000)
+            finally:
+                connections['default'].close()
+
+        threads = [
+            threading.Thread(target=worker, args=(write, write_latencies, 'write', seed))
+            for seed in range(writers)
+        ] + [
+            threading.Thread(target=worker, args=(read, read_latencies, 'read', seed))
+            for seed in range(readers)
+        ] + [
+            threading.Thread(target=worker, args=(atomic_read, atomic_read_latencies, 'atomic_read', seed))
+            for seed in range(atomic_readers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        return {
+            'writes': len(write_latencies),
+            'writes_per_second': round(len(write_latencies) / duration, 1),
+            'write_errors': errors['write'],
+            'write_p99_ms': round(percentile(write_latencies, 99), 3) if write_latencies else None,
+            'reads': len(read_latencies),
+            'reads_per_second': round(len(read_latencies) / duration, 1),
+            'read_errors': errors['read'],
+            'read_p50_ms': round(percentile(read_latencies, 50), 3),
+            'read_p99_ms': round(percentile(read_latencies, 99), 3),
+            'read_max_ms': round(max(read_latencies), 3),
+            'atomic_reads': len(atomic_read_latencies),
+            'atomic_read_errors': errors['atomic_read'],
+            'atomic_read_p99_ms': round(percentile(atomic_read_latencies, 99), 3) if atomic_read_latencies else None,
+        }
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from api.benchmarks import benchmark_database, percentile, seed_catalog
+from api.models import Product
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Senkron ve eşzamansız ürün uç noktalarını aynı süreçte ASGI '
+        'uygulamasına eşzamanlı istekler göndererek karşılaştırır; saniyedeki '
+        'istek sayısını ve p50/p99 gecikmeyi raporlar. İstekler uvicorn gibi bir '
+        'sunucunun çağıracağı ASGIHandler üzerinden, soket katmanı olmadan geçer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=10000, help='Katalogdaki ürün sayısı')
+        parser.add_argument('--requests', type=int, default=500, help='Her ölçümdeki istek sayısı')
+        parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 10, 50])
+        parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+
+    def handle(self, *args, **options):
+        results = []
+        with benchmark_database():
+            seed_catalog(options['size'])
+            client = Client()
+            client.force_login(User.objects.create_user('loadtest', password='parola'))
+            cookie = f"sessionid={client.cookies['sessionid'].value}".encode()
+            product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True)[:500])
+
+            scenarios = {
+                'list': ('/api/products/', '/api/async/products/'),
+                'retrieve': ('/api/products/{}/', '/api/async/products/{}/'),
+            }
+            for cache_mode in ('on', 'off'):
+                with override_settings(**({'CACHES': NO_CACHE} if cache_mode == 'off' else {})):
+                    for scenario, paths in scenarios.items():
+                        for concurrency in options['concurrency']:
+                            for mode, path in zip(('sync', 'async'), paths):
+                                cache.clear()
+                                result = asyncio.run(self.run(
+                                    path, product_ids, cookie, options['requests'], concurrency,
+                                ))
+                                result.update(scenario=scenario, mode=mode, cache=cache_mode, concurrency=concurrency)
+                                results.append(result)
+                                self.stdout.write(
+                                    '{scenario:<9} cache={cache:<3} c={concurrency:<4} {mode:<6} '
+                                    '{rps:9.1f} istek/sn  p50={p50_ms:8.2f} ms  p99={p99_ms:8.2f} ms'.format(**result)
+                                )
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2))
+
+    async def run(self, path, product_ids, cookie, total, concurrency):
+        """
+        total isteği concurrency adet işçiyle gönderir.
+        """
+        application = ASGIHandler()
+        latencies = []
+        counter = iter(range(total))
+
+        async def worker():
+            for index in counter:
+                started = time.perf_counter()
+                status = await self.request(application, path.format(product_ids[index % len(product_ids)]), cookie)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if status != 200:
+                    raise CommandError(f'{path}: beklenmeyen durum kodu {status}')
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return {
+            'rps': round(total / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+        }
+
+    async def request(self, application, path, cookie):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'headers': [(b'host', b'testserver'), (b'cookie', cookie)],
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 0),
+        }
+        status = None
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # Gövdeden sonra istemci bağlantıyı kesene kadar beklenir; Django
+            # yanıtı gönderince bu bekleyişi iptal eder
+            await asyncio.Future()
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        await application(scope, receive, send)
+        return status
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.listings import rebuild_listings
+from api.models import ProductListing
+
+
+class Command(BaseCommand):
+    help = (
+        'Ürün listesi okuma modelini (ProductListing) tüm aktif ürünlerden '
+        'yeniden oluşturur. Sinyal göndermeyen toplu güncellemelerden '
+        '(QuerySet.update) sonra kullanılır.'
+    )
+
+    def handle(self, *args, **options):
+        rebuild_listings()
+        self.stdout.write(self.style.SUCCESS(f'{ProductListing.objects.count()} ürün satırı yazıldı.'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        'Ürün arama indeksini tüm ürünlerden yeniden oluşturur. İndeksi '
+        'sinyallerle tutan arka uçlarda, sinyal göndermeyen toplu '
+        'güncellemelerden (QuerySet.update) sonra kullanılır.'
+    )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{type(backend).__name__} indeksi yeniden oluşturuldu.'))
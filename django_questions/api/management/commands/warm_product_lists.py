@@ -0,0 +1,59 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.urls import reverse
+
+from api.caching import product_cache_setting
+from api.models import Category, Tag
+from api.warming import hot_list_urls, warm_url
+
+
+class Command(BaseCommand):
+    help = (
+        'Ürün listesi önbelleğini ısıtır: en çok istenen listeleri (ve '
+        'isteğe bağlı olarak her kategori ve etiketin ilk sayfasını) '
+        'önbellekte yoksa oluşturur. Dağıtımdan sonra çalıştırılabilir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Isıtılacak en çok istenen liste sayısı (varsayılan: WARM_MAX_KEYS)')
+        parser.add_argument('--url', action='append', default=[], help='Ayrıca ısıtılacak liste URL\'si')
+        parser.add_argument(
+            '--scopes', action='store_true',
+            help='Filtresiz listenin ve her kategori/etiket listesinin ilk sayfasını da ısıt',
+        )
+        parser.add_argument('--base-url', default='http://localhost', help='--scopes URL\'lerinin kökü')
+        parser.add_argument('--workers', type=int, help='Eşzamanlı ısıtma sayısı (varsayılan: WARM_WORKERS)')
+
+    def handle(self, *args, **options):
+        urls = hot_list_urls(options['limit']) + options['url']
+        if options['scopes']:
+            urls += self.scope_urls(options['base_url'].rstrip('/'))
+        urls = list(dict.fromkeys(urls))
+        workers = options['workers'] or product_cache_setting('WARM_WORKERS') or 1
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Tek işçiyle havuz kullanılmaz, ısıtma bu iş parçacığında yapılır
+            results = executor.map(self.warm, urls) if workers > 1 else map(self.warm, urls)
+            for url, status, elapsed in results:
+                self.stdout.write(f'{status}  {elapsed * 1000:8.1f} ms  {url}')
+        self.stdout.write(self.style.SUCCESS(f'{len(urls)} liste ısıtıldı.'))
+
+    def scope_urls(self, base_url):
+        path = f"{base_url}{reverse('product-list')}"
+        return [path] + [
+            f'{path}?{urlencode({name: pk})}'
+            for name, model in (('category', Category), ('tag', Tag))
+            for pk in model.objects.order_by('pk').values_list('pk', flat=True)
+        ]
+
+    def warm(self, url):
+        close_old_connections()
+        started = time.perf_counter()
+        try:
+            return url, warm_url(url), time.perf_counter() - started
+        finally:
+            close_old_connections()
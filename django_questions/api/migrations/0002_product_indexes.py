@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-created_at', '-id'], name='product_active_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='product_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at'], name='product_created_idx'),
+        ),
+        # Otomatik oluşturulan ara tabloda (tag_id) tek başına indekslidir;
+        # etiket filtresi ürün id'lerini tablo satırına gitmeden bu indeksten okur
+        migrations.RunSQL(
+            'CREATE INDEX "product_tags_tag_product_idx" ON "api_product_tags" ("tag_id", "product_id")',
+            'DROP INDEX "product_tags_tag_product_idx"',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:59
+
+from django.db import migrations, models
+
+from api.migrations._listings import populate_listings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductListing',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('category_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('payload', models.JSONField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category_id', '-created_at', '-id'], name='listing_cat_created_idx'), models.Index(fields=['-created_at', '-id'], name='listing_created_idx')],
+            },
+        ),
+        migrations.RunPython(populate_listings, migrations.RunPython.noop),
+    ]
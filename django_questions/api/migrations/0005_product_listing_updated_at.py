@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+from api.migrations._listings import populate_listings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_product_listing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productlisting',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        # Satırlar 0004 doldurma adımı olmadan uygulanmış veritabanları için
+        # yeniden yazılır; dolu tablolarda yalnızca updated_at yenilenir
+        migrations.RunPython(populate_listings, migrations.RunPython.noop),
+    ]
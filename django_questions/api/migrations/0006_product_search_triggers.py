@@ -0,0 +1,56 @@
+from django.db import migrations
+
+FTS_TABLE = 'api_product_fts'
+
+# FTS5 tablosu ürün tablosuyla aynı ifadede güncellenir; uygulama tarafında
+# ayrı DELETE/INSERT sorgusu gerekmez ve sinyal göndermeyen toplu yazmalar
+# (bulk_create, bulk_update, QuerySet.update) da indekse yansır
+TRIGGERS = {
+    'api_product_fts_insert': (
+        'AFTER INSERT ON api_product BEGIN '
+        f'INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (new.id, new.name, new.description); '
+        'END'
+    ),
+    'api_product_fts_update': (
+        'AFTER UPDATE OF id, name, description ON api_product BEGIN '
+        f'DELETE FROM {FTS_TABLE} WHERE rowid = old.id; '
+        f'INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (new.id, new.name, new.description); '
+        'END'
+    ),
+    'api_product_fts_delete': (
+        'AFTER DELETE ON api_product BEGIN '
+        f'DELETE FROM {FTS_TABLE} WHERE rowid = old.id; '
+        'END'
+    ),
+}
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, body in TRIGGERS.items():
+        schema_editor.execute(f'CREATE TRIGGER {name} {body}')
+    # Sinyalsiz yazmalarla kaymış olabilecek indeks bir kez yeniden kurulur
+    schema_editor.execute(f'DELETE FROM {FTS_TABLE}')
+    schema_editor.execute(
+        f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+        f'SELECT id, name, description FROM api_product'
+    )
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_product_listing_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,80 @@
+"""
+ProductListing doldurma adımı; migration'lar tarafından geçmiş modellerle
+kullanılır. Bu modül migration kodu gibi dondurulmuştur: uygulamadaki model
+ve serileştirici değişiklikleri buraya yansıtılmaz. Yük biçimi değişirse
+satırlar yeni bir migration veya rebuild_product_listings komutuyla yeniden
+yazılır.
+
+Geçmiş modellere sinyal alıcıları bağlı olmadığından doldurma sırasında
+önbellek geçersiz kılınmaz.
+"""
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.utils import timezone
+
+CHUNK_SIZE = 1000
+
+
+def _datetime(value):
+    # DRF DateTimeField çıktısı: etkin saat dilimi, UTC için 'Z' soneki
+    text = timezone.localtime(value).isoformat()
+    if text.endswith('+00:00'):
+        text = text[:-6] + 'Z'
+    return text
+
+
+def _payloads(Product, rows):
+    places = Product._meta.get_field('price').decimal_places
+    quantum = Decimal(1).scaleb(-places)
+    tags = defaultdict(list)
+    tag_rows = (
+        Product.tags.through.objects
+        .filter(product_id__in=[row['id'] for row in rows])
+        .order_by('tag_id')
+        .values_list('product_id', 'tag_id', 'tag__name')
+    )
+    for product_id, tag_id, tag_name in tag_rows:
+        tags[product_id].append({'id': tag_id, 'name': tag_name})
+
+    for row in rows:
+        yield {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'price': '{:f}'.format(row['price'].quantize(quantum, rounding=ROUND_HALF_UP)),
+            'is_active': row['is_active'],
+            'created_at': _datetime(row['created_at']),
+            'updated_at': _datetime(row['updated_at']),
+            'category': {
+                'id': row['category_id'],
+                'name': row['category__name'],
+                'description': row['category__description'],
+            },
+            'tags': tags[row['id']],
+        }
+
+
+def populate_listings(apps, schema_editor):
+    """
+    Tabloyu tüm aktif ürünlerden yeniden oluşturur.
+    """
+    Product = apps.get_model('api', 'Product')
+    ProductListing = apps.get_model('api', 'ProductListing')
+    ProductListing.objects.all().delete()
+
+    products = (
+        Product.objects.filter(is_active=True).order_by('id').values(
+            'id', 'name', 'description', 'price', 'is_active', 'created_at', 'updated_at',
+            'category_id', 'category__name', 'category__description',
+        )
+    )
+    last_id = 0
+    while rows := list(products.filter(id__gt=last_id)[:CHUNK_SIZE]):
+        ProductListing.objects.bulk_create(
+            ProductListing(
+                id=row['id'], category_id=row['category_id'], created_at=row['created_at'], payload=payload,
+            )
+            for row, payload in zip(rows, _payloads(Product, rows))
+        )
+        last_id = rows[-1]['id']
@@ -1,7 +1,9 @@
 from django.db import models
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from django.core.cache import cache
+
+from .caching import adjust_product_counts, mark_product_lists_dirty, mark_product_tag_lists_dirty, reset_product_counts
+from .search import get_search_backend
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -27,26 +29,182 @@ class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     tags = models.ManyToManyField(Tag, related_name='products')
 
+    # Veritabanından okunduğu andaki kategori ve durum (önbellek geçersiz
+    # kılma ve ürün sayaçları için)
+    _loaded_category_id = None
+    _loaded_is_active = None
+
     def __str__(self):
         return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Kategori değişirse eski kategorinin listeleri de geçersiz kılınır
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        instance._loaded_is_active = instance.__dict__.get('is_active')
+        return instance
     
     class Meta:
         app_label = 'api'
+        indexes = [
+            # Kategori filtreli liste: category_id eşitliği ve keyset sıralaması.
+            # is_active sorguda eşitlik olarak değil koşul olarak derlendiği için
+            # indeksin ön eki yerine kısmi indeks koşulu olarak kullanılır
+            models.Index(
+                fields=['category', '-created_at', '-id'],
+                name='product_active_cat_created_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # Filtresiz liste: yalnızca aktif satırları kapsayan kısmi indeks
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='product_active_created_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # Admin listesi tüm ürünleri -created_at ile sıralar
+            models.Index(fields=['-created_at'], name='product_created_idx'),
+        ]
+
+
+class ProductListing(models.Model):
+    """
+    Aktif ürünlerin liste okuma modeli. Her satır, ürünün liste çıktısını
+    (kategori ve etiketler gömülü) hazır halde tutar; liste uç noktaları
+    birleştirme ve etiket ön yüklemesi yapmadan tek indeksli aralık
+    taramasıyla okur. Satırlar api.listings içindeki alıcılar ve toplu
+    işlemler tarafından güncel tutulur.
+    """
+    # Ürün id'si; ürün silinince satır alıcı tarafından silinir
+    id = models.BigIntegerField(primary_key=True)
+    category_id = models.BigIntegerField()
+    created_at = models.DateTimeField()
+    payload = models.JSONField()
+    # Yükün son yazılma zamanı; ürünün yanında gömülü kategori ve etiket
+    # değişikliklerini de izler (detay yanıtının Last-Modified başlığı)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'api'
+        indexes = [
+            models.Index(fields=['category_id', '-created_at', '-id'], name='listing_cat_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='listing_created_idx'),
+        ]
+
+
+def _prefetched_tag_ids(instance):
+    """
+    Önceden yüklenmiş etiketlerin id'lerini döndürür; yüklenmemişse None.
+    """
+    prefetched = getattr(instance, '_prefetched_objects_cache', {}).get('tags')
+    if prefetched is not None:
+        return [tag.pk for tag in prefetched]
+    return None
+
+
+def _product_tag_ids(instance):
+    """
+    Ürünün etiket id'lerini döndürür; önceden yüklenmiş etiketler varsa
+    ek sorgu yapılmaz.
+    """
+    tag_ids = _prefetched_tag_ids(instance)
+    if tag_ids is None:
+        tag_ids = list(instance.tags.values_list('pk', flat=True))
+    return tag_ids
 
 
 # Cache invalidation signals
 @receiver(post_save, sender=Product)
-def invalidate_product_cache(sender, instance, **kwargs):
-    cache.delete('product_list')
-    cache.delete(f'product_list_category_{instance.category_id}')
-    
-    for tag in instance.tags.all():
-        cache.delete(f'product_list_tag_{tag.id}')
+def invalidate_product_cache(sender, instance, created, **kwargs):
+    # Yeni oluşturulan ürünün henüz etiketi yoktur; etiketler m2m_changed ile gelir.
+    # Yüklenmemiş etiketler kayıtta sorgulanmaz, commit sonrasında işlemdeki
+    # tüm ürünler için tek sorguyla okunur
+    tag_ids = [] if created else _prefetched_tag_ids(instance)
+    mark_product_lists_dirty([instance.category_id, instance._loaded_category_id], tag_ids or ())
+    if tag_ids is None:
+        mark_product_tag_lists_dirty([instance.pk])
+    _count_product_change(instance, created, tag_ids)
+    instance._loaded_category_id = instance.category_id
+    instance._loaded_is_active = instance.is_active
+
+
+def _count_product_change(instance, created, tag_ids):
+    # Ürün sayaçları: kategori ve aktiflik değişimi eski kapsamdan düşülür,
+    # yenisine eklenir; etiketler yalnızca aktiflik değişince sayılır (ve
+    # yalnızca o zaman yüklenir)
+    was_active = not created and bool(instance._loaded_is_active)
+    moved = not created and instance._loaded_category_id != instance.category_id
+    if was_active != instance.is_active and tag_ids is None:
+        tag_ids = _product_tag_ids(instance)
+    if was_active and (moved or not instance.is_active):
+        adjust_product_counts([instance._loaded_category_id], [] if instance.is_active else tag_ids, -1)
+    if instance.is_active and (moved or not was_active):
+        adjust_product_counts([instance.category_id], [] if was_active else tag_ids, 1)
+
+@receiver(pre_delete, sender=Product)
+def invalidate_product_cache_on_delete(sender, instance, origin=None, **kwargs):
+    # post_delete anında etiket ilişkisi silinmiş olur, bu yüzden pre_delete kullanılır
+    if isinstance(origin, models.QuerySet):
+        # QuerySet.delete(): kapsamlar ilk nesnede tüm sorgu için bir kez toplanır
+        if not getattr(origin, '_product_lists_marked', False):
+            origin._product_lists_marked = True
+            product_ids = origin.values('pk')
+            category_ids = list(Product.objects.filter(pk__in=product_ids).values_list('category_id', flat=True).distinct())
+            tag_ids = list(Product.tags.through.objects.filter(product_id__in=product_ids).values_list('tag_id', flat=True).distinct())
+            mark_product_lists_dirty(category_ids, tag_ids)
+            reset_product_counts(category_ids, tag_ids)
+        return
+    tag_ids = _product_tag_ids(instance)
+    mark_product_lists_dirty([instance.category_id], tag_ids)
+    if instance.is_active:
+        adjust_product_counts([instance.category_id], tag_ids, -1)
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def invalidate_product_cache_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    delta = 1 if action == 'post_add' else -1
+    if not reverse:
+        tag_ids = pk_set if action != 'pre_clear' else _product_tag_ids(instance)
+        mark_product_lists_dirty([instance.category_id], tag_ids)
+        if instance.is_active:
+            adjust_product_counts(tag_ids=tag_ids, delta=delta)
+        return
+
+    # Etiket tarafından yapılan değişiklikte pk_set ürün id'lerini içerir
+    products = instance.products.all() if action == 'pre_clear' else Product.objects.filter(pk__in=pk_set)
+    category_ids = products.values_list('category_id', flat=True).distinct()
+    mark_product_lists_dirty(list(category_ids), [instance.pk])
+    adjust_product_counts(tag_ids=[instance.pk], delta=delta * products.filter(is_active=True).count())
+
+
+# Search index signals
+@receiver(post_save, sender=Product)
+def update_product_search_index(sender, instance, **kwargs):
+    get_search_backend().index([instance.pk])
+
+def deleting_products(origin):
+    """
+    Silme sinyalinin origin'i ürünlerin QuerySet.delete() çağrısıysa o
+    sorguyu, tek nesne veya başka modelden gelen zincirleme silmelerde None
+    döndürür. Alıcılar toplu bakımı bu sorguyla bir kez yapar.
+    """
+    if isinstance(origin, models.QuerySet) and origin.model is Product:
+        return origin
+    return None
+
+@receiver(pre_delete, sender=Product)
+def remove_deleted_products_from_search_index(sender, instance, origin=None, **kwargs):
+    # QuerySet.delete(): indeks ilk nesnede tüm sorgu için bir kez güncellenir.
+    # id sorgusu yalnızca arka uç onu okursa çalışır; SQLite indeksi
+    # tetikleyicilerle, PostgreSQL indeksi veritabanının kendisi günceller
+    products = deleting_products(origin)
+    if products is not None and not getattr(products, '_search_index_removed', False):
+        products._search_index_removed = True
+        get_search_backend().remove(products.values_list('pk', flat=True))
 
 @receiver(post_delete, sender=Product)
-def invalidate_product_cache_on_delete(sender, instance, **kwargs):
-    cache.delete('product_list')
-    cache.delete(f'product_list_category_{instance.category_id}')
-    
-    for tag in instance.tags.all():
-        cache.delete(f'product_list_tag_{tag.id}')
\ No newline at end of file
+def remove_product_from_search_index(sender, instance, origin=None, **kwargs):
+    if deleting_products(origin) is None:
+        get_search_backend().remove([instance.pk])
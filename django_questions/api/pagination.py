@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.utils.urls import remove_query_param
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Ürün listesi için (created_at, id) ikilisi üzerinde keyset sayfalama.
+
+    DRF'in CursorPagination sınıfı yalnızca ilk sıralama alanını ve bir offset
+    değerini kullanır. Burada cursor, sayfanın sınır satırının tam konumunu
+    taşır; böylece her sayfa tek bir indeksli aralık sorgusuyla gelir ve
+    derin sayfalar OFFSET gibi yavaşlamaz.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset'in eşzamansız karşılığı; sayfa aiterator ile okunur.
+        """
+        return self.set_page([row async for row in self.page_queryset(queryset, request).aiterator()])
+
+    def page_queryset(self, queryset, request):
+        """
+        İstekteki cursor'a göre sayfanın (bir fazla satırla) sorgusunu döndürür.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor.reverse
+
+        if self.cursor is not None:
+            created_at, pk = self._parse_position(self.cursor.position)
+            # İleri yönde sınırdan daha eski, geri yönde daha yeni satırlar
+            lookup = 'gt' if self.reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'created_at__{lookup}': created_at}) |
+                Q(created_at=created_at, **{f'id__{lookup}': pk})
+            )
+
+        ordering = ('created_at', 'id') if self.reverse else self.ordering
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def set_page(self, results):
+        """
+        page_queryset sonucundan sayfayı ve önceki/sonraki bağlantı
+        durumunu belirler.
+        """
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Geri yönde boş sayfa: başa dönülür
+            return self.encode_cursor(Cursor(offset=0, reverse=False, position=None))
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def encode_cursor(self, cursor):
+        if cursor.position is None and not cursor.reverse:
+            # İlk sayfa için cursor parametresi gerekmez
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return super().encode_cursor(cursor)
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            return f"{instance['created_at'].isoformat()}|{instance['id']}"
+        return f'{instance.created_at.isoformat()}|{instance.pk}'
+
+    def _parse_position(self, position):
+        try:
+            created_at, pk = position.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), int(pk)
+        except (AttributeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
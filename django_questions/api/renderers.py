@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+CSV_COLUMNS = (
+    'id', 'name', 'description', 'price', 'is_active', 'created_at', 'updated_at',
+    'category_id', 'category_name', 'tag_ids', 'tag_names',
+)
+
+
+def iter_ndjson(products):
+    """
+    Her ürünü ayrı bir JSON satırı olarak üretir.
+    """
+    for product in products:
+        yield json.dumps(product, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def iter_csv(products):
+    """
+    Ürünleri başlık satırıyla birlikte CSV satırları olarak üretir.
+    Etiketler tek hücrede '|' ile ayrılır.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+    for product in products:
+        writer.writerow((
+            product['id'], product['name'], product['description'], product['price'],
+            product['is_active'], product['created_at'], product['updated_at'],
+            product['category']['id'], product['category']['name'],
+            '|'.join(str(tag['id']) for tag in product['tags']),
+            '|'.join(tag['name'] for tag in product['tags']),
+        ))
+        yield flush()
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Satır başına bir JSON nesnesi (application/x-ndjson). Dışa aktarım
+    akış olarak üretilir; bu renderer yalnızca içerik pazarlığı ve hata
+    yanıtları için kullanılır.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(iter_ndjson(rows)).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Ürün dışa aktarımı için CSV. Hata yanıtları anahtar/değer satırları
+    olarak yazılır.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, list):
+            return ''.join(iter_csv(data)).encode(self.charset)
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(data.items())
+        return buffer.getvalue().encode(self.charset)
@@ -0,0 +1,125 @@
+"""
+Ürün adı ve açıklaması üzerinde tam metin arama.
+
+Arka uç settings.PRODUCT_SEARCH_BACKEND ile seçilir; ayarlanmamışsa veritabanı
+türüne göre SQLite FTS5, PostgreSQL tsvector veya icontains kullanılır.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+PRODUCT_TABLE = 'api_product'
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query):
+    """
+    Kullanıcı girdisini arama terimlerine ayırır; operatör ve tırnak gibi
+    özel karakterler atılır.
+    """
+    return _TERM_RE.findall(query or '')
+
+
+class BaseSearchBackend:
+    """
+    Arama arka uçlarının ortak arayüzü. İndeksi kendisi tutan arka uçlar
+    index/remove/rebuild metotlarını uygular.
+    """
+
+    def filter(self, queryset, query):
+        raise NotImplementedError
+
+    def index(self, product_ids):
+        """Verilen ürünlerin indeks kayıtlarını yeniler."""
+
+    def remove(self, product_ids):
+        """Verilen ürünleri indeksten siler."""
+
+    def rebuild(self):
+        """İndeksi tüm ürünlerden yeniden oluşturur."""
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    """
+    İndekssiz yedek arka uç: her terim ad veya açıklamada geçmelidir.
+    """
+
+    def filter(self, queryset, query):
+        for term in search_terms(query):
+            queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+        return queryset
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 sanal tablosu üzerinde ters indeks. Tablo, ürün tablosundaki
+    tetikleyicilerle (0006 migration'ı) aynı ifade içinde güncellenir; bu
+    yüzden index/remove ek sorgu çalıştırmaz.
+    """
+    table = 'api_product_fts'
+
+    def match_expression(self, query):
+        # Her terim önek araması olarak eklenir ve terimler VE ile bağlanır
+        return ' '.join(f'"{term}"*' for term in search_terms(query))
+
+    def filter(self, queryset, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [expression],
+        ))
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, name, description) '
+                f'SELECT id, name, description FROM {PRODUCT_TABLE}'
+            )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL tsvector araması. Sorgu, migration ile oluşturulan GIN ifade
+    indeksiyle aynı ifadeyi kullanır; indeksi veritabanı güncel tuttuğu için
+    ek bakım gerekmez.
+    """
+    config = 'simple'
+
+    def filter(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT id FROM {PRODUCT_TABLE} WHERE to_tsvector('{self.config}', "
+            f"coalesce(name, '') || ' ' || coalesce(description, '')) "
+            f"@@ to_tsquery('{self.config}', %s)",
+            [tsquery],
+        ))
+
+
+DEFAULT_BACKENDS = {
+    'sqlite': 'api.search.SQLiteFTSBackend',
+    'postgresql': 'api.search.PostgresSearchBackend',
+}
+
+_backends = {}
+
+
+def get_search_backend():
+    """
+    Yapılandırılmış arama arka ucunu döndürür.
+    """
+    path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None) or DEFAULT_BACKENDS.get(
+        connection.vendor, 'api.search.IContainsSearchBackend'
+    )
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
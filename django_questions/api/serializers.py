@@ -1,6 +1,71 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+from .caching import apply_deferred_refreshes
+from .instrumentation import timer
 from .models import Product, Category,Tag
 
+
+class TimedSerializerMixin:
+    """
+    .data erişimini istek ölçümlerinde serileştirme süresi olarak kaydeder.
+    """
+
+    @property
+    def data(self):
+        with timer('serialize'):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """
+    Birincil anahtar listesini tek in_bulk sorgusuyla çözer; varsayılan
+    ManyRelatedField her öğe için ayrı sorgu yapar. Hata mesajları
+    PrimaryKeyRelatedField ile aynıdır.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pks = []
+        for item in data:
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pks.append(queryset.model._meta.pk.to_python(item))
+            except (TypeError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+        objects = queryset.in_bulk(pks)
+        for item, pk in zip(data, pks):
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=item)
+        return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -11,7 +76,23 @@ class TagSerializer(serializers.ModelSerializer):
         model = Tag
         fields = ['id', 'name']
 
-class ProductSerializer(serializers.ModelSerializer):
+class CategoryCountSerializer(CategorySerializer):
+    product_count = serializers.IntegerField(read_only=True)
+
+    class Meta(CategorySerializer.Meta):
+        fields = CategorySerializer.Meta.fields + ['product_count']
+
+class TagCountSerializer(TagSerializer):
+    product_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['product_count']
+
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    fields verilirse yalnızca o çıktı alanları döner (bkz. parse_product_fields);
+    yazma alanları (category_id, tag_ids) seçimden etkilenmez.
+    """
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
@@ -19,7 +100,7 @@ class ProductSerializer(serializers.ModelSerializer):
         source='category',
         write_only=True
     )
-    tag_ids = serializers.PrimaryKeyRelatedField(
+    tag_ids = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         source='tags',
         write_only=True,
@@ -34,16 +115,30 @@ class ProductSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'category', 'category_id', 
             'tags', 'tag_ids'
         ]
+        list_serializer_class = TimedListSerializer
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(PRODUCT_OUTPUT_FIELDS) - set(fields):
+                self.fields.pop(name)
     
+    @transaction.atomic
     def create(self, validated_data):
+        # Kayıt ve etiket değişiklikleri tek işlemde yapılır; önbellek
+        # geçersiz kılma commit sonrasında bir kez çalışır
         tags = validated_data.pop('tags', [])
         product = Product.objects.create(**validated_data)
         
+        # Yeni üründe mevcut ilişki yoktur; set() yerine add() okuma sorgusunu atlar
         if tags:
-            product.tags.set(tags)
-            
+            product.tags.add(*tags)
+
+        # Okuma modeli satırı aynı işlemde bir kez yazılır
+        apply_deferred_refreshes()
         return product
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags', None)
         
@@ -54,5 +149,128 @@ class ProductSerializer(serializers.ModelSerializer):
         
         if tags is not None:
             instance.tags.set(tags)
-            
-        return instance
\ No newline at end of file
+
+        apply_deferred_refreshes()
+        return instance
+
+
+
+class ProductBulkItemSerializer(serializers.ModelSerializer):
+    """
+    Toplu işlemlerde tek bir öğeyi doğrular. İlişkiler burada sorgulanmaz;
+    tüm category_id/tag_ids değerleri toplu olarak tek sorguda çözülür.
+    """
+    # Yalnızca toplu güncellemede kullanılır; oluşturmada reddedilir
+    id = serializers.IntegerField(required=False)
+    category_id = serializers.IntegerField()
+    tag_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'description', 'price', 'is_active', 'category_id', 'tag_ids']
+
+# ProductSerializer'ın okunabilir çıktı alanları (çıktıdaki sırayla) ve
+# ?expand= ile istenebilen ilişkiler
+PRODUCT_OUTPUT_FIELDS = (
+    'id', 'name', 'description', 'price', 'is_active', 'created_at', 'updated_at', 'category', 'tags',
+)
+PRODUCT_RELATIONS = ('category', 'tags')
+
+
+def _split_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()} if value else set()
+
+
+def parse_product_fields(params):
+    """
+    ?fields= ve ?expand= sorgu parametrelerinden istenen çıktı alanlarını
+    döndürür. fields verilmezse tüm alanlar seçilidir (None). expand ile
+    adlandırılan ilişkiler seçime eklenir; id her zaman döner. Bilinmeyen
+    adlarda ValidationError yükseltir.
+    """
+    fields = _split_names(params.get('fields'))
+    expand = _split_names(params.get('expand'))
+    errors = {}
+    if unknown := fields - set(PRODUCT_OUTPUT_FIELDS):
+        errors['fields'] = [f'Bilinmeyen alan: {name}' for name in sorted(unknown)]
+    if unknown := expand - set(PRODUCT_RELATIONS):
+        errors['expand'] = [f'Genişletilemeyen alan: {name}' for name in sorted(unknown)]
+    if errors:
+        raise serializers.ValidationError(errors)
+    if not fields:
+        return None
+    return frozenset(fields | expand | {'id'})
+
+
+def product_only_fields(fields):
+    """
+    Seçili alanlar için model sorgusunun .only() argümanlarını döndürür.
+    """
+    only = [name for name in fields if name not in PRODUCT_RELATIONS]
+    if 'category' in fields:
+        only += ['category', 'category__name', 'category__description']
+    return only
+
+
+# Liste çıktısı için okunan sütunlar (serialize_product_rows ile birlikte kullanılır)
+PRODUCT_LIST_VALUES = (
+    'id', 'name', 'description', 'price', 'is_active', 'created_at', 'updated_at',
+    'category_id', 'category__name', 'category__description',
+)
+
+# Biçimlendirme, ProductSerializer ile birebir aynı çıktıyı vermesi için
+# DRF alanlarının kendisine bırakılır; alanlar bir kez oluşturulur
+_price_model_field = Product._meta.get_field('price')
+_price_field = serializers.DecimalField(
+    max_digits=_price_model_field.max_digits, decimal_places=_price_model_field.decimal_places,
+)
+
+
+def product_tags_by_id(product_ids):
+    """
+    Ürün id'lerine göre etiket listelerini tek sorguda döndürür.
+    """
+    tags = defaultdict(list)
+    rows = (
+        Product.tags.through.objects
+        .filter(product_id__in=product_ids)
+        .order_by('tag_id')
+        .values_list('product_id', 'tag_id', 'tag__name')
+    )
+    for product_id, tag_id, tag_name in rows:
+        tags[product_id].append({'id': tag_id, 'name': tag_name})
+    return tags
+
+
+def serialize_product_rows(rows, tags=None):
+    """
+    ProductSerializer'ın liste çıktısını model örneği ve alan nesneleri
+    oluşturmadan, PRODUCT_LIST_VALUES ile okunan values() satırlarından üretir.
+    Etiketler verilmezse tek sorguyla yüklenir.
+    """
+    rows = list(rows)
+    if tags is None:
+        tags = product_tags_by_id([row['id'] for row in rows])
+    price = _price_field.to_representation
+    # Geçerli saat dilimi her değer için yeniden aranmasın diye bir kez çözülür
+    datetime = serializers.DateTimeField(
+        default_timezone=timezone.get_current_timezone() if settings.USE_TZ else None,
+    ).to_representation
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'price': price(row['price']),
+            'is_active': row['is_active'],
+            'created_at': datetime(row['created_at']),
+            'updated_at': datetime(row['updated_at']),
+            'category': {
+                'id': row['category_id'],
+                'name': row['category__name'],
+                'description': row['category__description'],
+            },
+            'tags': tags.get(row['id'], []),
+        }
+        for row in rows
+    ]
@@ -1,3 +1,1549 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Count, Prefetch, Q
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .backends.sqlite3.base import write_lock
+from .cache_backends import TieredCache
+from .db_routers import PRIMARY_PIN_COOKIE, PrimaryReplicaRouter, reading_from_replica, replica_reads
+from .caching import generation_key, get_or_build, invalidate_product_lists, product_list_cache_keys
+from .instrumentation import key_family, registry
+from .listings import listing_rows_data, rebuild_listings, refresh_listings
+from .migrations._listings import populate_listings
+from .models import Category, Product, ProductListing, Tag
+from .search import get_search_backend
+from .serializers import (
+    PRODUCT_LIST_VALUES, ProductSerializer, parse_product_fields, serialize_product_rows,
+)
+from .views import ProductViewSet
+from .warming import hot_list_urls, schedule_warm, tracker, warm_url, warmer
+
+
+class ProductTestMixin:
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Kitap')
+        self.other_category = Category.objects.create(name='Müzik')
+        self.tag = Tag.objects.create(name='yeni')
+
+    def create_products(self, count, category=None, tags=(), start=None):
+        start = start or timezone.now() - timedelta(days=1)
+        products = []
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                products.append(self.create_product(i, category, tags, start))
+        return products
+
+    def create_product(self, i, category, tags, start):
+        product = Product.objects.create(
+            name=f'Ürün {i}', description='Açıklama', price='10.00',
+            category=category or self.category,
+        )
+        if tags:
+            product.tags.set(tags)
+        # Sıralamayı belirli kılmak için oluşturulma zamanını sabitle
+        Product.objects.filter(pk=product.pk).update(created_at=start + timedelta(seconds=i))
+        refresh_listings([product.pk])
+        return product
+
+
+class ProductCursorPaginationTests(ProductTestMixin, TestCase):
+    def test_pages_walk_the_catalog_newest_first(self):
+        products = self.create_products(7)
+
+        seen = []
+        url = '/api/products/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [item['id'] for item in response.json()['results']]
+            url = response.json()['next']
+
+        self.assertEqual(seen, [p.id for p in reversed(products)])
+
+    def test_previous_link_returns_the_earlier_page(self):
+        self.create_products(5)
+        first = self.client.get('/api/products/?page_size=2')
+        second = self.client.get(first.json()['next'])
+        previous = self.client.get(second.json()['previous'])
+
+        self.assertEqual(
+            [item['id'] for item in previous.json()['results']],
+            [item['id'] for item in first.json()['results']],
+        )
+
+    def test_ties_on_created_at_are_broken_by_id(self):
+        products = self.create_products(4)
+        Product.objects.update(created_at=timezone.now())
+        rebuild_listings()
+
+        first = self.client.get('/api/products/?page_size=2')
+        second = self.client.get(first.json()['next'])
+        ids = [item['id'] for item in first.json()['results'] + second.json()['results']]
+
+        self.assertEqual(ids, sorted((p.id for p in products), reverse=True))
+        self.assertIsNone(second.json()['next'])
+
+    def test_filters_are_applied_and_cached_per_page(self):
+        self.create_products(3, tags=[self.tag])
+        self.create_products(2, category=self.other_category)
+
+        response = self.client.get(f'/api/products/?tag={self.tag.id}&page_size=2')
+        self.assertEqual(len(response.json()['results']), 2)
+        with self.assertNumQueries(0):
+            cached = self.client.get(f'/api/products/?tag={self.tag.id}&page_size=2')
+        self.assertEqual(cached.json(), response.json())
+
+        response = self.client.get(f'/api/products/?category={self.other_category.id}')
+        self.assertEqual(len(response.json()['results']), 2)
+
+    @override_settings(ALLOWED_HOSTS=['magaza.example', 'ic.example'])
+    def test_cached_pages_keep_the_host_of_their_links(self):
+        self.create_products(3)
+        for host in ('magaza.example', 'ic.example', 'magaza.example'):
+            response = self.client.get('/api/products/?page_size=2', HTTP_HOST=host)
+            self.assertTrue(response.json()['next'].startswith(f'http://{host}/api/products/?'))
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get('/api/products/?cursor=bm90LWEtY3Vyc29y')
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductListCacheInvalidationTests(ProductTestMixin, TestCase):
+    def test_update_invalidates_every_cached_page_of_the_scope(self):
+        older, newer = self.create_products(2)
+        first = self.client.get('/api/products/?page_size=1')
+        self.client.get(first.json()['next'])
+
+        product = Product.objects.get(pk=older.pk)
+        product.name = 'Güncel'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+
+        response = self.client.get(first.json()['next'])
+        self.assertEqual(response.json()['results'][0]['name'], 'Güncel')
+
+    def test_write_keeps_other_category_lists_cached(self):
+        product, = self.create_products(1)
+        self.create_products(1, category=self.other_category)
+        self.client.get(f'/api/products/?category={self.other_category.id}')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+
+        with self.assertNumQueries(0):
+            self.client.get(f'/api/products/?category={self.other_category.id}')
+
+    def test_category_change_invalidates_the_previous_category(self):
+        product, = self.create_products(1)
+        self.client.get(f'/api/products/?category={self.category.id}')
+
+        product = Product.objects.get(pk=product.pk)
+        product.category = self.other_category
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+
+        response = self.client.get(f'/api/products/?category={self.category.id}')
+        self.assertEqual(response.json()['results'], [])
+
+    def test_saves_look_up_tags_once_per_commit(self):
+        def save_all(count):
+            self.create_products(count, tags=[self.tag])
+            self.client.get(f'/api/products/?tag={self.tag.id}')
+            with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for product in Product.objects.filter(name__startswith='Ürün'):
+                        product.price = '11.00'
+                        product.save()
+            Product.objects.all().delete()
+            return len(queries)
+
+        # Her kayıt yalnızca UPDATE çalıştırır; etiketler commit sonrasında okunur
+        self.assertEqual(save_all(3) - save_all(1), 2)
+        self.create_products(1, tags=[self.tag])
+        self.client.get(f'/api/products/?tag={self.tag.id}')
+        product = Product.objects.get()
+        product.name = 'Güncel'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        response = self.client.get(f'/api/products/?tag={self.tag.id}')
+        self.assertEqual(response.json()['results'][0]['name'], 'Güncel')
+
+    def test_tag_changes_invalidate_the_tag_lists(self):
+        product, = self.create_products(1)
+        self.client.get(f'/api/products/?tag={self.tag.id}')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.tags.add(self.tag)
+        response = self.client.get(f'/api/products/?tag={self.tag.id}')
+        self.assertEqual([item['id'] for item in response.json()['results']], [product.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.products.clear()
+        response = self.client.get(f'/api/products/?tag={self.tag.id}')
+        self.assertEqual(response.json()['results'], [])
+
+    def test_delete_invalidates_the_tag_lists(self):
+        product, = self.create_products(1, tags=[self.tag])
+        self.client.get(f'/api/products/?tag={self.tag.id}')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+
+        response = self.client.get(f'/api/products/?tag={self.tag.id}')
+        self.assertEqual(response.json()['results'], [])
+
+    def test_category_and_tag_renames_invalidate_cached_lists(self):
+        self.create_products(1, tags=[self.tag])
+        urls = ['/api/products/', f'/api/products/?category={self.category.id}', f'/api/products/?tag={self.tag.id}']
+        for url in urls:
+            self.client.get(url)
+
+        self.category.name = 'Roman'
+        self.tag.name = 'indirim'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+            self.tag.save()
+
+        for url in urls:
+            item, = self.client.get(url).json()['results']
+            self.assertEqual((item['category']['name'], item['tags'][0]['name']), ('Roman', 'indirim'))
+
+    def test_tag_delete_invalidates_cached_lists(self):
+        self.create_products(1, tags=[self.tag])
+        self.client.get(f'/api/products/?category={self.category.id}')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+
+        item, = self.client.get(f'/api/products/?category={self.category.id}').json()['results']
+        self.assertEqual(item['tags'], [])
+
+    def test_api_write_flushes_once_after_commit(self):
+        user = User.objects.create_user('ayse', password='parola')
+        self.client.force_authenticate(user)
+        other_tag = Tag.objects.create(name='indirim')
+
+        with mock.patch('api.caching.invalidate_product_lists') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/products/', {
+                    'name': 'Defter', 'description': 'Çizgili', 'price': '5.00',
+                    'category_id': self.category.id, 'tag_ids': [self.tag.id, other_tag.id],
+                }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        invalidate.assert_called_once_with({self.category.id}, {self.tag.id, other_tag.id})
+
+
+class ProductListResponseCacheTests(ProductTestMixin, TestCase):
+    def test_matching_etag_returns_304_without_body(self):
+        self.create_products(2)
+        response = self.client.get('/api/products/')
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(not_modified['ETag'], etag)
+
+    def test_etag_changes_after_a_write(self):
+        product, = self.create_products(1)
+        etag = self.client.get('/api/products/')['ETag']
+
+        product = Product.objects.get(pk=product.pk)
+        product.name = 'Güncel'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_gzip_copy_is_served_when_accepted(self):
+        self.create_products(20)
+        plain = self.client.get('/api/products/')
+        compressed = self.client.get('/api/products/', HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+    def test_browsable_api_still_renders_from_the_cache(self):
+        self.create_products(1)
+        self.client.get('/api/products/')
+
+        response = self.client.get('/api/products/?format=api')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'\xc3\x9cr\xc3\xbcn 0', response.content)
+
+
+class AutocommitInvalidationTests(TransactionTestCase):
+    """
+    Atomic blok dışındaki yazmalarda on_commit geri çağrıları hemen çalışır.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_writes_outside_atomic_invalidate_immediately(self):
+        category = Category.objects.create(name='Kitap')
+        tag = Tag.objects.create(name='yeni')
+        product = Product.objects.create(name='Defter', description='Çizgili', price='5.00', category=category)
+        product.tags.add(tag)
+
+        gen = cache.get(generation_key('product', product.pk))
+        category.name = 'Roman'
+        category.save()
+        tag.name = 'indirim'
+        tag.save()
+        product.name = 'Ajanda'
+        product.save()
+
+        self.assertNotEqual(cache.get(generation_key('product', product.pk)), gen)
+        self.assertIsNotNone(cache.get(generation_key('category', category.pk)))
+        payload = ProductListing.objects.get(pk=product.pk).payload
+        self.assertEqual(
+            (payload['name'], payload['category']['name'], payload['tags'][0]['name']),
+            ('Ajanda', 'Roman', 'indirim'),
+        )
+
+
+class ProductDetailCacheTests(ProductTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create_user('ayse', password='parola'))
+        self.product, = self.create_products(1, tags=[self.tag])
+        self.url = f'/api/products/{self.product.id}/'
+
+    def save(self, obj, **changes):
+        for name, value in changes.items():
+            setattr(obj, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.save()
+
+    def test_detail_is_served_from_the_cache(self):
+        response = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(
+            response.json(),
+            json.loads(JSONRenderer().render(ProductSerializer(Product.objects.get(pk=self.product.pk)).data)),
+        )
+
+    def test_conditional_requests_return_304_without_queries(self):
+        response = self.client.get(self.url)
+        listing = ProductListing.objects.get(pk=self.product.pk)
+        self.assertEqual(response['Last-Modified'], http_date(listing.updated_at.timestamp()))
+
+        with self.assertNumQueries(0):
+            by_etag = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+            by_date = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual((by_etag.status_code, by_etag.content), (304, b''))
+        self.assertEqual((by_date.status_code, by_date.content), (304, b''))
+
+        earlier = http_date(listing.updated_at.timestamp() - 60)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=earlier).status_code, 200)
+        # If-None-Match varsa tarih yok sayılır
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH='W/"eski"', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_write_invalidates_every_cached_variant(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.get(f'{self.url}?fields=name')
+
+        self.save(Product.objects.get(pk=self.product.pk), name='Güncel')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Güncel')
+        self.assertEqual(self.client.get(f'{self.url}?fields=name').json(), {'id': self.product.id, 'name': 'Güncel'})
+
+    def test_embedded_category_and_tag_changes_invalidate_the_detail(self):
+        self.client.get(self.url)
+        self.save(self.category, name='Roman')
+        self.save(self.tag, name='indirim')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['category']['name'], 'Roman')
+        self.assertEqual(response.json()['tags'][0]['name'], 'indirim')
+
+    def test_other_products_stay_cached(self):
+        other, = self.create_products(1)
+        self.client.get(self.url)
+        self.save(Product.objects.get(pk=other.pk), name='Güncel')
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_deactivated_and_deleted_products_are_not_found(self):
+        self.client.get(self.url)
+        self.save(Product.objects.get(pk=self.product.pk), is_active=False)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        product, = self.create_products(1)
+        self.client.get(f'/api/products/{product.id}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(self.client.get(f'/api/products/{product.id}/').status_code, 404)
+
+    def test_equivalent_ids_share_one_entry_and_invalid_ids_are_not_found(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/products/00{self.product.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/products/abc/').status_code, 404)
+
+
+class GetOrBuildTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.build = mock.Mock(return_value='yeni')
+
+    def test_value_is_built_once_and_then_served_from_cache(self):
+        self.assertEqual(get_or_build('anahtar', self.build, 60), 'yeni')
+        self.assertEqual(get_or_build('anahtar', self.build, 60), 'yeni')
+        self.build.assert_called_once()
+        self.assertIsNone(cache.get('anahtar:lock'))
+
+    def test_stale_copy_is_served_while_another_worker_rebuilds(self):
+        cache.set('eski', ('eski değer', 0, 0))
+        cache.add('anahtar:lock', 1)
+
+        self.assertEqual(get_or_build('anahtar', self.build, 60, stale_key='eski'), 'eski değer')
+        self.build.assert_not_called()
+
+    @override_settings(PRODUCT_CACHE={'LOCK_WAIT': 0.01, 'LOCK_POLL_INTERVAL': 0.005})
+    def test_waiter_builds_itself_when_the_lock_owner_never_finishes(self):
+        cache.add('anahtar:lock', 1)
+
+        self.assertEqual(get_or_build('anahtar', self.build, 60), 'yeni')
+        self.build.assert_called_once()
+
+    def test_entry_close_to_expiry_is_refreshed_early(self):
+        cache.set('anahtar', ('eski değer', time.time() + 1, 5.0))
+
+        with mock.patch('api.caching.random.random', return_value=0.99):
+            self.assertEqual(get_or_build('anahtar', self.build, 60), 'yeni')
+
+    @override_settings(PRODUCT_CACHE={'EARLY_REFRESH_BETA': 0})
+    def test_early_refresh_can_be_disabled(self):
+        cache.set('anahtar', ('eski değer', time.time() + 1, 5.0))
+
+        with mock.patch('api.caching.random.random', return_value=0.99):
+            self.assertEqual(get_or_build('anahtar', self.build, 60), 'eski değer')
+
+
+class SerializeProductRowsTests(ProductTestMixin, TestCase):
+    def test_output_matches_product_serializer(self):
+        second_tag = Tag.objects.create(name='indirim')
+        self.create_products(2, tags=[second_tag, self.tag])
+        self.create_products(1, category=self.other_category)
+        self.other_category.description = 'Plaklar'
+        self.other_category.save()
+        Product.objects.filter(pk=Product.objects.first().pk).update(price='1234.5')
+
+        products = Product.objects.order_by('id')
+        expected = ProductSerializer(
+            products.prefetch_related(Prefetch('tags', queryset=Tag.objects.order_by('id'))), many=True,
+        ).data
+        with self.assertNumQueries(2):
+            actual = serialize_product_rows(products.values(*PRODUCT_LIST_VALUES))
+
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+
+class ProductBulkEndpointTests(ProductTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user('admin', password='parola', is_staff=True)
+        self.client.force_authenticate(self.staff)
+        self.other_tag = Tag.objects.create(name='indirim')
+
+    def item(self, name, **extra):
+        return {'name': name, 'description': 'Toplu', 'price': '12.50', 'category_id': self.category.id, **extra}
+
+    def test_bulk_create_reports_item_errors_without_aborting(self):
+        items = [
+            self.item('A', tag_ids=[self.tag.id, self.other_tag.id]),
+            self.item('B', category_id=9999),
+            self.item('C'),
+            {'name': 'D'},
+        ]
+        with self.assertNumQueries(11), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/products/bulk/', items, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([p['name'] for p in response.data['created']], ['A', 'C'])
+        self.assertEqual([e['index'] for e in response.data['errors']], [1, 3])
+        self.assertEqual(
+            sorted(t['id'] for t in response.data['created'][0]['tags']),
+            [self.tag.id, self.other_tag.id],
+        )
+
+    def test_bulk_create_rejects_client_supplied_ids(self):
+        product, = self.create_products(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/products/bulk/', [
+                self.item('A', id=product.id),
+                self.item('B', id=9999),
+                self.item('C'),
+            ], format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([e['index'] for e in response.data['errors']], [0, 1])
+        self.assertEqual(response.data['errors'][0]['errors'], {'id': ['Oluşturulan öğelerde id gönderilemez.']})
+        created, = response.data['created']
+        self.assertEqual(created['name'], 'C')
+        self.assertNotIn(created['id'], (product.id, 9999))
+        self.assertFalse(Product.objects.filter(pk=9999).exists())
+        product.refresh_from_db()
+        self.assertEqual(product.name, 'Ürün 0')
+
+    def test_bulk_create_invalidates_cached_lists_once(self):
+        self.client.get(f'/api/products/?tag={self.tag.id}')
+
+        with mock.patch('api.caching.invalidate_product_lists', wraps=invalidate_product_lists) as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post('/api/products/bulk/', [
+                    self.item(str(i), tag_ids=[self.tag.id]) for i in range(5)
+                ], format='json')
+
+        invalidate.assert_called_once()
+        response = self.client.get(f'/api/products/?tag={self.tag.id}')
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_bulk_update_changes_fields_and_tags(self):
+        first, second = self.create_products(2, tags=[self.tag])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/products/bulk/', [
+                {'id': first.id, 'price': '99.00', 'tag_ids': [self.other_tag.id]},
+                {'id': second.id, 'category_id': self.other_category.id},
+                {'id': 9999, 'name': 'Yok'},
+                {'name': 'id yok'},
+            ], format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([e['index'] for e in response.data['errors']], [2, 3])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(str(first.price), '99.00')
+        self.assertEqual(list(first.tags.values_list('id', flat=True)), [self.other_tag.id])
+        self.assertEqual(second.category, self.other_category)
+        self.assertEqual(list(second.tags.all()), [self.tag])
+
+    def test_bulk_update_rejects_repeated_ids_and_locks_inside_the_transaction(self):
+        product, = self.create_products(1)
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/products/bulk/', [
+                {'id': product.id, 'price': '20.00'},
+                {'id': product.id, 'price': '30.00'},
+            ], format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['errors'], [
+            {'index': 1, 'errors': {'id': ['Bu id listede birden fazla kez gönderildi.']}},
+        ])
+        product.refresh_from_db()
+        self.assertEqual(str(product.price), '20.00')
+        # Ürünler işlemin (test içinde savepoint) açılmasından sonra okunur
+        sql = [query['sql'] for query in queries]
+        savepoint = next(i for i, text in enumerate(sql) if text.startswith('SAVEPOINT'))
+        fetch = next(i for i, text in enumerate(sql) if text.startswith('SELECT "api_product"."id"'))
+        self.assertLess(savepoint, fetch)
+
+    def test_bulk_delete_maintains_read_model_once_per_request(self):
+        def delete(count):
+            products = self.create_products(count, tags=[self.tag])
+            with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+                self.client.delete('/api/products/bulk/', [product.id for product in products], format='json')
+            self.assertFalse(ProductListing.objects.filter(pk__in=[product.id for product in products]).exists())
+            return [query['sql'] for query in queries]
+
+        few, many = delete(2), delete(5)
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(sum('DELETE FROM "api_productlisting"' in text for text in many), 1)
+
+    def test_bulk_delete_removes_products_and_invalidates_tag_lists(self):
+        products = self.create_products(3, tags=[self.tag])
+        self.client.get(f'/api/products/?tag={self.tag.id}')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                '/api/products/bulk/', [products[0].id, products[1].id, 9999], format='json',
+            )
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['deleted'], [products[0].id, products[1].id])
+        response = self.client.get(f'/api/products/?tag={self.tag.id}')
+        self.assertEqual([p['id'] for p in response.json()['results']], [products[2].id])
+
+    def test_bulk_delete_rejects_oversized_and_non_integer_ids(self):
+        product, = self.create_products(1)
+        with mock.patch.object(ProductViewSet, 'bulk_max_items', 2):
+            response = self.client.delete('/api/products/bulk/', [product.id, 9998, 9999], format='json')
+        self.assertEqual(response.status_code, 400)
+
+        for ids in ([True], [product.id, False], [str(product.id)]):
+            response = self.client.delete('/api/products/bulk/', ids, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertTrue(Product.objects.filter(pk=product.id).exists())
+
+    def test_bulk_writes_other_than_create_require_staff(self):
+        self.client.force_authenticate(User.objects.create_user('ayse', password='parola'))
+        response = self.client.delete('/api/products/bulk/', [1], format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class ProductExportTests(ProductTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create_user('ayse', password='parola'))
+
+    def test_ndjson_export_streams_every_active_product_in_chunks(self):
+        products = self.create_products(5, tags=[self.tag])
+        Product.objects.filter(pk=products[0].pk).update(is_active=False)
+
+        with mock.patch.object(ProductViewSet, 'export_chunk_size', 2):
+            response = self.client.get('/api/products/export/')
+            with self.assertNumQueries(3):
+                lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['id'] for row in rows], [p.id for p in products[1:]])
+        self.assertEqual(rows[0]['tags'], [{'id': self.tag.id, 'name': 'yeni'}])
+
+    def test_csv_export_applies_filters(self):
+        self.create_products(2, tags=[self.tag])
+        self.create_products(1, category=self.other_category)
+
+        response = self.client.get(f'/api/products/export/?format=csv&category={self.other_category.id}')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(rows[0][:2], ['id', 'name'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][8], 'Müzik')
+
+    def test_export_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/products/export/').status_code, 403)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN çıktısı SQLite içindir')
+class ProductIndexUsageTests(ProductTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_products(6, tags=[self.tag])
+        for i in range(9):
+            self.create_products(6, category=self.other_category, tags=[Tag.objects.create(name=f'etiket {i}')])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.active = Product.objects.filter(is_active=True).order_by('-created_at', '-id')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f'INDEX {index_name}', plan)
+        return plan
+
+    def test_unfiltered_list_page_uses_partial_active_index(self):
+        cursor = self.active[5]
+        page = self.active.filter(
+            Q(created_at__lt=cursor.created_at) | Q(created_at=cursor.created_at, id__lt=cursor.id)
+        )
+        plan = self.assertUsesIndex(page[:51], 'product_active_created_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_category_filter_uses_composite_index_without_sorting(self):
+        queryset = self.active.filter(category_id=self.other_category.id)[:51]
+        plan = self.assertUsesIndex(queryset, 'product_active_cat_created_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_tag_filter_uses_through_table_index(self):
+        self.assertUsesIndex(self.active.filter(tags__id=self.tag.id)[:51], 'product_tags_tag_product_idx')
+
+    def test_admin_ordering_uses_created_at_index(self):
+        self.assertUsesIndex(Product.objects.order_by('-created_at')[:100], 'product_created_idx')
+
+    def listing_page(self, params):
+        """
+        Liste uç noktasının okuma modelinden çalıştırdığı sayfa sorgusu; ikinci
+        sayfanın cursor'ı kullanılır.
+        """
+        cursor_url = self.client.get('/api/products/', {**params, 'page_size': 5}).json()['next']
+        request = Request(APIRequestFactory().get(cursor_url))
+        view = ProductViewSet(request=request, action='list', kwargs={}, format_kwarg=None)
+        queryset = view.get_listing_queryset().values('id', 'created_at', 'payload')
+        return view.paginator.page_queryset(queryset, request)
+
+    def test_listing_page_uses_created_index_without_sorting(self):
+        plan = self.assertUsesIndex(self.listing_page({}), 'listing_created_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_listing_category_page_uses_composite_index_without_sorting(self):
+        page = self.listing_page({'category': self.other_category.id})
+        plan = self.assertUsesIndex(page, 'listing_cat_created_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_listing_tag_page_walks_created_index_with_through_table_lookup(self):
+        page = self.listing_page({'tag': self.tag.id})
+        plan = self.assertUsesIndex(page, 'product_tags_tag_product_idx')
+        self.assertIn('INDEX listing_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ProductSearchTests(ProductTestMixin, TestCase):
+    def create(self, name, description='Açıklama'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Product.objects.create(name=name, description=description, price='1.00', category=self.category)
+
+    def search(self, query):
+        response = self.client.get('/api/products/', {'q': query})
+        return [item['name'] for item in response.json()['results']]
+
+    def test_q_matches_name_and_description_terms(self):
+        self.create('Kırmızı kalem', 'Yumuşak uçlu')
+        self.create('Mavi defter', 'Kırmızı kapaklı')
+        self.create('Silgi')
+
+        self.assertCountEqual(self.search('kırmızı'), ['Kırmızı kalem', 'Mavi defter'])
+        self.assertEqual(self.search('kırmızı yumuşak'), ['Kırmızı kalem'])
+        self.assertEqual(self.search('def'), ['Mavi defter'])
+        self.assertEqual(self.search('"'), ['Silgi', 'Mavi defter', 'Kırmızı kalem'])
+
+    def test_index_follows_updates_and_deletes(self):
+        product = self.create('Kalem')
+        self.assertEqual(self.search('kalem'), ['Kalem'])
+
+        product.name = 'Fırça'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.assertEqual(self.search('kalem'), [])
+        self.assertEqual(self.search('fırça'), ['Fırça'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(self.search('fırça'), [])
+
+    def test_index_follows_writes_without_signals(self):
+        product = self.create('Kalem')
+        Product.objects.filter(pk=product.pk).update(name='Fırça')
+        backend = get_search_backend()
+        self.assertEqual(list(backend.filter(Product.objects.all(), 'fırça')), [product])
+        self.assertEqual(list(backend.filter(Product.objects.all(), 'kalem')), [])
+
+    def test_admin_search_uses_the_index(self):
+        self.create('Kalem')
+        self.create('Defter')
+        admin_user = User.objects.create_superuser('admin', password='parola')
+        self.client.force_login(admin_user)
+
+        response = self.client.get('/admin/api/product/', {'q': 'kal'})
+        self.assertEqual([str(p) for p in response.context['cl'].result_list], ['Kalem'])
+
+
+class ProductListingTests(ProductTestMixin, TestCase):
+    """
+    Okuma modeli her yazmadan sonra ProductSerializer çıktısıyla aynı olmalıdır.
+    """
+
+    def assertListingsMatchSerializer(self):
+        products = Product.objects.filter(is_active=True).order_by('id').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id'))
+        )
+        expected = json.loads(JSONRenderer().render(ProductSerializer(products, many=True).data))
+        self.assertEqual(list(ProductListing.objects.order_by('id').values_list('payload', flat=True)), expected)
+
+    def test_product_writes_keep_listings_in_sync(self):
+        product, other = self.create_products(2, tags=[self.tag])
+        self.assertListingsMatchSerializer()
+
+        product.name = 'Yeni ad'
+        product.category = self.other_category
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+            product.tags.clear()
+        self.assertListingsMatchSerializer()
+
+        other.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            other.save()
+        self.assertFalse(ProductListing.objects.filter(pk=other.pk).exists())
+        product.delete()
+        self.assertFalse(ProductListing.objects.exists())
+
+    def test_category_and_tag_writes_refresh_embedded_rows(self):
+        second_tag = Tag.objects.create(name='indirim')
+        self.create_products(2, tags=[self.tag, second_tag])
+        self.category.name = 'Kitaplar'
+        self.tag.name = 'en yeni'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+            self.tag.save()
+        self.assertListingsMatchSerializer()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second_tag.products.clear()
+        self.assertListingsMatchSerializer()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        self.assertListingsMatchSerializer()
+
+    def test_migration_backfill_matches_serializer(self):
+        products = self.create_products(3, tags=[self.tag, Tag.objects.create(name='indirim')])
+        Product.objects.filter(pk=products[0].pk).update(is_active=False, price='7.5')
+        Product.objects.filter(pk=products[1].pk).update(price='7.5')
+        ProductListing.objects.all().delete()
+
+        state = MigrationExecutor(connection).loader.project_state(('api', '0005_product_listing_updated_at'))
+        with mock.patch('api.caching.invalidate_product_lists') as invalidate:
+            populate_listings(state.apps, None)
+        invalidate.assert_not_called()
+        self.assertListingsMatchSerializer()
+
+    def test_writes_in_one_transaction_refresh_each_row_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                product = Product.objects.create(
+                    name='Ürün', description='Açıklama', price='10.00', category=self.category,
+                )
+                product.tags.add(self.tag)
+                self.tag.products.add(Product.objects.create(
+                    name='Diğer', description='Açıklama', price='10.00', category=self.category,
+                ))
+                self.assertFalse(ProductListing.objects.exists())
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "api_productlisting"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertListingsMatchSerializer()
+
+    def test_bulk_writes_refresh_listings(self):
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        product, = self.create_products(1)
+        self.client.patch(
+            '/api/products/bulk/', [{'id': product.id, 'name': 'Toplu', 'tag_ids': [self.tag.id]}], format='json',
+        )
+        self.client.post('/api/products/bulk/', [{
+            'name': 'Yeni', 'description': 'Toplu', 'price': '5.00', 'category_id': self.category.id,
+        }], format='json')
+        self.assertEqual(ProductListing.objects.count(), 2)
+        self.assertListingsMatchSerializer()
+
+    def test_list_reads_only_the_listing_table(self):
+        self.create_products(3, tags=[self.tag])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/products/?category={self.category.id}&q=Ürün')
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('api_category', queries[0]['sql'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class ProductQueryBudgetTests(ProductTestMixin, TestCase):
+    """
+    Sorgu sayısı katalog boyutundan bağımsız olmalıdır. Tam liste ve detay
+    okuma modelinden tek sorguyla gelir; alan seçimli okumalar get_queryset
+    üzerinden gider ve orada select_related veya etiket ön yüklemesi
+    kaldırılırsa N+1 sorgusu yakalanır.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create_user('ayse', password='parola'))
+
+    def assertConstantQueries(self, url, expected):
+        self.create_products(2, tags=[self.tag])
+        with self.assertNumQueries(expected):
+            self.client.get(url)
+        self.create_products(20, tags=[self.tag], start=timezone.now())
+        with self.assertNumQueries(expected):
+            self.client.get(url)
+
+    def test_list_queries_do_not_grow_with_the_catalog(self):
+        self.assertConstantQueries('/api/products/', 1)
+
+    def test_filtered_list_queries_do_not_grow_with_the_catalog(self):
+        self.assertConstantQueries(f'/api/products/?tag={self.tag.id}&category={self.category.id}', 1)
+
+    def test_selected_list_queries_do_not_grow_with_the_catalog(self):
+        # Ürün ve kategori tek birleştirmeyle, etiketler tek ön yükleme sorgusuyla
+        self.assertConstantQueries('/api/products/?fields=name,tags&expand=category', 2)
+
+    def test_retrieve_loads_category_and_tags_without_extra_queries(self):
+        product, = self.create_products(1, tags=[self.tag, Tag.objects.create(name='indirim')])
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/products/{product.id}/')
+        self.assertEqual(len(response.json()['tags']), 2)
+
+    def test_update_and_destroy_stay_within_the_write_budget(self):
+        # benchmark_budgets.json'daki sayılar (güncelleme 8, silme 7); test
+        # işlemi içinde BEGIN/COMMIT yerine serileştiricinin savepoint'i
+        # sayılır, silme ise savepoint açmaz. Arama indeksi tetikleyicilerle
+        # güncellenir ve yanıt ön yüklenen etiketleri kullanır.
+        product, = self.create_products(1, tags=[self.tag])
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        # Ürün, etiket ön yüklemesi, savepoint, UPDATE, okuma modeli (ürün,
+        # etiketler, ekleme) ve savepoint bırakma
+        with self.assertNumQueries(8), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/products/{product.id}/', {'name': 'Fırça'}, format='json')
+        self.assertEqual(response.json()['tags'], [{'id': self.tag.id, 'name': self.tag.name}])
+        self.assertEqual(self.client.get('/api/products/', {'q': 'fırça'}).json()['results'][0]['id'], product.id)
+
+        # Ürün, etiket ön yüklemesi, ara tablo, ürün ve okuma modeli satırı
+        with self.assertNumQueries(5), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/products/{product.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get('/api/products/', {'q': 'fırça'}).json()['results'], [])
+
+    def test_update_response_reflects_changed_tags(self):
+        product, = self.create_products(1, tags=[self.tag])
+        other = Tag.objects.create(name='indirim')
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        response = self.client.patch(f'/api/products/{product.id}/', {'tag_ids': [other.id]}, format='json')
+        self.assertEqual(response.json()['tags'], [{'id': other.id, 'name': 'indirim'}])
+
+    def create_with_tags(self, tag_ids):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/products/', {
+                'name': 'Defter', 'description': 'Çizgili', 'price': '5.00',
+                'category_id': self.category.id, 'tag_ids': tag_ids,
+            }, format='json')
+        return response, len(queries)
+
+    def test_create_queries_do_not_grow_with_tag_count(self):
+        tags = Tag.objects.bulk_create(Tag(name=f'etiket-{i}') for i in range(5))
+        response, one_tag = self.create_with_tags([self.tag.id])
+        self.assertEqual(response.status_code, 201)
+        response, many_tags = self.create_with_tags([tag.id for tag in tags])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['tags']), 5)
+        self.assertEqual(one_tag, many_tags)
+
+    def test_create_rejects_invalid_tag_ids(self):
+        for tag_ids, message in (
+            ([self.tag.id, 9999], 'Invalid pk "9999" - object does not exist.'),
+            ([True], 'Incorrect type. Expected pk value, received bool.'),
+            (['abc'], 'Incorrect type. Expected pk value, received str.'),
+        ):
+            response, _ = self.create_with_tags(tag_ids)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['tag_ids'], [message])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class ProductFieldSelectionTests(ProductTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create_user('ayse', password='parola'))
+        self.products = self.create_products(3, tags=[self.tag])
+
+    def test_list_returns_only_requested_fields_without_relation_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/products/?fields=id,name,price')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'][0],
+            {'id': self.products[-1].id, 'name': 'Ürün 2', 'price': '10.00'},
+        )
+        # Seçimli okuma okuma modelinin tam yükünü değil, ürün tablosunun
+        # istenen sütunlarını okur
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertIn('"api_product"."price"', sql)
+        self.assertNotIn('payload', sql)
+        self.assertNotIn('"api_product"."description"', sql)
+        self.assertNotIn('api_category', sql)
+
+    def test_expand_adds_relations_and_matches_serializer(self):
+        fields = parse_product_fields({'fields': 'name,tags', 'expand': 'category'})
+        response = self.client.get('/api/products/?fields=name,tags&expand=category')
+        expected = ProductSerializer(
+            Product.objects.order_by('-created_at'), many=True, fields=fields,
+        ).data
+        self.assertEqual(response.json()['results'], json.loads(JSONRenderer().render(expected)))
+
+    def test_retrieve_defers_unrequested_columns_and_relations(self):
+        product = self.products[0]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/products/{product.id}/?fields=name')
+        self.assertEqual(response.json(), {'id': product.id, 'name': 'Ürün 0'})
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertIn('"api_product"."name"', sql)
+        self.assertNotIn('payload', sql)
+        self.assertNotIn('"api_product"."description"', sql)
+        self.assertNotIn('api_category', sql)
+
+    def test_writes_ignore_field_selection(self):
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        response = self.client.patch(
+            f'/api/products/{self.products[0].id}/?fields=name', {'price': '12.00'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('tags', response.data)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/products/?fields=name,cost&expand=price')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'fields', 'expand'})
+
+    def test_cache_key_depends_on_the_resolved_field_set(self):
+        def key(query):
+            params = QueryDict(query)
+            return product_list_cache_keys('http://testserver/api/products/', params, parse_product_fields(params))[0]
+
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual(key('fields=name,price'), key('fields=price,name,id'))
+            self.assertEqual(key('fields=name&expand=tags'), key('fields=tags,name'))
+            self.assertNotEqual(key('fields=name'), key(''))
+
+    async def test_async_list_returns_sparse_rows(self):
+        await sync_to_async(self.client.force_login)(await User.objects.aget(username='ayse'))
+        response = await sync_to_async(self.client.get)('/api/async/products/?fields=price')
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': product.id, 'price': '10.00'} for product in reversed(self.products)],
+        )
+
+
+class CategoryTagCountTests(ProductTestMixin, TestCase):
+    def counts(self, url):
+        return {item['id']: item['product_count'] for item in self.client.get(url).json()}
+
+    def assertCountsServedFromCache(self):
+        """
+        Sayaçlar artırımlı olarak güncel kalmalı: yanıt tek sorguyla (yalnızca
+        adlar) gelir ve gruplu sorgunun sonucuyla aynıdır.
+        """
+        for url, model in (('/api/categories/', Category), ('/api/tags/', Tag)):
+            with self.assertNumQueries(1):
+                served = self.counts(url)
+            expected = dict(model.objects.annotate(
+                n=Count('products', filter=Q(products__is_active=True)),
+            ).values_list('pk', 'n'))
+            self.assertEqual(served, expected)
+
+    def test_counts_are_computed_with_one_grouped_query_and_cached(self):
+        self.create_products(3, tags=[self.tag])
+        self.create_products(1, category=self.other_category)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/categories/')
+        self.assertEqual(response.json(), [
+            {'id': self.category.id, 'name': 'Kitap', 'description': None, 'product_count': 3},
+            {'id': self.other_category.id, 'name': 'Müzik', 'description': None, 'product_count': 1},
+        ])
+        self.client.get('/api/tags/')
+        self.assertCountsServedFromCache()
+        self.assertEqual(self.client.get(f'/api/tags/{self.tag.id}/').json()['product_count'], 3)
+
+    def test_product_writes_adjust_counters_incrementally(self):
+        second_tag = Tag.objects.create(name='indirim')
+        product, other = self.create_products(2, tags=[self.tag])
+        self.client.get('/api/categories/')
+        self.client.get('/api/tags/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.category = self.other_category
+            product.save()
+            product.tags.add(second_tag)
+        self.assertCountsServedFromCache()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.is_active = False
+            other.save()
+            second_tag.products.add(other)
+            self.tag.products.clear()
+        self.assertCountsServedFromCache()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.is_active = True
+            other.save()
+            product.delete()
+        self.assertCountsServedFromCache()
+
+    def test_bulk_writes_reset_counters(self):
+        self.create_products(1)
+        self.client.get('/api/categories/')
+        self.client.force_authenticate(User.objects.create_user('ayse', password='parola'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/products/bulk/', [{
+                'name': 'Yeni', 'description': 'Toplu', 'price': '5.00', 'category_id': self.category.id,
+            }], format='json')
+        with self.assertNumQueries(2):
+            self.assertEqual(self.counts('/api/categories/')[self.category.id], 2)
+
+
+@override_settings(PRODUCT_CACHE={'WARM_TRACK_INTERVAL': 0})
+class ProductListWarmingTests(ProductTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Önceki testlerde süreç içinde biriken sayımlar
+        tracker.counts.clear()
+
+    def test_hot_lists_are_ranked_by_request_count(self):
+        for _ in range(3):
+            self.client.get(f'/api/products/?category={self.category.id}')
+        self.client.get('/api/products/')
+        warm_url(f'http://testserver/api/products/?tag={self.tag.id}')
+        self.assertEqual(hot_list_urls(), [
+            f'http://testserver/api/products/?category={self.category.id}',
+            'http://testserver/api/products/',
+        ])
+
+    async def test_async_list_requests_are_counted_without_blocking_cache_calls(self):
+        with mock.patch.object(tracker, 'flush', side_effect=AssertionError):
+            for _ in range(2):
+                await self.async_client.get('/api/async/products/')
+        self.assertEqual(await sync_to_async(hot_list_urls)(), ['http://testserver/api/async/products/'])
+
+    def test_warm_url_stores_the_same_entry_a_request_would(self):
+        self.create_products(3, tags=[self.tag])
+        for url in ('/api/products/?page_size=2', '/api/async/products/?page_size=2'):
+            self.assertEqual(warm_url(f'http://testserver{url}'), 200)
+            with self.assertNumQueries(0):
+                warmed = self.client.get(url)
+            cache.clear()
+            self.assertEqual(warmed.content, self.client.get(url).content)
+
+    def test_invalidation_warms_only_affected_hot_lists(self):
+        urls = [
+            'http://testserver/api/products/',
+            f'http://testserver/api/products/?category={self.category.id}',
+            f'http://testserver/api/products/?category={self.other_category.id}',
+            f'http://testserver/api/products/?tag={self.tag.id}&category={self.other_category.id}',
+        ]
+        cache.set('product_list_hot', {url: 1 for url in urls}, timeout=None)
+        with mock.patch('api.warming.schedule_warm') as schedule:
+            invalidate_product_lists([self.category.id], [self.tag.id])
+        self.assertEqual(schedule.call_args.args[0], [urls[0], urls[1], urls[3]])
+
+    def test_nothing_is_scheduled_inside_a_transaction(self):
+        with mock.patch.object(warmer, 'submit') as submit:
+            schedule_warm(['http://testserver/api/products/'])
+        submit.assert_not_called()
+
+    def test_management_command_warms_hot_lists_and_scopes(self):
+        self.create_products(2, tags=[self.tag])
+        out = io.StringIO()
+        call_command('warm_product_lists', '--scopes', '--base-url', 'http://testserver', '--workers', '1', stdout=out)
+        self.assertIn('4 liste ısıtıldı', out.getvalue())
+        with self.assertNumQueries(0):
+            self.client.get(f'/api/products/?tag={self.tag.id}')
+
+
+class PerformanceInstrumentationTests(ProductTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def server_timing(self, response):
+        return dict(
+            part.strip().split(';', 1) for part in response['Server-Timing'].split(',')
+        )
+
+    @override_settings(INSTRUMENTATION={'METRICS_ALLOWED_IPS': ['127.0.0.1']})
+    def test_server_timing_reports_queries_and_cache_misses(self):
+        self.create_products(3, tags=[self.tag])
+        response = self.client.get('/api/products/')
+        timing = self.server_timing(response)
+        self.assertIn('desc="1 queries"', timing['db'])
+        self.assertIn('serialize', timing)
+        self.assertIn('render', timing)
+        self.assertIn('total', timing)
+
+        timing = self.server_timing(self.client.get('/api/products/'))
+        self.assertIn('desc="0 queries"', timing['db'])
+        self.assertNotIn('serialize', timing)
+        self.assertIn('misses=0', timing['cache'])
+
+    def test_retrieve_records_serializer_and_render_time(self):
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        product, = self.create_products(1)
+        timing = self.server_timing(self.client.get(f'/api/products/{product.id}/'))
+        self.assertIn('desc="1 queries"', timing['db'])
+        self.assertIn('serialize', timing)
+        self.assertIn('render', timing)
+
+    def test_server_timing_is_only_sent_to_staff_and_allowed_ips(self):
+        product, = self.create_products(1)
+        self.assertNotIn('Server-Timing', self.client.get('/api/products/'))
+        self.client.force_authenticate(User.objects.create_user('ayse', password='parola'))
+        self.assertNotIn('Server-Timing', self.client.get(f'/api/products/{product.id}/'))
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        self.assertIn('Server-Timing', self.client.get(f'/api/products/{product.id}/'))
+
+        self.client.force_authenticate(None)
+        with override_settings(INSTRUMENTATION={'METRICS_ALLOWED_IPS': ['10.0.0.5']}):
+            self.assertIn('Server-Timing', self.client.get('/api/products/', REMOTE_ADDR='10.0.0.5'))
+        with override_settings(INSTRUMENTATION={'SERVER_TIMING': False, 'METRICS_ALLOWED_IPS': ['10.0.0.5']}):
+            self.assertNotIn('Server-Timing', self.client.get('/api/products/', REMOTE_ADDR='10.0.0.5'))
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ('PROPFIND', 'BREW', 'GET'):
+            self.client.generic(method, '/api/products/')
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        body = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('django_http_requests_total{view="product-list",method="other",status="403"} 2', body)
+        self.assertNotIn('PROPFIND', body)
+
+    def test_metrics_endpoint_exposes_aggregates(self):
+        self.create_products(2)
+        self.client.get('/api/products/')
+        self.client.get('/api/products/')
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('django_http_requests_total{view="product-list",method="GET",status="200"} 2', body)
+        self.assertIn('django_db_queries_total{view="product-list"} 1', body)
+        self.assertIn('django_cache_hits_total{family="product_list"} 1', body)
+        self.assertIn('django_cache_misses_total{family="product_list"} 1', body)
+        self.assertIn('django_http_request_duration_seconds_count{view="product-list"} 2', body)
+
+    def test_metrics_endpoint_requires_staff_or_allowed_ip(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.client.force_login(User.objects.create_user('ayse', password='parola'))
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.client.logout()
+
+        with override_settings(INSTRUMENTATION={'METRICS_ALLOWED_IPS': ['10.0.0.5']}):
+            self.assertEqual(self.client.get('/api/metrics/', REMOTE_ADDR='10.0.0.5').status_code, 200)
+            self.assertEqual(self.client.get('/api/metrics/', REMOTE_ADDR='10.0.0.6').status_code, 403)
+
+    def test_key_family_drops_variable_parts(self):
+        self.assertEqual(key_family('product_list:1.2:abc'), 'product_list')
+        self.assertEqual(key_family('product_list_gen_tag_3'), 'product_list_gen_tag')
+        self.assertEqual(key_family('product_list_stale:abc'), 'product_list_stale')
+
+
+class AsyncProductEndpointTests(ProductTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('ayse', password='parola')
+
+    async def test_list_matches_sync_list(self):
+        await sync_to_async(self.create_products)(3, tags=[self.tag])
+        response = await self.async_client.get('/api/async/products/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        expected = await sync_to_async(self.client.get)('/api/products/', {'page_size': 2})
+        self.assertEqual(response.json()['results'], expected.json()['results'])
+        self.assertIn('/api/async/products/?', response.json()['next'])
+        self.assertNotIn('Server-Timing', response)
+
+    async def test_server_timing_is_sent_to_staff_session(self):
+        product, = await sync_to_async(self.create_products)(1)
+        staff = await sync_to_async(User.objects.create_user)('admin', is_staff=True)
+        await self.async_client.aforce_login(staff)
+        response = await self.async_client.get(f'/api/async/products/{product.id}/')
+        self.assertIn('Server-Timing', response)
+
+    async def test_selected_fields_match_sync_views(self):
+        product, = await sync_to_async(self.create_products)(1, tags=[self.tag])
+        await self.async_client.aforce_login(self.user)
+        self.client.force_authenticate(self.user)
+        for url in ('/products/?fields=name,tags&expand=category', f'/products/{product.id}/?fields=name,price'):
+            response = await self.async_client.get(f'/api/async{url}')
+            self.assertEqual(response.status_code, 200)
+            expected = await sync_to_async(self.client.get)(f'/api{url}')
+            # Sayfa bağlantıları uç noktaya göre değişir; yalnızca gövde karşılaştırılır
+            body, expected_body = response.json(), expected.json()
+            self.assertEqual(body.get('results', body), expected_body.get('results', expected_body))
+
+    async def test_list_applies_query_param_filters(self):
+        await sync_to_async(self.create_products)(2)
+        other, = await sync_to_async(self.create_products)(1, category=self.other_category)
+        response = await self.async_client.get('/api/async/products/', {'category': self.other_category.id})
+        self.assertEqual([product['id'] for product in response.json()['results']], [other.id])
+
+    @override_settings(INSTRUMENTATION={'METRICS_ALLOWED_IPS': ['127.0.0.1']})
+    async def test_list_is_served_from_cache(self):
+        await sync_to_async(self.create_products)(2)
+        await self.async_client.get('/api/async/products/')
+        response = await self.async_client.get('/api/async/products/')
+        self.assertIn('desc="0 queries"', response['Server-Timing'])
+
+    async def test_retrieve_requires_authentication_like_sync_view(self):
+        product, = await sync_to_async(self.create_products)(1)
+        response = await self.async_client.get(f'/api/async/products/{product.id}/')
+        self.assertEqual(response.status_code, 403)
+
+    async def test_retrieve_matches_sync_retrieve(self):
+        product, = await sync_to_async(self.create_products)(1, tags=[self.tag])
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(f'/api/async/products/{product.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(self.user)
+        expected = await sync_to_async(self.client.get)(f'/api/products/{product.id}/')
+        self.assertEqual(response.json(), expected.json())
+
+    async def test_retrieve_inactive_product_is_not_found(self):
+        product, = await sync_to_async(self.create_products)(1)
+
+        def deactivate():
+            product.is_active = False
+            with self.captureOnCommitCallbacks(execute=True):
+                product.save()
+
+        await sync_to_async(deactivate)()
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(f'/api/async/products/{product.id}/')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-tests'},
+})
+class TieredCacheTests(TestCase):
+    """
+    Aynı L2'yi ve yayın kanalını paylaşan iki TieredCache, iki ayrı işçi
+    sürecinin yerine geçer.
+    """
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.worker_a = self.make_worker('a')
+        self.worker_b = self.make_worker('b')
+
+    def make_worker(self, name):
+        return TieredCache('shared', {'OPTIONS': {
+            'L1_NAME': f'{self.id()}-{name}',
+            'BROADCAST': 'api.cache_backends.LocalBroadcast',
+            'BROADCAST_OPTIONS': {'channel': self.id()},
+        }})
+
+    def test_reads_are_served_from_l1(self):
+        self.worker_a.set('anahtar', 1)
+        self.assertEqual(self.worker_b.get('anahtar'), 1)
+        with mock.patch.object(caches['shared'], 'get') as l2_get:
+            self.assertEqual(self.worker_b.get('anahtar'), 1)
+        l2_get.assert_not_called()
+
+    def test_writes_evict_other_workers_l1(self):
+        self.worker_a.set('anahtar', 1)
+        self.worker_b.get('anahtar')
+        self.worker_a.set('anahtar', 2)
+        self.assertEqual(self.worker_b.get('anahtar'), 2)
+        self.worker_a.delete('anahtar')
+        self.assertIsNone(self.worker_b.get('anahtar'))
+
+    def test_set_many_evicts_with_one_broadcast(self):
+        self.worker_a.set_many({'x': 1, 'y': 1}, timeout=None)
+        self.worker_b.get_many(['x', 'y'])
+        with mock.patch.object(self.worker_a.tier.channel, 'publish', wraps=self.worker_a.tier.channel.publish) as publish:
+            self.worker_a.set_many({'x': 2, 'y': 2}, timeout=None)
+        publish.assert_called_once()
+        self.assertEqual(self.worker_b.get_many(['x', 'y']), {'x': 2, 'y': 2})
+
+    def test_initial_fill_does_not_broadcast(self):
+        channel = self.worker_a.tier.channel
+        with mock.patch.object(channel, 'publish', wraps=channel.publish) as publish:
+            self.worker_a.set('anahtar', 1)
+            self.worker_a.set_many({'x': 1, 'y': 1})
+            publish.assert_not_called()
+            self.worker_a.set_many({'y': 2, 'z': 2})
+        publish.assert_called_once()
+        self.assertEqual(publish.call_args.args[0]['keys'], [('y', None)])
+        self.assertEqual(self.worker_b.get_many(['x', 'y', 'z']), {'x': 1, 'y': 2, 'z': 2})
+
+    def test_get_many_fetches_only_l1_misses_from_l2_in_one_call(self):
+        caches['shared'].set_many({'x': 1, 'y': 2, 'z': 3})
+        self.worker_b.get('x')
+        with mock.patch.object(caches['shared'], 'get_many', wraps=caches['shared'].get_many) as l2_get_many:
+            self.assertEqual(self.worker_b.get_many(['x', 'y', 'z']), {'x': 1, 'y': 2, 'z': 3})
+        l2_get_many.assert_called_once_with(['y', 'z'], version=None)
+
+    def test_add_does_not_fill_l1(self):
+        self.assertTrue(self.worker_a.add('kilit', 1, timeout=10))
+        self.assertFalse(self.worker_b.add('kilit', 1, timeout=10))
+        self.worker_a.delete('kilit')
+        self.assertTrue(self.worker_b.add('kilit', 1, timeout=10))
+
+    def test_l1_entries_expire_after_l1_timeout(self):
+        self.worker_a.set('anahtar', 1)
+        self.worker_b.get('anahtar')
+        # Yayın kaçırılmış gibi L2 doğrudan değiştirilir
+        caches['shared'].set('anahtar', 2)
+        self.assertEqual(self.worker_b.get('anahtar'), 1)
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + 6):
+            self.assertEqual(self.worker_b.get('anahtar'), 2)
+
+    def test_product_list_invalidation_reaches_other_workers(self):
+        with self.settings(CACHES={
+            'default': {
+                'BACKEND': 'api.cache_backends.TieredCache', 'LOCATION': 'shared',
+                'OPTIONS': {
+                    'L1_NAME': f'{self.id()}-default',
+                    'BROADCAST': 'api.cache_backends.LocalBroadcast',
+                    'BROADCAST_OPTIONS': {'channel': self.id()},
+                },
+            },
+            'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-tests'},
+        }):
+            key = generation_key()
+            caches['shared'].set(key, 1, timeout=None)
+            self.assertEqual(self.worker_b.get_many([key]), {key: 1}) # Başka bir işçinin L1'indeki nesil
+            invalidate_product_lists([], [])
+            self.assertNotEqual(caches['shared'].get(key), 1)
+            self.assertEqual(self.worker_b.get(key), caches['shared'].get(key))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class PrimaryReplicaRouterTests(ProductTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.router = PrimaryReplicaRouter()
+        self.client.force_authenticate(User.objects.create_user('ayse', password='parola', is_staff=True))
+
+    def test_reads_go_to_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_replica_reads_go_to_replica_outside_transactions(self):
+        # TestCase her testi bir işlemle sardığı için işlem durumu sabitlenir
+        with replica_reads():
+            with mock.patch.object(connection, 'in_atomic_block', False):
+                self.assertEqual(self.router.db_for_read(Product), 'replica_1')
+            with mock.patch.object(connection, 'in_atomic_block', True):
+                self.assertEqual(self.router.db_for_read(Product), 'default')
+        self.assertEqual(self.router.db_for_write(Product), 'default')
+        self.assertFalse(self.router.allow_migrate('replica_1', 'api'))
+
+    def routed_reads(self, method, url, **kwargs):
+        """
+        İstek sırasında filtrelerin replika bayrağını kaydeder.
+        """
+        seen = []
+        filter_by_query_params = ProductViewSet.filter_by_query_params
+        get_listing_row = ProductViewSet.get_listing_row
+
+        def spy(original):
+            def method(view, *args):
+                seen.append(reading_from_replica())
+                return original(view, *args)
+            return method
+
+        # Detay okuması okuma modelinden, yazmalar ürün queryset'inden yapılır
+        with mock.patch.object(ProductViewSet, 'filter_by_query_params', spy(filter_by_query_params)), \
+                mock.patch.object(ProductViewSet, 'get_listing_row', spy(get_listing_row)):
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, seen
+
+    def test_uncached_get_reads_from_replica_and_resets_afterwards(self):
+        self.create_products(1)
+        seen = []
+
+        def spy(rows):
+            seen.append(reading_from_replica())
+            return serialize_product_rows(rows)
+
+        # Dışa aktarım önbelleğe yazılmaz; gövde üretilirken replikadan okunur
+        with mock.patch('api.views.serialize_product_rows', spy):
+            response = self.client.get('/api/products/export/')
+            b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(seen, [True])
+        self.assertFalse(reading_from_replica())
+
+    def test_cache_builds_read_from_primary(self):
+        product, = self.create_products(1)
+        response, seen = self.routed_reads('get', f'/api/products/{product.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(seen, [False])
+
+    def test_lagging_replica_does_not_poison_rebuilt_entries(self):
+        product, = self.create_products(1)
+        url = f'/api/products/{product.id}/'
+        self.client.get(url)
+        self.client.get('/api/products/')
+        stale_row = ProductListing.objects.filter(pk=product.pk).values('payload', 'updated_at').get()
+        stale_rows = list(ProductListing.objects.values('id', 'created_at', 'payload'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'price': '12.00'}, format='json')
+
+        # Replika yazmayı henüz almamış: replikadan okuyan her şey eski satırları görür
+        get_listing_row = ProductViewSet.get_listing_row
+
+        def lagging_row(view, pk):
+            return stale_row if reading_from_replica() else get_listing_row(view, pk)
+
+        def lagging_rows(rows):
+            return listing_rows_data(stale_rows if reading_from_replica() else rows)
+
+        # Yazan istemcinin çerezi olmadan, başka bir istemci gibi okunur
+        self.client.cookies.clear()
+        with mock.patch.object(ProductViewSet, 'get_listing_row', lagging_row), \
+                mock.patch('api.views.listing_rows_data', lagging_rows):
+            self.assertEqual(self.client.get(url).json()['price'], '12.00')
+            self.assertEqual(self.client.get('/api/products/').json()['results'][0]['price'], '12.00')
+
+    def test_writes_stay_on_primary_and_pin_following_reads(self):
+        product, = self.create_products(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response, seen = self.routed_reads(
+                'patch', f'/api/products/{product.id}/', data={'price': '12.00'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(seen, [False])
+        self.assertEqual(response.cookies[PRIMARY_PIN_COOKIE]['max-age'], ProductViewSet.primary_pin_seconds)
+
+        self.client.cookies[PRIMARY_PIN_COOKIE] = '1'
+        _, seen = self.routed_reads('get', f'/api/products/{product.id}/')
+        self.assertEqual(seen, [False])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite arka ucuna özgü')
+class SQLiteWriteQueueTests(TransactionTestCase):
+    def setUp(self):
+        self.lock = write_lock(connection.settings_dict['NAME'])
+
+    def test_pragmas_are_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_lock_is_held_for_the_outer_transaction_only(self):
+        with transaction.atomic():
+            Category.objects.create(name='Kilit')
+            self.assertTrue(self.lock.locked())
+            with transaction.atomic():
+                Category.objects.create(name='İç')
+            self.assertTrue(self.lock.locked())
+        self.assertFalse(self.lock.locked())
+
+    def test_lock_is_released_on_rollback(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                Category.objects.create(name='Geri al')
+                raise ValueError
+        self.assertFalse(self.lock.locked())
+        self.assertFalse(Category.objects.exists())
+
+    def test_autocommit_reads_do_not_queue_behind_writers(self):
+        Category.objects.create(name='Okuma')
+        with mock.patch('api.backends.sqlite3.base.write_lock', side_effect=AssertionError):
+            self.assertEqual(list(Category.objects.values_list('name', flat=True)), ['Okuma'])
@@ -1,10 +1,17 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet
+from .async_views import AsyncProductDetailView, AsyncProductListView
+from .views import CategoryViewSet, ProductViewSet, TagViewSet, metrics
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
+router.register(r'categories', CategoryViewSet, basename='category')
+router.register(r'tags', TagViewSet, basename='tag')
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Eşzamansız (ASGI) okuma uç noktaları
+    path('async/products/', AsyncProductListView.as_view(), name='product-async-list'),
+    path('async/products/<int:pk>/', AsyncProductDetailView.as_view(), name='product-async-detail'),
+    path('metrics/', metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -1,81 +1,312 @@
+import json
+from itertools import islice
+
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
-from django.core.cache import cache
+from django.db.models import Count, Prefetch, Q
+from django.http import Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import cached_property
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_GET
 from django.views.decorators.vary import vary_on_cookie
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from .models import Product
-from .serializers import ProductSerializer
+from .bulk import bulk_create_products, bulk_delete_products, bulk_update_products
+from .caching import (
+    build_json_entry, get_or_build, get_product_counts, product_cache_setting, product_detail_cache_key,
+    product_list_cache_keys,
+)
+from .db_routers import ReplicaReadMixin, replica_reads
+from .instrumentation import metrics_visible, registry, timer
+from .listings import listing_rows_data
+from .models import Category, Product, ProductListing, Tag
+from .pagination import ProductCursorPagination
+from .renderers import CSVRenderer, NDJSONRenderer, iter_csv, iter_ndjson
+from .search import get_search_backend
+from .warming import record_list_request
+from .serializers import (
+    PRODUCT_LIST_VALUES, CategoryCountSerializer, ProductBulkItemSerializer, TagCountSerializer, ProductSerializer, parse_product_fields,
+    product_only_fields, serialize_product_rows,
+)
 from .permissions import IsAuthenticatedReadCreateOnly, IsAdminUserForHighPriceDelete
 
-class ProductViewSet(viewsets.ModelViewSet):
+def etag_matches(request, etag):
     """
-    Ürünler için CRUD işlemlerini sağlayan ViewSet.
+    If-None-Match başlığını zayıf karşılaştırma ile ETag'e karşı denetler.
     """
-    queryset = Product.objects.all()
-    serializer_class = ProductSerializer
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
-    permission_classes = [IsAuthenticatedReadCreateOnly, IsAdminUserForHighPriceDelete]
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in etags}
+
+
+def not_modified(request, entry):
+    """
+    Koşullu GET denetimi. If-None-Match varsa yalnızca ETag'e bakılır;
+    yoksa girdide last_modified bulunuyorsa If-Modified-Since ile
+    karşılaştırılır (HTTP tarihleri saniye hassasiyetindedir).
+    """
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        return etag_matches(request, entry['etag'])
+    last_modified = entry.get('last_modified')
+    if last_modified is None:
+        return False
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def json_entry_response(request, entry):
+    """
+    Önbellekteki render edilmiş JSON yükünden doğrudan yanıt üretir.
+    İstemcinin kopyası güncelse gövdesiz 304 döner; istemci gzip kabul
+    ediyorsa sıkıştırılmış kopya gönderilir.
+    """
+    if request.accepted_renderer.format != 'json':
+        # Browsable API gibi diğer formatlar normal DRF render yolunu kullanır
+        return Response(json.loads(entry['body']))
+
+    if not_modified(request, entry):
+        response = HttpResponseNotModified()
+    elif entry['gzip'] and 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = HttpResponse(entry['gzip'], content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(entry['body'], content_type='application/json')
+
+    response['ETag'] = entry['etag']
+    if entry.get('last_modified') is not None:
+        response['Last-Modified'] = http_date(entry['last_modified'])
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
+
+
+def build_detail_entry(row):
+    """
+    Okuma modeli satırından (payload, updated_at) detay girdisini üretir.
+    Yük hazır olduğundan serileştirici çalışmaz; Last-Modified satırın
+    updated_at değerinden saniyeye yuvarlanarak alınır.
+    """
+    with timer('serialize'):
+        data, = listing_rows_data([row])
+    entry = build_json_entry(data)
+    entry['last_modified'] = int(row['updated_at'].timestamp())
+    return entry
+
+
+# Liste ve detay belgelerinde ortak alan seçimi parametreleri
+FIELD_SELECTION_PARAMETERS = [
+    openapi.Parameter(
+        'fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Döndürülecek alanlar, virgülle ayrılmış (ör. id,name,price); verilmezse tümü",
+    ),
+    openapi.Parameter(
+        'expand', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="fields ile birlikte eklenecek ilişkiler: category, tags",
+    ),
+]
+
+
+@require_GET
+def metrics(request):
+    """
+    Süreç içindeki istek ölçümlerini Prometheus metin formatında döndürür.
+    Önbellek ve gecikme verileri iç bilgi olduğundan yalnızca personel
+    kullanıcılar ve METRICS_ALLOWED_IPS içindeki istemciler okuyabilir.
+    """
+    if not metrics_visible(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ProductQuerysetMixin:
+    """
+    Ürün görünümlerinin (senkron ViewSet ve eşzamansız görünümler) ortak
+    queryset'i ve sorgu parametresi filtreleri.
+    """
+
+    @cached_property
+    def product_fields(self):
+        """
+        Güvenli isteklerde ?fields=/?expand= ile seçilen çıktı alanları
+        (None: tümü). Yazma isteklerinin yanıtı her zaman tam gösterimdir.
+        """
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        return parse_product_fields(request.query_params)
 
     def get_queryset(self):
         """
         Sorgu parametrelerine göre filtrelenmiş queryset döndürür.
         select_related ve prefetch_related kullanarak performansı artırır.
+        Alan seçimi varsa istenmeyen ilişkiler yüklenmez, istenmeyen sütunlar
+        .only() ile okunmaz.
         """
         queryset = Product.objects.filter(is_active=True)
+        fields = self.product_fields
         
         # N+1 problemini çözmek için relations'ları önceden yükle
-        queryset = queryset.select_related('category').prefetch_related('tags')
+        # (etiket sırası liste çıktısının hızlı yoluyla aynı olsun diye sabit)
+        if fields is None or 'category' in fields:
+            queryset = queryset.select_related('category')
+        if fields is None or 'tags' in fields:
+            queryset = queryset.prefetch_related(Prefetch('tags', queryset=Tag.objects.order_by('id')))
+        if fields is not None:
+            # created_at, liste sayfalamasında sınır satırının konumu için okunur
+            queryset = queryset.only(*product_only_fields(fields), 'created_at')
         
-        # Kategori ve etiketlere göre filtreleme
+        return self.filter_by_query_params(queryset)
+
+    def get_listing_queryset(self):
+        """
+        Liste okumaları için okuma modeli queryset'i. Kategori filtresi
+        tablonun kendi indeksini kullanır; etiket ve arama filtreleri
+        filter_by_query_params ile ürün tablosunda yarı birleştirme
+        (id IN alt sorgu) olarak uygulanır.
+        """
+        params = self.request.query_params
+        queryset = ProductListing.objects.all()
+        category_id = params.get('category')
+        if category_id:
+            queryset = queryset.filter(category_id=category_id)
+        if params.get('tag') or params.get('q'):
+            products = self.filter_by_query_params(Product.objects.all())
+            queryset = queryset.filter(id__in=products.values('pk'))
+        return queryset
+
+    def get_detail_pk(self):
+        """
+        URL'deki ürün id'sini tamsayıya çevirir; önbellek anahtarları aynı
+        ürün için tek biçimde olsun diye ('007' ve '7' aynıdır).
+        """
+        try:
+            return int(self.kwargs['pk'])
+        except ValueError:
+            raise Http404
+
+    def get_listing_row(self, pk):
+        """
+        Detay okuması: aktif ürünün hazır yükü tek birincil anahtar
+        aramasıyla okunur; pasif veya silinmiş ürünlerin satırı yoktur.
+        """
+        row = ProductListing.objects.filter(pk=pk).values('payload', 'updated_at').first()
+        if row is None:
+            raise Http404
+        return row
+
+    async def aget_listing_row(self, pk):
+        row = await ProductListing.objects.filter(pk=pk).values('payload', 'updated_at').afirst()
+        if row is None:
+            raise Http404
+        return row
+
+    def build_selected_detail_entry(self, product):
+        """
+        Alan seçimli detay girdisi. Okuma modelindeki yük tüm alanları
+        taşıdığından seçimli okumalar ürün tablosundan yalnızca istenen
+        sütunlarla yapılır; updated_at okunmayabileceği için Last-Modified
+        yoktur, koşullu GET ETag ile çalışır.
+        """
+        if product is None:
+            raise Http404
+        with timer('serialize'):
+            data = self.get_serializer(product).data
+        return build_json_entry(data)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.product_fields is not None and issubclass(self.get_serializer_class(), ProductSerializer):
+            kwargs.setdefault('fields', self.product_fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_by_query_params(self, queryset):
+        """
+        Kategori, etiket ve arama (q) sorgu parametrelerini queryset'e uygular.
+        """
         category_id = self.request.query_params.get('category')
         tag_id = self.request.query_params.get('tag')
+        search_query = self.request.query_params.get('q')
         
         if category_id:
             queryset = queryset.filter(category_id=category_id)
         
         if tag_id:
             queryset = queryset.filter(tags__id=tag_id)
+        
+        # Ad ve açıklamada tam metin arama
+        if search_query:
+            queryset = get_search_backend().filter(queryset, search_query)
             
         return queryset
 
+
+class ProductViewSet(ReplicaReadMixin, ProductQuerysetMixin, viewsets.ModelViewSet):
+    """
+    Ürünler için CRUD işlemlerini sağlayan ViewSet.
+    """
+    queryset = Product.objects.all()
+    serializer_class = ProductSerializer
+    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    permission_classes = [IsAuthenticatedReadCreateOnly, IsAdminUserForHighPriceDelete]
+    pagination_class = ProductCursorPagination
+    # Toplu uç noktalarda bir istekte kabul edilen en fazla öğe sayısı
+    bulk_max_items = 1000
+    # Dışa aktarımda veritabanından tek seferde okunan satır sayısı
+    export_chunk_size = 2000
+
     @swagger_auto_schema(
-        operation_description="Tüm ürünleri listeler",
+        operation_description="Aktif ürünleri (created_at, id) sırasına göre sayfa sayfa listeler",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, description="Ad ve açıklamada tam metin arama", type=openapi.TYPE_STRING),
+            *FIELD_SELECTION_PARAMETERS,
+        ],
         responses={
             200: ProductSerializer(many=True)
         }
     )
     def list(self, request, *args, **kwargs):
         """
-        Ürünleri listeler ve önbelleğe alır.
+        Ürünleri keyset sayfalama ile listeler ve her sayfayı ayrı önbelleğe alır.
         """
-        # Cache key belirleme
-        cache_key = 'product_list'
-        category_id = request.query_params.get('category')
-        tag_id = request.query_params.get('tag')
-        
-        if category_id:
-            cache_key = f'product_list_category_{category_id}'
-        elif tag_id:
-            cache_key = f'product_list_tag_{tag_id}'
-        
-        # Önbellekten veri almayı dene
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
-        
-        # Önbellekte yoksa, veritabanından al
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+        # Isıtma için en çok istenen listeler sayılır
+        record_list_request(request)
+
+        # Cache key belirleme (tüm parametreler, alan seçimi ve kapsam nesilleri dahil)
+        fields = self.product_fields
+        cache_key, stale_key = product_list_cache_keys(
+            request.build_absolute_uri(request.path), request.query_params, fields,
+        )
         
-        # Önbelleğe kaydet (30 dakika süreyle)
-        cache.set(cache_key, serializer.data, timeout=60*30)
+        def build():
+            # Önbellekte yoksa, veritabanından yalnızca istenen sayfayı al
+            if self.get_serializer_class() is ProductSerializer and fields is None:
+                # Hızlı yol: hazır satırlar okuma modelinden tek aralık
+                # taramasıyla okunur; birleştirme ve etiket sorgusu yoktur.
+                # Alan seçiminde tam yük okunmaz, ürün tablosuna .only() ile
+                # gidilir.
+                queryset = self.get_listing_queryset().values('id', 'created_at', 'payload')
+                page = self.paginate_queryset(queryset)
+                with timer('serialize'):
+                    data = listing_rows_data(page)
+            else:
+                page = self.paginate_queryset(self.get_queryset())
+                data = self.get_serializer(page, many=True).data
+            return build_json_entry(self.get_paginated_response(data).data)
         
-        return Response(serializer.data)
+        # Render edilmiş baytları önbellekten al; aynı anda kaçıran istekler
+        # arasından yalnızca biri yeniden hesaplar
+        entry = get_or_build(
+            cache_key, build, product_cache_setting('LIST_TIMEOUT'), stale_key=stale_key,
+        )
+        return json_entry_response(request, entry)
 
     @swagger_auto_schema(
         operation_description="Yeni bir ürün oluşturur",
@@ -93,6 +324,7 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     @swagger_auto_schema(
         operation_description="Belirli bir ürünü getirir",
+        manual_parameters=FIELD_SELECTION_PARAMETERS,
         responses={
             200: ProductSerializer,
             404: "Ürün bulunamadı"
@@ -100,9 +332,26 @@ class ProductViewSet(viewsets.ModelViewSet):
     )
     def retrieve(self, request, *args, **kwargs):
         """
-        Belirli bir ürünün detaylarını getirir.
+        Belirli bir ürünün detaylarını getirir. Render edilmiş yanıt ürün
+        başına önbelleğe alınır; ETag/Last-Modified ile güncel kopyası olan
+        istemcilere gövdesiz 304 döner. Nesne izinleri yalnızca DELETE
+        isteklerini sınırladığından bu yolda nesne yüklenmez.
         """
-        return super().retrieve(request, *args, **kwargs)
+        if self.get_serializer_class() is not ProductSerializer:
+            return super().retrieve(request, *args, **kwargs)
+
+        pk = self.get_detail_pk()
+        fields = self.product_fields
+
+        def build():
+            if fields is None:
+                return build_detail_entry(self.get_listing_row(pk))
+            return self.build_selected_detail_entry(self.get_queryset().filter(pk=pk).first())
+
+        entry = get_or_build(
+            product_detail_cache_key(pk, fields), build, product_cache_setting('DETAIL_TIMEOUT'),
+        )
+        return json_entry_response(request, entry)
 
     @swagger_auto_schema(
         operation_description="Belirli bir ürünü tamamen günceller",
@@ -117,7 +366,15 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         Belirli bir ürünü tamamen günceller (PUT).
         """
-        return super().update(request, *args, **kwargs)
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        # DRF burada ön yükleme önbelleğini boşaltır ve yanıt etiketleri
+        # yeniden sorgular. Etiketler değiştiyse tags.set() önbelleği zaten
+        # temizler; değişmediyse ön yüklenen etiketler günceldir.
+        return Response(serializer.data)
 
     @swagger_auto_schema(
         operation_description="Belirli bir ürünü kısmen günceller",
@@ -145,4 +402,171 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         Belirli bir ürünü siler.
         """
-        return super().destroy(request, *args, **kwargs)
\ No newline at end of file
+        return super().destroy(request, *args, **kwargs)
+
+    def check_bulk_size(self, data):
+        if isinstance(data, list) and len(data) > self.bulk_max_items:
+            raise ValidationError(f'Bir istekte en fazla {self.bulk_max_items} öğe gönderilebilir.')
+
+    def bulk_response(self, results, errors, key):
+        """
+        Toplu işlem sonucunu döndürür: hepsi başarılıysa 200/201, hiçbiri
+        başarılı değilse 400, karışık sonuçlarda 207.
+        """
+        errors.sort(key=lambda error: error['index'])
+        if not errors:
+            status_code = status.HTTP_201_CREATED if key == 'created' else status.HTTP_200_OK
+        elif not results:
+            status_code = status.HTTP_400_BAD_REQUEST
+        else:
+            status_code = status.HTTP_207_MULTI_STATUS
+        return Response({key: results, 'errors': errors}, status=status_code)
+
+    @swagger_auto_schema(
+        operation_description="Birden çok ürünü tek istekte oluşturur",
+        request_body=ProductBulkItemSerializer(many=True),
+        responses={
+            201: ProductSerializer(many=True),
+            207: "Bazı öğeler hatalı",
+            400: "Geçersiz veri"
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Ürün listesini toplu olarak oluşturur; hatalı öğeler index ile raporlanır.
+        """
+        self.check_bulk_size(request.data)
+        created, errors = bulk_create_products(request.data)
+        return self.bulk_response(created, errors, 'created')
+
+    @swagger_auto_schema(
+        operation_description="Birden çok ürünü tek istekte günceller (her öğede id zorunludur)",
+        request_body=ProductBulkItemSerializer(many=True),
+        responses={
+            200: ProductSerializer(many=True),
+            207: "Bazı öğeler hatalı",
+            400: "Geçersiz veri"
+        }
+    )
+    @bulk_create.mapping.put
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        """
+        Ürün listesini toplu olarak günceller (PUT: tam, PATCH: kısmi).
+        """
+        self.check_bulk_size(request.data)
+        updated, errors = bulk_update_products(request.data, partial=request.method == 'PATCH')
+        return self.bulk_response(updated, errors, 'updated')
+
+    @swagger_auto_schema(
+        operation_description="Verilen id listesindeki ürünleri siler",
+        request_body=openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER)),
+        responses={
+            200: "Silinen ürün id'leri",
+            207: "Bazı ürünler bulunamadı",
+            400: "Geçersiz veri"
+        }
+    )
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        """
+        Ürünleri toplu olarak siler.
+        """
+        self.check_bulk_size(request.data)
+        deleted, errors = bulk_delete_products(request.data)
+        return self.bulk_response(deleted, errors, 'deleted')
+
+    def iter_export_rows(self):
+        """
+        Aktif ürünleri id sırasıyla parça parça okur. Her parça için etiketler
+        tek sorguyla yüklenir; bellekte aynı anda yalnızca bir parça bulunur.
+        """
+        queryset = self.filter_by_query_params(Product.objects.filter(is_active=True))
+        # Gövde görünüm döndükten sonra üretildiği için replika seçimi burada
+        # yeniden uygulanır
+        with replica_reads(self.use_replica):
+            rows = queryset.order_by('id').values(*PRODUCT_LIST_VALUES).iterator(
+                chunk_size=self.export_chunk_size
+            )
+            while chunk := list(islice(rows, self.export_chunk_size)):
+                yield from serialize_product_rows(chunk)
+
+    @swagger_auto_schema(
+        operation_description="Aktif kataloğu NDJSON (varsayılan) veya CSV olarak akış halinde dışa aktarır",
+        manual_parameters=[
+            openapi.Parameter('format', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['ndjson', 'csv']),
+        ],
+        responses={200: "Ürün satırları"}
+    )
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, *args, **kwargs):
+        """
+        Kataloğu StreamingHttpResponse ile satır satır gönderir; bellek
+        kullanımı katalog boyutundan bağımsızdır.
+        """
+        renderer = request.accepted_renderer
+        rows = self.iter_export_rows()
+        content = iter_csv(rows) if renderer.format == 'csv' else iter_ndjson(rows)
+        response = StreamingHttpResponse(
+            content, content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="products.{renderer.format}"'
+        return response
+
+
+class ProductCountViewSetMixin:
+    """
+    Kategori ve etiket uç noktaları: her nesneye aktif ürün sayısını
+    (product_count) ekler. Sayılar önbellekteki sayaçlardan okunur; sayaç
+    yoksa tüm sayılar tek gruplu sorguyla hesaplanır. Ürün yazmaları
+    sayaçları commit sonrasında artırıp azaltır (api.models alıcıları).
+    Gezinme için tüm liste tek yanıtta döner.
+    """
+    authentication_classes = ProductViewSet.authentication_classes
+    pagination_class = None
+    # Sayaç anahtarlarının kapsamı: 'category' veya 'tag'
+    count_scope = None
+
+    def get_queryset(self):
+        return self.queryset.order_by('name', 'id')
+
+    def compute_counts(self):
+        return (
+            self.queryset.model.objects
+            .annotate(product_count=Count('products', filter=Q(products__is_active=True)))
+            .values_list('pk', 'product_count')
+        )
+
+    def with_counts(self, objects):
+        objects = list(objects)
+        counts = get_product_counts(self.count_scope, [obj.pk for obj in objects], self.compute_counts)
+        for obj in objects:
+            obj.product_count = counts[obj.pk]
+        return objects
+
+    def list(self, request, *args, **kwargs):
+        objects = self.with_counts(self.get_queryset())
+        return Response(self.get_serializer(objects, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        obj, = self.with_counts([self.get_object()])
+        return Response(self.get_serializer(obj).data)
+
+
+class CategoryViewSet(ReplicaReadMixin, ProductCountViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Kategorileri aktif ürün sayılarıyla listeler.
+    """
+    queryset = Category.objects.all()
+    serializer_class = CategoryCountSerializer
+    count_scope = 'category'
+
+
+class TagViewSet(ReplicaReadMixin, ProductCountViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Etiketleri aktif ürün sayılarıyla listeler.
+    """
+    queryset = Tag.objects.all()
+    serializer_class = TagCountSerializer
+    count_scope = 'tag'
@@ -0,0 +1,248 @@
+"""
+Ürün listesi önbelleğinin ısıtılması.
+
+Liste istekleri URL'leriyle sayılır; her süreç sayımları kendi içinde
+biriktirir ve aralıklarla paylaşılan önbellekteki sayaçla birleştirir (eski
+sayımlar her birleştirmede azalır). Bir yazma liste kapsamlarının neslini
+artırdığında, etkilenen en çok istenen listeler arka plandaki sınırlı
+sayıda iş parçacığında yeniden oluşturulur; kullanıcılar soğuk önbelleğe
+denk gelmez. Süreç ilk isteği aldığında aynı liste bir kez daha ısıtılır.
+
+Isıtma, isteği ilgili görünümden (senkron veya eşzamansız liste) anonim
+olarak geçirir; önbellek girdisi ve sayfalama bağlantıları gerçek istekle
+aynıdır. Önbellekte zaten bulunan girdiler yeniden hesaplanmaz.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.signals import request_started
+from django.db import close_old_connections, connection
+from django.dispatch import receiver
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve
+
+from .caching import list_generation_keys, product_cache_setting, product_lists_invalidated
+from .instrumentation import cache
+
+logger = logging.getLogger(__name__)
+
+HOT_LISTS_KEY = 'product_list_hot'
+
+# Paylaşılan sayaçta, ısıtılacak listelerin bu katı kadar aday tutulur;
+# yeni popüler listeler sıralamaya buradan girer
+HOT_CANDIDATES_FACTOR = 4
+
+# Her birleştirmede eski sayımların çarpıldığı katsayı
+HOT_DECAY = 0.8
+
+
+class HotListTracker:
+    """
+    Liste isteklerini süreç içinde sayar ve WARM_TRACK_INTERVAL saniyede bir
+    paylaşılan sayaçla birleştirir. Birleştirme oku-değiştir-yaz olduğundan
+    eşzamanlı süreçler arasında az sayıda sayım kaybolabilir; sıralama için
+    bu yeterlidir.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.flushed_at = time.monotonic()
+
+    def record(self, url):
+        counts = self._count(url)
+        if counts is not None:
+            self.flush(counts)
+
+    async def arecord(self, url):
+        """
+        record'un eşzamansız karşılığı; birleştirme eşzamansız önbellek
+        istemcisiyle yapılır ve olay döngüsünü bloklamaz.
+        """
+        counts = self._count(url)
+        if counts is not None:
+            await self.aflush(counts)
+
+    def _count(self, url):
+        # Birleştirme zamanı geldiyse birikmiş sayımları devralıp döndürür
+        with self.lock:
+            self.counts[url] += 1
+            if time.monotonic() - self.flushed_at < product_cache_setting('WARM_TRACK_INTERVAL'):
+                return None
+            counts, self.counts = self.counts, Counter()
+            self.flushed_at = time.monotonic()
+        return counts
+
+    def flush(self, counts=None):
+        if counts is None:
+            with self.lock:
+                counts, self.counts = self.counts, Counter()
+        if counts:
+            cache.set(HOT_LISTS_KEY, self._merge(cache.get(HOT_LISTS_KEY, {}), counts), timeout=None)
+
+    async def aflush(self, counts):
+        if counts:
+            scores = self._merge(await cache.aget(HOT_LISTS_KEY, {}), counts)
+            await cache.aset(HOT_LISTS_KEY, scores, timeout=None)
+
+    def _merge(self, scores, counts):
+        scores = Counter({url: score * HOT_DECAY for url, score in scores.items()})
+        scores.update(counts)
+        limit = product_cache_setting('WARM_MAX_KEYS') * HOT_CANDIDATES_FACTOR
+        return dict(scores.most_common(limit))
+
+
+tracker = HotListTracker()
+
+
+def record_list_request(request):
+    """
+    Liste isteğini sayar; ısıtma istekleri sayılmaz.
+    """
+    if product_cache_setting('WARM_MAX_KEYS') and not getattr(request, 'cache_warming', False):
+        tracker.record(request.build_absolute_uri())
+
+
+async def arecord_list_request(request):
+    """
+    record_list_request'in eşzamansız karşılığı.
+    """
+    if product_cache_setting('WARM_MAX_KEYS') and not getattr(request, 'cache_warming', False):
+        await tracker.arecord(request.build_absolute_uri())
+
+
+def hot_list_urls(limit=None):
+    """
+    En çok istenen liste URL'lerini azalan sırayla döndürür.
+    """
+    limit = product_cache_setting('WARM_MAX_KEYS') if limit is None else limit
+    scores = Counter(cache.get(HOT_LISTS_KEY, {}))
+    return [url for url, _ in scores.most_common(limit)]
+
+
+def _warm_request(url):
+    parts = urlsplit(url)
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = parts.path
+    request.GET = QueryDict(parts.query)
+    request.META = {
+        'HTTP_HOST': parts.netloc,
+        'HTTP_ACCEPT': 'application/json',
+        'QUERY_STRING': parts.query,
+        'SERVER_NAME': parts.hostname,
+        'SERVER_PORT': str(parts.port or (443 if parts.scheme == 'https' else 80)),
+    }
+    request._get_scheme = lambda: parts.scheme
+    # Kimlik doğrulama ara katmanı çalışmadığından anonim kullanıcı atanır
+    request.user = AnonymousUser()
+    request.auser = _anonymous_user
+    request.cache_warming = True
+    return request
+
+
+async def _anonymous_user():
+    return AnonymousUser()
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def warm_url(url):
+    """
+    Listeyi görünümünden geçirerek önbelleğe yazar; durum kodunu döndürür.
+    """
+    request = _warm_request(url)
+    match = resolve(request.path_info)
+    response = match.func(request, *match.args, **match.kwargs)
+    if asyncio.iscoroutine(response):
+        # Eşzamansız liste görünümü
+        response = async_to_sync(_await)(response)
+    return response.status_code
+
+
+class Warmer:
+    """
+    Isıtma işlerini WARM_WORKERS iş parçacıklı bir havuzda çalıştırır. Aynı
+    URL kuyrukta veya çalışırken yeniden eklenmez; veritabanına aynı anda en
+    fazla WARM_WORKERS ısıtma sorgusu gider.
+    """
+
+    def __init__(self):
+        self.executor = None
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def submit(self, urls):
+        workers = product_cache_setting('WARM_WORKERS')
+        if not workers:
+            return
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='product-list-warm')
+            for url in urls:
+                if url not in self.pending:
+                    self.pending.add(url)
+                    self.executor.submit(self.run, url)
+
+    def run(self, url):
+        # İş parçacığının bağlantısı istek döngüsündeki gibi açılıp kapanır
+        close_old_connections()
+        try:
+            warm_url(url)
+        except Exception:
+            # Isıtma en iyi çabayla yapılır; liste ilk istekte yine oluşturulur
+            logger.exception('Ürün listesi ısıtılamadı: %s', url)
+        finally:
+            with self.lock:
+                self.pending.discard(url)
+            close_old_connections()
+
+
+warmer = Warmer()
+
+
+def schedule_warm(urls):
+    """
+    URL'leri arka planda ısıtır. Açık bir işlemin içinden çağrılırsa hiçbir
+    şey yapmaz: diğer iş parçacıkları commit edilmemiş veriyi göremez ve eski
+    sayfayı yeni nesle yazarlardı.
+    """
+    if connection.in_atomic_block:
+        return
+    warmer.submit(urls)
+
+
+@receiver(product_lists_invalidated)
+def warm_invalidated_lists(sender, keys, **kwargs):
+    """
+    Nesli artan kapsamlara bağlı popüler listeleri yeniden ısıtır.
+    """
+    keys = set(keys)
+    urls = []
+    for url in hot_list_urls():
+        params = QueryDict(urlsplit(url).query)
+        if keys.intersection(list_generation_keys(params.get('category'), params.get('tag'))):
+            urls.append(url)
+    schedule_warm(urls)
+
+
+_started = threading.Event()
+
+
+@receiver(request_started)
+def warm_on_startup(sender, **kwargs):
+    # Uygulama hazırlanırken veritabanı kullanılmaz; süreç ilk isteği
+    # aldığında popüler listeler bir kez ısıtılır
+    if _started.is_set() or not product_cache_setting('WARM_ON_STARTUP'):
+        return
+    _started.set()
+    schedule_warm(hot_list_urls())
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.PerformanceMiddleware', # Outermost so its timings cover the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,11 +80,72 @@ WSGI_APPLICATION = 'django_questions.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite backend that queues writers within the process (api/backends/sqlite3)
+        'ENGINE': 'api.backends.sqlite3',
+        # Sample development database (tracked, already in WAL mode: journal_mode=WAL
+        # persists in the file, so only the first conversion rewrites its header).
+        # Run `manage.py migrate` after pulling new migrations.
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock at BEGIN instead of failing on a read-to-write upgrade
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20, # busy_timeout in seconds
+            # WAL lets readers run alongside the writer; NORMAL sync is durable in WAL
+            # mode except for the last commits on power loss
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA cache_size=-65536;' # 64 MiB page cache per connection
+                'PRAGMA mmap_size=268435456;' # 256 MiB memory-mapped reads
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
     }
 }
 
+# Production profile (DJANGO_DB_PROFILE=production): PostgreSQL through the psycopg 3
+# connection pool. Each worker keeps its connections open and borrows one per
+# request, so connection setup is off the request path. Product API GETs are routed
+# to the replicas in POSTGRES_REPLICA_HOSTS (see api/db_routers.py).
+DATABASE_REPLICAS = []
+
+if os.environ.get('DJANGO_DB_PROFILE') == 'production':
+    from psycopg_pool import ConnectionPool
+
+    def postgres_database(host, **extra):
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'HOST': host,
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'NAME': os.environ['POSTGRES_DB'],
+            'USER': os.environ['POSTGRES_USER'],
+            'PASSWORD': os.environ['POSTGRES_PASSWORD'],
+            # Pooled connections replace persistent ones, so CONN_MAX_AGE stays 0
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 10)),
+                    'timeout': 5, # Seconds to wait for a free connection
+                    'max_idle': 300,
+                    'max_lifetime': 1800,
+                    'check': ConnectionPool.check_connection, # Health check on checkout
+                },
+                'connect_timeout': 3,
+                'options': '-c statement_timeout={} -c idle_in_transaction_session_timeout=10000'.format(
+                    os.environ.get('POSTGRES_STATEMENT_TIMEOUT_MS', 5000)
+                ),
+            },
+            **extra,
+        }
+
+    DATABASES = {'default': postgres_database(os.environ['POSTGRES_HOST'])}
+    replica_hosts = [host for host in os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',') if host]
+    for index, host in enumerate(replica_hosts, start=1):
+        DATABASES[f'replica_{index}'] = postgres_database(host, TEST={'MIRROR': 'default'})
+        DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['api.db_routers.PrimaryReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -134,3 +197,60 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly', # Default permission for all views if not specified explicitly
     ]
 }
+
+# Caches
+# Without REDIS_URL every process keeps its own LocMemCache. With it, the default
+# cache is two-tier (api/cache_backends.py): a small per-process L1 in front of the
+# shared Redis L2, with L1 evictions broadcast to the other workers over pub/sub.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'api.cache_backends.TieredCache',
+            'LOCATION': 'shared', # Alias of the L2 cache below
+            'OPTIONS': {
+                'L1_TIMEOUT': 5,
+                'L1_MAX_ENTRIES': 1000,
+                'BROADCAST': 'api.cache_backends.RedisBroadcast',
+                'BROADCAST_OPTIONS': {'url': REDIS_URL},
+            },
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            # Passed to the redis-py connection pool shared by the process
+            'OPTIONS': {
+                'max_connections': 50,
+                'socket_connect_timeout': 0.5,
+                'socket_timeout': 0.5,
+                'health_check_interval': 30,
+            },
+        },
+    }
+
+# Product API cache tuning (defaults live in api/caching.py)
+PRODUCT_CACHE = {
+    'LIST_TIMEOUT': 60 * 30,
+    'GZIP_MIN_SIZE': 1024, # Also store a gzip copy of payloads at least this large; None disables it
+    # Stampede protection: one worker rebuilds a missing entry under a cache lock,
+    # the others serve the stale copy or wait up to LOCK_WAIT seconds
+    'LOCK_TIMEOUT': 10,
+    'LOCK_WAIT': 2.0,
+    'STALE_TIMEOUT': 60 * 60 * 24,
+    'EARLY_REFRESH_BETA': 1.0, # Probabilistic early refresh before expiry; 0 disables it
+    # Cache warming: the most requested lists are rebuilt in background threads after
+    # an invalidation and on the first request of each process. Run
+    # `manage.py warm_product_lists` after a deploy to warm them on demand
+    'WARM_WORKERS': 2, # Concurrent warm-ups per process; 0 disables background warming
+    'WARM_MAX_KEYS': 50,
+}
+
+# Per-request performance metrics (defaults live in api/instrumentation.py).
+# Totals are served in Prometheus text format at /api/metrics/, and the
+# Server-Timing header is added, only for staff users and the scraper addresses
+# listed in METRICS_ALLOWED_IPS
+INSTRUMENTATION = {
+    'SERVER_TIMING': True, # Add a Server-Timing header with db/cache/serialize/render timings
+    'METRICS_ALLOWED_IPS': [], # e.g. ['10.0.0.5'] for the Prometheus server
+}